@@ -0,0 +1,270 @@
+import atexit
+import json
+import os
+import threading
+import numpy as np
+from numpy.lib.format import open_memmap
+
+META_VERSION = 1
+
+
+class IVFIndex:
+    """Índice aproximado IVF-flat persistido en disco.
+
+    Los vectores normalizados viven en ficheros .npy abiertos con memmap, así
+    que varios procesos comparten las mismas páginas en la caché del sistema y
+    el arranque no tiene que leer ni decodificar todo el corpus. Los vectores
+    se agrupan con KMeans en `nlist` listas contiguas; cada consulta solo
+    recorre las `nprobe` listas con centroide más parecido.
+
+    Las inserciones nuevas se añaden al final con su lista asignada y se
+    recorren aparte hasta la siguiente reconstrucción (needs_rebuild()).
+    meta.json se actualiza cada `meta_every` inserciones y con flush(); las
+    que se pierdan en una caída se recuperan de la BD a partir de max_id.
+    """
+
+    def __init__(self, path: str, nprobe: int = 16, rebuild_ratio: float = 0.2, meta_every: int = 256):
+        self.path = path
+        self.nprobe = nprobe
+        self.rebuild_ratio = rebuild_ratio
+        self.meta_every = meta_every
+        self._lock = threading.Lock()
+        self.dim = None
+        self.max_id = 0
+        self._size = 0
+        self._built = 0
+        self._vectors = None
+        self._ids = None
+        self._lists = None
+        self._centroids = None
+        self._offsets = None
+        self._pending = None
+        self._unsaved = 0
+        atexit.register(self.flush)
+
+    def __len__(self):
+        return self._size
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix
+
+    def open(self) -> bool:
+        """Abre el índice guardado; devuelve False si no existe o no es legible."""
+        try:
+            with open(self._file("meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != META_VERSION:
+                return False
+            with self._lock:
+                self._close()
+                self._vectors = np.load(self._file("vectors.npy"), mmap_mode="r+")
+                self._ids = np.load(self._file("ids.npy"), mmap_mode="r+")
+                self._lists = np.load(self._file("lists.npy"), mmap_mode="r+")
+                self._centroids = np.load(self._file("centroids.npy"))
+                self._offsets = np.load(self._file("offsets.npy"))
+                self.dim = meta["dim"]
+                self._size = meta["size"]
+                self._built = meta["built"]
+                self.max_id = meta["max_id"]
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            if os.path.exists(self._file("meta.json")):
+                print(f"IVFIndex: No se pudo abrir el índice en {self.path}: {e}")
+            return False
+
+    def _close(self):
+        # En Windows un fichero mapeado no se puede reemplazar: se sueltan las referencias antes
+        self._vectors = self._ids = self._lists = None
+
+    def flush(self):
+        """Vuelca los vectores añadidos y guarda meta.json."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._vectors is None or not self._unsaved:
+            return
+        self._vectors.flush(), self._ids.flush(), self._lists.flush()
+        self._write_meta()
+        self._unsaved = 0
+
+    def _write_meta(self):
+        meta = {
+            "version": META_VERSION, "dim": self.dim, "nlist": len(self._centroids),
+            "size": self._size, "built": self._built, "max_id": self.max_id
+        }
+        tmp = self._file("meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._file("meta.json"))
+
+    def _allocate(self, suffix: str, capacity: int, dim: int):
+        vectors = open_memmap(self._file(f"vectors{suffix}.npy"), mode="w+", dtype=np.float32, shape=(capacity, dim))
+        ids = open_memmap(self._file(f"ids{suffix}.npy"), mode="w+", dtype=np.int64, shape=(capacity,))
+        lists = open_memmap(self._file(f"lists{suffix}.npy"), mode="w+", dtype=np.int32, shape=(capacity,))
+        return vectors, ids, lists
+
+    def _swap_in(self, suffix: str, names=("vectors", "ids", "lists")):
+        self._close()
+        for name in names:
+            os.replace(self._file(f"{name}{suffix}.npy"), self._file(f"{name}.npy"))
+        self._vectors = np.load(self._file("vectors.npy"), mmap_mode="r+")
+        self._ids = np.load(self._file("ids.npy"), mmap_mode="r+")
+        self._lists = np.load(self._file("lists.npy"), mmap_mode="r+")
+
+    def load(self, ids, vectors, nlist: int = None, train_sample: int = 100_000, seed: int = 0):
+        """Construye el índice desde cero con KMeans y lo guarda (misma firma que VectorIndex.load)."""
+        ids = np.asarray(ids, dtype=np.int64)
+        n = len(ids)
+        if n == 0:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(n, -1)
+        os.makedirs(self.path, exist_ok=True)
+
+        # Menos de ~1000 vectores: una sola lista, que equivale a la búsqueda exacta
+        if nlist is None:
+            nlist = 1 if n < 1000 else int(min(4096, max(1, np.sqrt(n))))
+        rng = np.random.default_rng(seed)
+        sample = vectors[np.sort(rng.choice(n, min(n, max(train_sample, nlist * 40)), replace=False))]
+        sample = self._normalize(np.array(sample, dtype=np.float32))
+        if nlist == 1:
+            centroids = self._normalize(sample.mean(axis=0, keepdims=True))
+        else:
+            from sklearn.cluster import MiniBatchKMeans
+            kmeans = MiniBatchKMeans(n_clusters=nlist, batch_size=4096, n_init=3, random_state=seed)
+            centroids = self._normalize(kmeans.fit(sample).cluster_centers_.astype(np.float32))
+
+        # Asignación por bloques para no duplicar en memoria toda la matriz
+        assign = np.empty(n, dtype=np.int32)
+        for start in range(0, n, 65536):
+            block = self._normalize(np.array(vectors[start:start + 65536], dtype=np.float32))
+            assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.searchsorted(assign[order], np.arange(nlist + 1)).astype(np.int64)
+
+        # Los ficheros nuevos se escriben aparte; el índice en uso solo se bloquea para el cambio final
+        new_vectors, new_ids, new_lists = self._allocate(".new", max(1024, int(n * 1.25)), vectors.shape[1])
+        for start in range(0, n, 65536):
+            rows = order[start:start + 65536]
+            new_vectors[start:start + len(rows)] = self._normalize(np.array(vectors[rows], dtype=np.float32))
+            new_ids[start:start + len(rows)] = ids[rows]
+            new_lists[start:start + len(rows)] = assign[rows]
+        new_vectors.flush(), new_ids.flush(), new_lists.flush()
+        del new_vectors, new_ids, new_lists
+        np.save(self._file("centroids.new.npy"), centroids)
+        np.save(self._file("offsets.new.npy"), offsets)
+
+        with self._lock:
+            self._swap_in(".new", ("vectors", "ids", "lists", "centroids", "offsets"))
+            self.dim = vectors.shape[1]
+            self._centroids = centroids
+            self._offsets = offsets
+            self._size = self._built = n
+            self.max_id = int(ids.max())
+            # Inserciones llegadas durante una reconstrucción: se aplican dentro del mismo bloqueo del cambio
+            pending, self._pending = self._pending or [], None
+            for dream_id, vec in pending:
+                self._append(dream_id, vec)
+            if pending:
+                self._vectors.flush(), self._ids.flush(), self._lists.flush()
+            self._write_meta()
+            self._unsaved = 0
+        print(f"IVFIndex: Índice construido con {n} vectores en {nlist} listas.")
+
+    def rebuild(self):
+        # Las inserciones que lleguen mientras se reconstruye se anotan aparte y load() las aplica al índice nuevo
+        with self._lock:
+            if self._pending is not None:
+                return
+            self._pending = []
+            ids = np.array(self._ids[:self._size])
+            vectors = np.array(self._vectors[:self._size])
+        try:
+            self.load(ids, vectors)
+        finally:
+            with self._lock:
+                # Si la construcción falló, esas inserciones ya están en los ficheros actuales
+                self._pending = None
+
+    def needs_rebuild(self) -> bool:
+        tail = self._size - self._built
+        return tail > max(1000, self.rebuild_ratio * self._built)
+
+    def _grow(self, needed: int):
+        capacity = max(needed, self._vectors.shape[0] * 2)
+        vectors, ids, lists = self._allocate(".grow", capacity, self.dim)
+        vectors[:self._size] = self._vectors[:self._size]
+        ids[:self._size] = self._ids[:self._size]
+        lists[:self._size] = self._lists[:self._size]
+        vectors.flush(), ids.flush(), lists.flush()
+        del vectors, ids, lists
+        self._swap_in(".grow")
+
+    def add(self, dream_id: int, vector) -> bool:
+        vec = np.asarray(vector, dtype=np.float32).ravel()
+        if self._centroids is None or vec.size != self.dim:
+            return False
+        norm = np.linalg.norm(vec)
+        if norm == 0:
+            return False
+        vec = vec / norm
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((dream_id, vec))
+            self._append(dream_id, vec)
+            self._unsaved += 1
+            if self._unsaved >= self.meta_every:
+                self._flush_locked()
+        return True
+
+    def _append(self, dream_id: int, vec: np.ndarray):
+        if self._size >= self._vectors.shape[0]:
+            self._grow(self._size + 1)
+        self._vectors[self._size] = vec
+        self._ids[self._size] = dream_id
+        self._lists[self._size] = int(np.argmax(self._centroids @ vec))
+        self._size += 1
+        self.max_id = max(self.max_id, int(dream_id))
+
+    def search(self, query, top_k: int = 5, nprobe: int = None) -> list:
+        q = np.asarray(query, dtype=np.float32).ravel()
+        with self._lock:
+            if self._size == 0 or top_k <= 0 or q.size != self.dim:
+                return []
+            norm = np.linalg.norm(q)
+            if norm == 0:
+                return []
+            q = q / norm
+
+            nlist = len(self._centroids)
+            nprobe = min(nprobe or self.nprobe, nlist)
+            centroid_scores = self._centroids @ q
+            probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe] if nprobe < nlist else np.arange(nlist)
+
+            score_parts, id_parts = [], []
+            for l in probe:
+                a, b = self._offsets[l], self._offsets[l + 1]
+                if b > a:
+                    score_parts.append(self._vectors[a:b] @ q)
+                    id_parts.append(self._ids[a:b])
+            if self._size > self._built:
+                tail = self._built + np.nonzero(np.isin(self._lists[self._built:self._size], probe))[0]
+                if tail.size:
+                    score_parts.append(self._vectors[tail] @ q)
+                    id_parts.append(self._ids[tail])
+            if not score_parts:
+                return []
+            scores = np.concatenate(score_parts)
+            ids = np.concatenate(id_parts)
+
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top]
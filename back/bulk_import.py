@@ -0,0 +1,151 @@
+import argparse
+import csv
+import json
+import os
+import time
+from datetime import datetime
+
+
+def iter_records(path: str):
+    """Lee un archivo JSONL o CSV registro a registro, sin cargarlo entero en memoria."""
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, encoding="utf-8", newline="") as f:
+        if ext == ".csv":
+            for row in csv.DictReader(f):
+                yield row
+        else:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"BulkImporter: Línea {line_no} ignorada, JSON inválido: {e}")
+
+
+def _parse_date(value):
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+
+
+class BulkImporter:
+    # emotion_mode: "none" deja la emoción del archivo (o vacía) y encola las vacías en la cola de
+    # enriquecimiento para después, "local" usa el clasificador de embeddings y "llm" recurre a gpt-4o
+    # si el local no está seguro.
+    def __init__(self, ia_service, encode_batch_size: int = 256, chunk_size: int = 1000, emotion_mode: str = "local"):
+        self.ia_service = ia_service
+        self.db_manager = ia_service.db_manager
+        self.encode_batch_size = encode_batch_size
+        self.chunk_size = chunk_size
+        self.emotion_mode = emotion_mode
+        self._last_unlabeled_id = 0
+        self.enqueued = 0
+        if emotion_mode != "none":
+            ia_service.ensure_emotion_classifier()
+
+    def _normalize_record(self, rec: dict):
+        title = (rec.get("title") or rec.get("titulo") or "").strip()
+        content = (rec.get("content") or rec.get("contenido") or "").strip()
+        if not content:
+            return None
+        emotion = rec.get("emotion_tag") or rec.get("emotion") or None
+        return {
+            "title": title or content[:60],
+            "content": content,
+            "date_recorded": _parse_date(rec.get("date_recorded") or rec.get("date") or rec.get("fecha")),
+            "emotion": emotion if emotion in self.ia_service.EMOTION_CATEGORIES else None,
+            "creative_format": rec.get("creative_format") or None,
+            "creative_text": rec.get("creative_text") or None,
+            "analysis_text": rec.get("analysis_text") or None,
+        }
+
+    def _enrich_emotions(self, chunk: list, embeddings):
+        if self.emotion_mode == "none":
+            return
+        classifier = self.ia_service.emotion_classifier
+        pending = []
+        for d, emb in zip(chunk, embeddings):
+            if d["emotion"]:
+                continue
+            if classifier:
+                d["emotion"], _ = classifier.predict(emb)
+                d["emotion_source"] = "local"
+            if not d["emotion"] and self.emotion_mode == "llm":
+                pending.append((d, emb))
+        if pending:
+            results = self.ia_service.classify_many([(d["content"], emb) for d, emb in pending])
+            for (d, _), (emotion, source) in zip(pending, results):
+                valid = emotion in self.ia_service.EMOTION_CATEGORIES
+                d["emotion"] = emotion if valid else None
+                d["emotion_source"] = source if valid else None
+
+    def _flush(self, chunk: list) -> int:
+        embeddings = self.ia_service.generate_embeddings([d["content"] for d in chunk], batch_size=self.encode_batch_size)
+        if embeddings is None:
+            embeddings = [None] * len(chunk)
+        self._enrich_emotions(chunk, embeddings)
+        for d, emb in zip(chunk, embeddings):
+            d["embedding"] = emb
+            d["embedding_model_version"] = self.ia_service.embedding_model_version
+        saved = self.db_manager.save_dreams_bulk(chunk)
+        if saved and self.emotion_mode == "none":
+            self._enqueue_unlabeled()
+        return saved
+
+    def _enqueue_unlabeled(self):
+        # Tras cada bloque guardado: si la importación se corta, lo ya guardado ya está en la cola.
+        # También recoge sueños sin emoción de importaciones anteriores; encolar dos veces no duplica
+        ids = self.db_manager.fetch_unlabeled_dream_ids(self._last_unlabeled_id)
+        if ids:
+            self.enqueued += self.ia_service.enqueue_enrichment(ids, ["emotion"])
+            self._last_unlabeled_id = ids[-1]
+
+    def run(self, path: str) -> int:
+        if not self.db_manager:
+            print("BulkImporter: Gestor de Base de Datos no inicializado.")
+            return 0
+
+        start = time.perf_counter()
+        imported = 0
+        skipped = 0
+        chunk = []
+        for rec in iter_records(path):
+            d = self._normalize_record(rec)
+            if d is None:
+                skipped += 1
+                continue
+            chunk.append(d)
+            if len(chunk) >= self.chunk_size:
+                imported += self._flush(chunk)
+                chunk = []
+                rate = imported / max(time.perf_counter() - start, 1e-9)
+                print(f"BulkImporter: {imported} sueños importados ({rate:.0f}/s)...")
+        if chunk:
+            imported += self._flush(chunk)
+
+        self.ia_service.invalidate_vector_index()
+        elapsed = time.perf_counter() - start
+        print(f"BulkImporter: Importación terminada: {imported} sueños en {elapsed:.1f}s ({skipped} registros ignorados).")
+        if self.enqueued:
+            print(f"BulkImporter: {self.enqueued} sueños sin emoción en la cola de enriquecimiento "
+                  "(se procesan al arrancar con DREAMS_DEFERRED_ENRICHMENT=1).")
+        return imported
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa sueños en bloque desde un archivo JSONL o CSV.")
+    parser.add_argument("path")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Sueños por transacción")
+    parser.add_argument("--batch-size", type=int, default=256, help="Tamaño de lote para el modelo de embeddings")
+    parser.add_argument("--emotion", choices=["none", "local", "llm"], default="local")
+    args = parser.parse_args()
+
+    from back.ia_services import IAService
+    BulkImporter(IAService(), encode_batch_size=args.batch_size, chunk_size=args.chunk_size, emotion_mode=args.emotion).run(args.path)
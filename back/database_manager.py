@@ -1,12 +1,24 @@
 # ===== UPDATED: back/database_manager.py =====
 import os
 import json
+import threading
+import time
+from datetime import datetime
 import numpy as np
 import mysql.connector
+from mysql.connector import pooling
 from dotenv import load_dotenv
+from back.embedding_codec import encode_embedding, decode_embedding_rows, embedding_model_version as current_embedding_model_version
+from back.text_terms import term_counts
 
 load_dotenv()
 
+# Sueños cuyo embedding falta o lo generó otro modelo: los que recalcula back/reembed.py
+STALE_EMBEDDING_FILTER = (
+    "(embedding_model_version IS NULL OR embedding_model_version <> %s "
+    "OR (embedding_blob IS NULL AND embedding_vector IS NULL))"
+)
+
 class DatabaseManager:
     def __init__(self):
         self.config = {
@@ -16,9 +28,30 @@ class DatabaseManager:
             'database': os.environ.get("MYSQL_DATABASE"),
             'port': os.environ.get("MYSQL_PORT",)
         }
+        # "float32" (por defecto), "float16" o "json" para el formato antiguo en texto
+        self.embedding_storage = os.environ.get("DREAMS_EMBEDDING_STORAGE", "float32").lower()
+
+        # Pool de conexiones compartido por los hilos del dashboard. MYSQL_POOL_SIZE=0 lo desactiva.
+        self.pool_size = int(os.environ.get("MYSQL_POOL_SIZE", "5"))
+        self.pool_recycle = float(os.environ.get("MYSQL_POOL_RECYCLE", "1800"))
+        self.pool_ping_after = float(os.environ.get("MYSQL_POOL_PING_AFTER", "30"))
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._pool_slots = threading.BoundedSemaphore(max(self.pool_size, 1))
+        self._pool_stats = {}
+        # Cada hilo tiene su propia conexión en curso
+        self._local = threading.local()
         self.connection = None
         self._ensure_database_and_table()
 
+    @property
+    def connection(self):
+        return getattr(self._local, "connection", None)
+
+    @connection.setter
+    def connection(self, value):
+        self._local.connection = value
+
     def _ensure_database_and_table(self):
         temp_config = {k: v for k, v in self.config.items() if k != 'database'}
         try:
@@ -28,18 +61,106 @@ class DatabaseManager:
             cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.config['database']}")
             conn.database = self.config['database']
 
-            create_table_query = """"""
+            create_table_query = """
+            CREATE TABLE IF NOT EXISTS dreams (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                title VARCHAR(255) NOT NULL,
+                content TEXT NOT NULL,
+                date_recorded DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                emotion_tag VARCHAR(32),
+                creative_format VARCHAR(32),
+                creative_text TEXT,
+                analysis_text TEXT,
+                embedding_vector LONGTEXT,
+                embedding_blob BLOB,
+                embedding_model_version VARCHAR(128),
+                emotion_source VARCHAR(16),
+                INDEX idx_dreams_date_id (date_recorded, id)
+            )
+            """
             cursor.execute(create_table_query)
+
+            cursor.execute(
+                "SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'dreams' AND COLUMN_NAME = 'embedding_blob'",
+                (self.config['database'],)
+            )
+            if cursor.fetchone()[0] == 0:
+                cursor.execute("ALTER TABLE dreams ADD COLUMN embedding_blob BLOB")
+                print("DatabaseManager: Columna 'embedding_blob' añadida. Ejecuta migrate_json_embeddings() para convertir los vectores antiguos.")
+
+            cursor.execute(
+                "SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'dreams' AND COLUMN_NAME = 'embedding_model_version'",
+                (self.config['database'],)
+            )
+            if cursor.fetchone()[0] == 0:
+                # Los vectores ya guardados se atribuyen al modelo configurado; con DEFAULT el
+                # ALTER es instantáneo y no reescribe la tabla
+                version = current_embedding_model_version().replace("'", "''")
+                cursor.execute(f"ALTER TABLE dreams ADD COLUMN embedding_model_version VARCHAR(128) DEFAULT '{version}'")
+                print(f"DatabaseManager: Columna 'embedding_model_version' añadida; los embeddings existentes se marcan como '{version}'.")
+
+            cursor.execute(
+                "SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'dreams' AND COLUMN_NAME = 'emotion_source'",
+                (self.config['database'],)
+            )
+            if cursor.fetchone()[0] == 0:
+                # Quién puso la emoción ("ia" o "local"); las ya guardadas quedan a NULL y no entrenan el clasificador
+                cursor.execute("ALTER TABLE dreams ADD COLUMN emotion_source VARCHAR(16)")
+                print("DatabaseManager: Columna 'emotion_source' añadida.")
+
+            self._ensure_index(cursor, "idx_dreams_date_id", "CREATE INDEX idx_dreams_date_id ON dreams (date_recorded, id)")
+            # Búsqueda por palabras clave (nombres, lugares) que los embeddings no distinguen bien
+            self._ensure_index(cursor, "ft_dreams_text", "ALTER TABLE dreams ADD FULLTEXT INDEX ft_dreams_text (title, content)")
+
+            # Conteos diarios por emoción, mantenidos en cada inserción para que los gráficos no lean todo el corpus
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS dream_emotion_daily (
+                day DATE NOT NULL,
+                emotion_tag VARCHAR(32) NOT NULL,
+                dream_count INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, emotion_tag)
+            )
+            """)
+            cursor.execute("SELECT EXISTS(SELECT 1 FROM dream_emotion_daily), EXISTS(SELECT 1 FROM dreams)")
+            has_aggregates, has_dreams = cursor.fetchone()
+            if has_dreams and not has_aggregates:
+                self._rebuild_emotion_aggregates(cursor)
+
+            # Frecuencia de términos por mes para la nube de palabras (collation binaria: "año" != "ano")
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS dream_term_monthly (
+                month CHAR(7) NOT NULL,
+                term VARCHAR(64) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+                term_count INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (month, term)
+            )
+            """)
+            cursor.execute("SELECT EXISTS(SELECT 1 FROM dream_term_monthly)")
+            has_terms = cursor.fetchone()[0]
             conn.commit()
+            if has_dreams and not has_terms:
+                self._rebuild_term_index(conn)
             cursor.close()
             conn.close()
             print(f"DatabaseManager: Base de datos y tabla '{self.config['database']}.dreams' listas.")
 
         except mysql.connector.Error as err:
+            # Sin exit(): IAService sigue arrancando sin BD y la interfaz lo muestra
             print(f"Error en _ensure_database_and_table: {err}")
-            exit()
+            raise
+
+    def _ensure_index(self, cursor, index_name: str, create_sql: str, table: str = "dreams"):
+        cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND INDEX_NAME = %s",
+            (self.config['database'], table, index_name)
+        )
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(create_sql)
+            print(f"DatabaseManager: Índice '{index_name}' creado.")
 
     def connect(self):
+        if self.pool_size > 0:
+            return self._connect_pooled()
         try:
             self.connection = mysql.connector.connect(**self.config)
             if self.connection.is_connected():
@@ -49,28 +170,103 @@ class DatabaseManager:
             self.connection = None
             return False
 
-    def close(self):
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
+    def _connect_pooled(self):
+        # get_connection() falla en vez de esperar si el pool está agotado: el semáforo hace esperar al hilo
+        self._pool_slots.acquire()
+        conn = None
+        try:
+            if self._pool is None:
+                with self._pool_lock:
+                    if self._pool is None:
+                        self._pool = pooling.MySQLConnectionPool(
+                            pool_name="dreams_pool", pool_size=self.pool_size, pool_reset_session=True, **self.config
+                        )
+                        print(f"DatabaseManager: Pool de {self.pool_size} conexiones creado.")
+            conn = self._pool.get_connection()
+            # El PooledMySQLConnection es nuevo en cada préstamo: la edad y el último uso se anotan por
+            # connection_id, el id de la sesión en el servidor, que cambia cuando la conexión se rehace
+            now = time.monotonic()
+            session = conn.connection_id
+            if len(self._pool_stats) > 2 * self.pool_size:
+                # Sesiones que el pool rehízo por su cuenta (p. ej. tras reiniciar MySQL)
+                self._pool_stats = {k: v for k, v in self._pool_stats.items() if now - v["last_used"] <= self.pool_recycle}
+            stats = self._pool_stats.setdefault(session, {"born": now, "last_used": now})
+            if now - stats["born"] > self.pool_recycle:
+                conn.reconnect(attempts=2, delay=0)
+            elif now - stats["last_used"] > self.pool_ping_after:
+                conn.ping(reconnect=True, attempts=2, delay=0)
+            if conn.connection_id != session:
+                self._pool_stats.pop(session, None)
+                self._pool_stats[conn.connection_id] = {"born": now, "last_used": now}
+            self.connection = conn
+            return True
+        except mysql.connector.Error as err:
+            print(f"Error de conexión a MySQL: {err}")
             self.connection = None
+            if conn is not None:
+                try:
+                    # Se devuelve al pool aunque esté rota: get_connection() la reconecta en el siguiente préstamo
+                    conn.close()
+                except mysql.connector.Error:
+                    pass
+            self._pool_slots.release()
+            return False
+
+    def close(self):
+        conn = self.connection
+        if conn is None:
+            return
+        self.connection = None
+        if self.pool_size > 0:
+            stats = self._pool_stats.get(conn.connection_id)
+            if stats:
+                stats["last_used"] = time.monotonic()
+            try:
+                # En una conexión del pool, close() la devuelve al pool
+                conn.close()
+            except mysql.connector.Error as err:
+                print(f"Error al devolver la conexión al pool: {err}")
+            finally:
+                self._pool_slots.release()
+        elif conn.is_connected():
+            conn.close()
             
-    def save_dream(self, title: str, content: str, emotion: str, embedding, creative_text: str = None, creative_format: str = None, analysis_text: str = None):
+    def _serialize_embedding(self, embedding):
+        if self.embedding_storage == "json":
+            return (json.dumps(np.array(embedding).tolist()) if embedding is not None else json.dumps([])), None
+        return None, encode_embedding(embedding, self.embedding_storage)
+
+    def save_dream(self, title: str, content: str, emotion: str, embedding, creative_text: str = None, creative_format: str = None, analysis_text: str = None,
+                   embedding_model_version: str = None, emotion_source: str = None):
         if not self.connect():
             return False
 
-        embedding_json = json.dumps(np.array(embedding).tolist()) if embedding is not None else json.dumps([])
+        embedding_json, embedding_blob = self._serialize_embedding(embedding)
+        # Sin versión explícita, el vector es del modelo configurado; sin vector no hay versión
+        model_version = (embedding_model_version or current_embedding_model_version()) if embedding is not None else None
 
         try:
             cursor = self.connection.cursor()
             query = """
-            INSERT INTO dreams (title, content, emotion_tag, creative_format, creative_text, analysis_text, embedding_vector)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            INSERT INTO dreams (title, content, emotion_tag, creative_format, creative_text, analysis_text, embedding_vector, embedding_blob, embedding_model_version, emotion_source)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             """
-            data = (title, content, emotion, creative_format, creative_text, analysis_text, embedding_json)
+            data = (title, content, emotion, creative_format, creative_text, analysis_text, embedding_json, embedding_blob, model_version,
+                    emotion_source if emotion else None)
             cursor.execute(query, data)
+            dream_id = cursor.lastrowid
+            cursor.execute("""
+            INSERT INTO dream_emotion_daily (day, emotion_tag, dream_count)
+            SELECT DATE(date_recorded), COALESCE(emotion_tag, 'Indefinida'), 1 FROM dreams WHERE id = %s
+            ON DUPLICATE KEY UPDATE dream_count = dream_count + 1
+            """, (dream_id,))
+            # El mes sale de la fecha que puso el servidor, igual que en _rebuild_term_index
+            cursor.execute("SELECT date_recorded FROM dreams WHERE id = %s", (dream_id,))
+            month = cursor.fetchall()[0][0].strftime("%Y-%m")
+            self._add_term_counts(cursor, {(month, term): n for term, n in term_counts(content).items()})
             self.connection.commit()
-            print(f"DatabaseManager: Sueño '{title}' guardado con ID: {cursor.lastrowid}")
-            return True
+            print(f"DatabaseManager: Sueño '{title}' guardado con ID: {dream_id}")
+            return dream_id
         except mysql.connector.Error as err:
             print(f"Error al guardar sueño: {err}")
             self.connection.rollback()
@@ -78,6 +274,112 @@ class DatabaseManager:
         finally:
             self.close()
 
+    def update_dream_enrichment(self, dream_id: int, emotion: str = None, creative_text: str = None, analysis_text: str = None,
+                                emotion_source: str = None) -> bool:
+        """Rellena los campos de IA de un sueño guardado antes de enriquecerlo.
+
+        Solo se escriben los campos que siguen a NULL, así que repetir la misma
+        tarea no cambia nada. Devuelve False si hay que reintentar.
+        """
+        if not self.connect():
+            return False
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "SELECT DATE(date_recorded), emotion_tag, creative_text, analysis_text FROM dreams WHERE id = %s FOR UPDATE",
+                (dream_id,)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                # El sueño ya no existe: no hay nada que reintentar
+                self.connection.rollback()
+                return True
+            day, current_emotion, current_creative, current_analysis = row
+
+            updates = {}
+            if emotion is not None and current_emotion is None:
+                updates['emotion_tag'] = emotion
+                updates['emotion_source'] = emotion_source
+            if creative_text is not None and current_creative is None:
+                updates['creative_text'] = creative_text
+            if analysis_text is not None and current_analysis is None:
+                updates['analysis_text'] = analysis_text
+            if updates:
+                assignments = ", ".join(f"{col} = %s" for col in updates)
+                cursor.execute(f"UPDATE dreams SET {assignments} WHERE id = %s", tuple(updates.values()) + (dream_id,))
+            if 'emotion_tag' in updates:
+                # El sueño contaba como 'Indefinida' mientras no tenía emoción
+                cursor.execute(
+                    "UPDATE dream_emotion_daily SET dream_count = dream_count - 1 WHERE day = %s AND emotion_tag = 'Indefinida'",
+                    (day,)
+                )
+                cursor.execute("""
+                INSERT INTO dream_emotion_daily (day, emotion_tag, dream_count) VALUES (%s, %s, 1)
+                ON DUPLICATE KEY UPDATE dream_count = dream_count + 1
+                """, (day, emotion))
+            self.connection.commit()
+            return True
+        except mysql.connector.Error as err:
+            print(f"Error al actualizar el enriquecimiento del sueño {dream_id}: {err}")
+            self.connection.rollback()
+            return False
+        finally:
+            self.close()
+
+    def save_dreams_bulk(self, dreams: list) -> int:
+        """Inserta muchos sueños en una sola transacción con executemany.
+
+        Cada elemento es un dict con las claves de save_dream más, opcionalmente,
+        date_recorded, embedding_model_version y emotion_source.
+        """
+        if not dreams or not self.connect():
+            return 0
+
+        now = datetime.now()
+        default_version = current_embedding_model_version()
+        data = []
+        for d in dreams:
+            embedding_json, embedding_blob = self._serialize_embedding(d.get('embedding'))
+            data.append((
+                d['title'], d['content'], d.get('date_recorded') or now, d.get('emotion'),
+                d.get('creative_format'), d.get('creative_text'), d.get('analysis_text'),
+                embedding_json, embedding_blob,
+                (d.get('embedding_model_version') or default_version) if d.get('embedding') is not None else None,
+                d.get('emotion_source') if d.get('emotion') else None
+            ))
+
+        try:
+            cursor = self.connection.cursor()
+            query = """
+            INSERT INTO dreams (title, content, date_recorded, emotion_tag, creative_format, creative_text, analysis_text, embedding_vector, embedding_blob, embedding_model_version, emotion_source)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """
+            cursor.executemany(query, data)
+
+            daily = {}
+            for row in data:
+                key = (row[2].date(), row[3] or 'Indefinida')
+                daily[key] = daily.get(key, 0) + 1
+            cursor.executemany("""
+            INSERT INTO dream_emotion_daily (day, emotion_tag, dream_count) VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE dream_count = dream_count + VALUES(dream_count)
+            """, [(day, emotion, n) for (day, emotion), n in daily.items()])
+
+            terms = {}
+            for row in data:
+                month = row[2].strftime("%Y-%m")
+                for term, n in term_counts(row[1]).items():
+                    terms[(month, term)] = terms.get((month, term), 0) + n
+            self._add_term_counts(cursor, terms)
+            self.connection.commit()
+            return len(data)
+        except mysql.connector.Error as err:
+            print(f"Error al guardar sueños en bloque: {err}")
+            self.connection.rollback()
+            return 0
+        finally:
+            self.close()
+
     def fetch_all_dreams(self) -> list:
         if not self.connect():
             return []
@@ -93,6 +395,41 @@ class DatabaseManager:
         finally:
             self.close()
 
+    def fetch_dreams_page(self, after=None, before=None, limit: int = 100, with_previews: bool = False) -> list:
+        """Página de sueños ordenada por (date_recorded, id) descendente, por keyset.
+
+        after/before son la clave (date_recorded, id) de la última/primera fila ya
+        mostrada; con before se devuelve la página anterior, también en orden descendente.
+        """
+        if not self.connect():
+            return []
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            columns = "id, title, date_recorded, emotion_tag, creative_format"
+            if with_previews:
+                columns += ", LEFT(content, 300) AS preview, LEFT(creative_text,300) AS creative_preview, LEFT(analysis_text,300) AS analysis_preview"
+            if after is not None:
+                where = "WHERE date_recorded < %s OR (date_recorded = %s AND id < %s)"
+                params = (after[0], after[0], after[1])
+                order = "DESC"
+            elif before is not None:
+                where = "WHERE date_recorded > %s OR (date_recorded = %s AND id > %s)"
+                params = (before[0], before[0], before[1])
+                order = "ASC"
+            else:
+                where, params, order = "", (), "DESC"
+            query = f"SELECT {columns} FROM dreams {where} ORDER BY date_recorded {order}, id {order} LIMIT %s"
+            cursor.execute(query, params + (limit,))
+            rows = cursor.fetchall()
+            if order == "ASC":
+                rows.reverse()
+            return rows
+        except mysql.connector.Error as err:
+            print(f"Error al recuperar página de sueños: {err}")
+            return []
+        finally:
+            self.close()
+
     def fetch_dream_by_id(self, dream_id: int) -> dict:
         if not self.connect():
             return None
@@ -107,6 +444,340 @@ class DatabaseManager:
             return None
         finally:
             self.close()
+
+    def fetch_dream_embedding(self, dream_id: int, model_version: str = None):
+        """Embedding guardado de un sueño (None si no tiene o es de otro modelo)."""
+        if not self.connect():
+            return None
+        try:
+            cursor = self.connection.cursor()
+            query = (
+                "SELECT id, embedding_blob, embedding_vector FROM dreams "
+                "WHERE id = %s AND (embedding_blob IS NOT NULL OR embedding_vector IS NOT NULL)"
+            )
+            params = (dream_id,)
+            if model_version:
+                query += " AND embedding_model_version = %s"
+                params += (model_version,)
+            cursor.execute(query, params)
+            _, matrix = decode_embedding_rows(cursor.fetchall())
+            return matrix[0] if len(matrix) else None
+        except mysql.connector.Error as err:
+            print(f"Error al recuperar el embedding del sueño {dream_id}: {err}")
+            return None
+        finally:
+            self.close()
+
+    def fetch_dreams_by_ids(self, dream_ids: list, with_content: bool = False) -> list:
+        if not dream_ids or not self.connect():
+            return []
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            placeholders = ", ".join(["%s"] * len(dream_ids))
+            columns = "id, title, date_recorded, emotion_tag, creative_format" + (", content" if with_content else "")
+            query = f"SELECT {columns} FROM dreams WHERE id IN ({placeholders})"
+            cursor.execute(query, tuple(dream_ids))
+            by_id = {r['id']: r for r in cursor}
+            return [by_id[i] for i in dream_ids if i in by_id]
+        except mysql.connector.Error as err:
+            print(f"Error al recuperar sueños por IDs: {err}")
+            return []
+        finally:
+            self.close()
+
+    def search_fulltext(self, query: str, limit: int = 50) -> list:
+        """Búsqueda por palabras en título y contenido (índice FULLTEXT); devuelve [(id, puntuación)]."""
+        if not query.strip() or not self.connect():
+            return []
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "SELECT id, MATCH(title, content) AGAINST (%s IN NATURAL LANGUAGE MODE) AS score FROM dreams "
+                "WHERE MATCH(title, content) AGAINST (%s IN NATURAL LANGUAGE MODE) ORDER BY score DESC LIMIT %s",
+                (query, query, limit)
+            )
+            return [(dream_id, float(score)) for dream_id, score in cursor]
+        except mysql.connector.Error as err:
+            print(f"Error en la búsqueda por texto: {err}")
+            return []
+        finally:
+            self.close()
+
+    def fetch_all_embeddings(self, after_id: int = None, model_version: str = None):
+        # after_id: solo los sueños posteriores, para poner al día un índice ya guardado.
+        # model_version: solo los vectores de ese modelo, para no mezclar espacios distintos
+        if not self.connect():
+            return [], np.empty((0, 0), dtype=np.float32)
+        try:
+            cursor = self.connection.cursor()
+            query = (
+                "SELECT id, embedding_blob, embedding_vector FROM dreams "
+                "WHERE id > %s AND (embedding_blob IS NOT NULL OR embedding_vector IS NOT NULL)"
+            )
+            params = (after_id or 0,)
+            if model_version:
+                query += " AND embedding_model_version = %s"
+                params += (model_version,)
+            cursor.execute(query, params)
+            return decode_embedding_rows(cursor)
+        except mysql.connector.Error as err:
+            print(f"Error al recuperar embeddings: {err}")
+            return [], np.empty((0, 0), dtype=np.float32)
+        finally:
+            self.close()
+
+    def fetch_labeled_embeddings(self, labels: list, model_version: str = None, source: str = None):
+        if not labels or not self.connect():
+            return [], np.empty((0, 0), dtype=np.float32)
+        try:
+            cursor = self.connection.cursor()
+            placeholders = ", ".join(["%s"] * len(labels))
+            query = (
+                "SELECT emotion_tag, embedding_blob, embedding_vector FROM dreams "
+                f"WHERE emotion_tag IN ({placeholders}) AND (embedding_blob IS NOT NULL OR embedding_vector IS NOT NULL)"
+            )
+            params = tuple(labels)
+            if model_version:
+                query += " AND embedding_model_version = %s"
+                params += (model_version,)
+            if source:
+                query += " AND emotion_source = %s"
+                params += (source,)
+            cursor.execute(query, params)
+            return decode_embedding_rows(cursor)
+        except mysql.connector.Error as err:
+            print(f"Error al recuperar embeddings etiquetados: {err}")
+            return [], np.empty((0, 0), dtype=np.float32)
+        finally:
+            self.close()
+
+    def fetch_unlabeled_dream_ids(self, after_id: int = 0) -> list:
+        """Ids, en orden, de los sueños sin emoción con id mayor que after_id."""
+        if not self.connect():
+            return []
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT id FROM dreams WHERE id > %s AND emotion_tag IS NULL ORDER BY id", (after_id,))
+            return [row[0] for row in cursor.fetchall()]
+        except mysql.connector.Error as err:
+            print(f"Error al recuperar sueños sin emoción: {err}")
+            return []
+        finally:
+            self.close()
+
+    def migrate_json_embeddings(self, batch_size: int = 500) -> int:
+        """Convierte los embeddings guardados como texto JSON al formato binario."""
+        if self.embedding_storage == "json":
+            print("DatabaseManager: El almacenamiento está en modo JSON, no hay nada que migrar.")
+            return 0
+        migrated = 0
+        while True:
+            if not self.connect():
+                return migrated
+            try:
+                cursor = self.connection.cursor()
+                cursor.execute(
+                    "SELECT id, embedding_vector FROM dreams WHERE embedding_blob IS NULL AND embedding_vector IS NOT NULL ORDER BY id LIMIT %s",
+                    (batch_size,)
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                updates = []
+                for dream_id, raw in rows:
+                    if isinstance(raw, (bytes, bytearray)):
+                        raw = raw.decode("utf-8")
+                    vec = np.fromstring(raw.strip().strip("[]"), dtype=np.float32, sep=",")
+                    # Los vectores vacíos quedan con ambas columnas a NULL para no volver a leerlos
+                    updates.append((encode_embedding(vec, self.embedding_storage), dream_id))
+                cursor.executemany("UPDATE dreams SET embedding_blob = %s, embedding_vector = NULL WHERE id = %s", updates)
+                self.connection.commit()
+                migrated += len(updates)
+                print(f"DatabaseManager: {migrated} embeddings migrados a formato binario...")
+            except mysql.connector.Error as err:
+                print(f"Error al migrar embeddings: {err}")
+                self.connection.rollback()
+                return migrated
+            finally:
+                self.close()
+        print(f"DatabaseManager: Migración de embeddings completada ({migrated} filas).")
+        return migrated
+
+    def count_stale_embeddings(self, model_version: str, after_id: int = 0) -> int:
+        if not self.connect():
+            return 0
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(f"SELECT COUNT(*) FROM dreams WHERE id > %s AND {STALE_EMBEDDING_FILTER}", (after_id, model_version))
+            return cursor.fetchone()[0]
+        except mysql.connector.Error as err:
+            print(f"Error al contar embeddings pendientes: {err}")
+            return 0
+        finally:
+            self.close()
+
+    def iter_stale_embeddings(self, model_version: str, after_id: int = 0, fetch_size: int = 1000):
+        """Genera listas de (id, content) de los sueños a recalcular, en orden de id.
+
+        Usa una conexión propia, fuera del pool, con un cursor sin buffer: el
+        servidor envía las filas a medida que se leen en lugar de materializar
+        el resultado entero en el cliente.
+        """
+        conn = mysql.connector.connect(**self.config)
+        try:
+            cursor = conn.cursor(buffered=False)
+            # El cliente deja de leer mientras codifica; con el valor por defecto (60 s) el servidor cortaría el envío
+            cursor.execute("SET SESSION net_write_timeout = 3600")
+            cursor.execute(
+                f"SELECT id, content FROM dreams WHERE id > %s AND {STALE_EMBEDDING_FILTER} ORDER BY id",
+                (after_id, model_version)
+            )
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            try:
+                conn.close()
+            except mysql.connector.Error:
+                pass
+
+    def update_embeddings(self, updates: list, model_version: str) -> int:
+        """Reescribe los embeddings de varios sueños en una transacción; updates: [(id, embedding)]."""
+        if not updates or not self.connect():
+            return 0
+        data = []
+        for dream_id, embedding in updates:
+            embedding_json, embedding_blob = self._serialize_embedding(embedding)
+            data.append((embedding_json, embedding_blob, model_version, dream_id))
+        try:
+            cursor = self.connection.cursor()
+            cursor.executemany(
+                "UPDATE dreams SET embedding_vector = %s, embedding_blob = %s, embedding_model_version = %s WHERE id = %s",
+                data
+            )
+            self.connection.commit()
+            return len(data)
+        except mysql.connector.Error as err:
+            print(f"Error al actualizar embeddings: {err}")
+            self.connection.rollback()
+            return 0
+        finally:
+            self.close()
+
+    def _rebuild_emotion_aggregates(self, cursor):
+        cursor.execute("DELETE FROM dream_emotion_daily")
+        cursor.execute("""
+        INSERT INTO dream_emotion_daily (day, emotion_tag, dream_count)
+        SELECT DATE(date_recorded), COALESCE(emotion_tag, 'Indefinida'), COUNT(*) FROM dreams
+        GROUP BY DATE(date_recorded), COALESCE(emotion_tag, 'Indefinida')
+        """)
+        print("DatabaseManager: Tabla de conteos diarios por emoción reconstruida.")
+
+    def rebuild_emotion_aggregates(self) -> bool:
+        if not self.connect():
+            return False
+        try:
+            self._rebuild_emotion_aggregates(self.connection.cursor())
+            self.connection.commit()
+            return True
+        except mysql.connector.Error as err:
+            print(f"Error al reconstruir los conteos por emoción: {err}")
+            self.connection.rollback()
+            return False
+        finally:
+            self.close()
+
+    def fetch_emotion_aggregates(self) -> list:
+        if not self.connect():
+            return []
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            cursor.execute("SELECT day, emotion_tag, dream_count FROM dream_emotion_daily WHERE dream_count > 0 ORDER BY day ASC")
+            return [{
+                'date': row['day'].isoformat(),
+                'emotion': row['emotion_tag'],
+                'count': row['dream_count']
+            } for row in cursor]
+        except mysql.connector.Error as err:
+            print(f"Error al recuperar conteos por emoción: {err}")
+            return []
+        finally:
+            self.close()
+
+    def _add_term_counts(self, cursor, counts: dict):
+        # counts: {(mes "YYYY-MM", término): n}
+        if not counts:
+            return
+        cursor.executemany("""
+        INSERT INTO dream_term_monthly (month, term, term_count) VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE term_count = term_count + VALUES(term_count)
+        """, [(month, term, n) for (month, term), n in counts.items()])
+
+    def _rebuild_term_index(self, conn, batch_size: int = 2000):
+        print("DatabaseManager: Construyendo el índice de términos para la nube de palabras...")
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM dream_term_monthly")
+        conn.commit()
+        last_id = 0
+        while True:
+            cursor.execute("SELECT id, date_recorded, content FROM dreams WHERE id > %s ORDER BY id LIMIT %s", (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            counts = {}
+            for _, date_recorded, content in rows:
+                month = date_recorded.strftime("%Y-%m")
+                for term, n in term_counts(content).items():
+                    counts[(month, term)] = counts.get((month, term), 0) + n
+            self._add_term_counts(cursor, counts)
+            conn.commit()
+            last_id = rows[-1][0]
+        cursor.close()
+        print("DatabaseManager: Índice de términos listo.")
+
+    def fetch_top_terms(self, limit: int = 200, month: str = None) -> dict:
+        if not self.connect():
+            return {}
+        try:
+            cursor = self.connection.cursor()
+            if month:
+                cursor.execute(
+                    "SELECT term, term_count FROM dream_term_monthly WHERE month = %s ORDER BY term_count DESC LIMIT %s",
+                    (month, limit)
+                )
+            else:
+                cursor.execute(
+                    "SELECT term, SUM(term_count) AS n FROM dream_term_monthly GROUP BY term ORDER BY n DESC LIMIT %s",
+                    (limit,)
+                )
+            return {term: int(n) for term, n in cursor}
+        except mysql.connector.Error as err:
+            print(f"Error al recuperar frecuencias de términos: {err}")
+            return {}
+        finally:
+            self.close()
+
+    def fetch_dataset_version(self):
+        # Cambia con cada sueño nuevo y con cada cambio de emoción; sin recorrer la tabla dreams
+        if not self.connect():
+            return None
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("""
+            SELECT (SELECT COALESCE(MAX(id), 0) FROM dreams),
+                   COALESCE(SUM(dream_count), 0),
+                   COALESCE(SUM(CRC32(CONCAT(day, emotion_tag)) * dream_count), 0)
+            FROM dream_emotion_daily
+            """)
+            return tuple(int(v) for v in cursor.fetchone())
+        except mysql.connector.Error as err:
+            print(f"Error al recuperar la versión de los datos: {err}")
+            return None
+        finally:
+            self.close()
+
     def fetch_metrics_data(self) -> list:
         if not self.connect(): return []
         
@@ -130,3 +801,10 @@ class DatabaseManager:
         finally:
             self.close()
 
+
+if __name__ == "__main__":
+    import sys
+    if "--migrate-embeddings" in sys.argv:
+        DatabaseManager().migrate_json_embeddings()
+    else:
+        print("Uso: python -m back.database_manager --migrate-embeddings")
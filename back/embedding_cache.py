@@ -0,0 +1,179 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+import numpy as np
+from numpy.lib.format import open_memmap
+from back.llm_cache import LLMCache
+
+META_VERSION = 2
+
+
+class EmbeddingCache:
+    """Caché de embeddings direccionada por (modelo, hash del texto normalizado).
+
+    Dos niveles: un LRU en memoria y un anillo de tamaño fijo en disco
+    (vectors.npy con memmap más las claves en keys.npy). Cuando el anillo se
+    llena se sobrescriben las entradas más antiguas.
+
+    meta.json se escribe cada `meta_every` entradas nuevas (y con flush() al
+    salir), siempre después de volcar los memmaps. Cada hueco guarda además un
+    crc32 de clave + vector: un hueco a medio escribir tras una caída cuenta
+    como fallo, no como acierto.
+    """
+
+    def __init__(self, path: str, model_name: str, max_memory_entries: int = 1024, max_disk_entries: int = 200_000,
+                 meta_every: int = 256):
+        self.path = path
+        self.model_name = model_name
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.meta_every = meta_every
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.dim = None
+        self._written = 0
+        self._slots = {}
+        self._keys = None
+        self._vectors = None
+        self._checks = None
+        self._unsaved = 0
+        os.makedirs(path, exist_ok=True)
+        self._open()
+        atexit.register(self.flush)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _open(self):
+        try:
+            with open(self._file("meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            if (meta.get("version") != META_VERSION or meta.get("model") != self.model_name
+                    or meta.get("capacity") != self.max_disk_entries):
+                return
+            self._keys = np.load(self._file("keys.npy"), mmap_mode="r+")
+            self._vectors = np.load(self._file("vectors.npy"), mmap_mode="r+")
+            self._checks = np.load(self._file("checks.npy"), mmap_mode="r+")
+            self.dim = meta["dim"]
+            self._written = meta["written"]
+            filled = min(self._written, self.max_disk_entries)
+            self._slots = {k.tobytes(): slot for slot, k in enumerate(self._keys[:filled])}
+        except (OSError, ValueError, KeyError):
+            self._keys = self._vectors = self._checks = None
+
+    def _create(self, dim: int):
+        self.dim = dim
+        # Las claves como filas de 32 bytes: el tipo "S32" recortaría los ceros finales del sha256
+        self._keys = open_memmap(self._file("keys.npy"), mode="w+", dtype=np.uint8, shape=(self.max_disk_entries, 32))
+        self._vectors = open_memmap(self._file("vectors.npy"), mode="w+", dtype=np.float32, shape=(self.max_disk_entries, dim))
+        self._checks = open_memmap(self._file("checks.npy"), mode="w+", dtype=np.uint32, shape=(self.max_disk_entries,))
+        self._written = 0
+        self._slots = {}
+
+    @staticmethod
+    def _checksum(key: bytes, vec: np.ndarray) -> int:
+        return zlib.crc32(vec.tobytes(), zlib.crc32(key))
+
+    def flush(self):
+        """Vuelca los vectores a disco y después guarda meta.json."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._vectors is None or not self._unsaved:
+            return
+        self._vectors.flush()
+        self._checks.flush()
+        self._keys.flush()
+        self._write_meta()
+        self._unsaved = 0
+
+    def _write_meta(self):
+        meta = {
+            "version": META_VERSION, "model": self.model_name, "dim": self.dim,
+            "capacity": self.max_disk_entries, "written": self._written
+        }
+        tmp = self._file("meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._file("meta.json"))
+
+    def make_key(self, text: str) -> bytes:
+        payload = f"{self.model_name}\0{LLMCache.normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).digest()
+
+    def get(self, text: str):
+        key = self.make_key(text)
+        with self._lock:
+            vec = self._memory.get(key)
+            if vec is not None:
+                self._memory.move_to_end(key)
+                self.hits_memory += 1
+                return vec
+            slot = self._slots.get(key)
+            if slot is None:
+                self.misses += 1
+                return None
+            vec = np.array(self._vectors[slot])
+            if self._checksum(key, vec) != int(self._checks[slot]):
+                # Hueco sobrescrito a medias antes de una caída
+                del self._slots[key]
+                self.misses += 1
+                return None
+            self._remember(key, vec)
+            self.hits_disk += 1
+            return vec
+
+    def put(self, text: str, vector):
+        self.put_many([text], [vector])
+
+    def put_many(self, texts: list, vectors):
+        """Guarda varios embeddings con un solo bloqueo (importaciones masivas)."""
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                self._store(self.make_key(text), np.asarray(vector, dtype=np.float32).ravel())
+            if self._unsaved >= self.meta_every:
+                self._flush_locked()
+
+    def _store(self, key: bytes, vec: np.ndarray):
+        if not vec.size:
+            return
+        self._remember(key, vec)
+        if key in self._slots:
+            return
+        if self._vectors is None or vec.size != self.dim:
+            # Otro modelo con otra dimensión: la caché en disco empieza de cero
+            self._create(vec.size)
+            self._write_meta()
+        slot = self._written % self.max_disk_entries
+        if self._written >= self.max_disk_entries:
+            self._slots.pop(self._keys[slot].tobytes(), None)
+        self._vectors[slot] = vec
+        self._keys[slot] = np.frombuffer(key, dtype=np.uint8)
+        self._checks[slot] = self._checksum(key, vec)
+        self._slots[key] = slot
+        self._written += 1
+        self._unsaved += 1
+
+    def _remember(self, key, vec):
+        self._memory[key] = vec
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._slots),
+            }
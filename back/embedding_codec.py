@@ -0,0 +1,106 @@
+import os
+import struct
+import numpy as np
+
+# Cabecera de 4 bytes: versión, código de dtype y dimensión (uint16), todo little-endian.
+# Con 4 bytes el payload float32 queda alineado.
+HEADER = struct.Struct("<BBH")
+FORMAT_VERSION = 1
+
+DTYPES = {
+    "float32": (0, np.dtype("<f4")),
+    "float16": (1, np.dtype("<f2")),
+}
+_DTYPE_BY_CODE = {code: dt for code, dt in DTYPES.values()}
+
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+
+def embedding_model_version() -> str:
+    """Etiqueta que se guarda con cada embedding (columna embedding_model_version).
+
+    Por defecto es el nombre del modelo; DREAMS_EMBEDDING_MODEL_VERSION permite
+    distinguir dos versiones publicadas con el mismo nombre.
+    """
+    return os.environ.get("DREAMS_EMBEDDING_MODEL_VERSION") or os.environ.get("DREAMS_EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+
+
+def encode_embedding(embedding, dtype: str = "float32") -> bytes:
+    if embedding is None:
+        return None
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype de embedding no soportado: {dtype}")
+    code, np_dtype = DTYPES[dtype]
+    vec = np.asarray(embedding, dtype=np_dtype).ravel()
+    if not vec.size:
+        return None
+    return HEADER.pack(FORMAT_VERSION, code, vec.size) + vec.tobytes()
+
+
+def _read_header(blob):
+    version, code, dim = HEADER.unpack_from(blob, 0)
+    if version != FORMAT_VERSION or code not in _DTYPE_BY_CODE:
+        raise ValueError(f"cabecera de embedding desconocida: versión={version}, dtype={code}")
+    return _DTYPE_BY_CODE[code], dim
+
+
+def decode_embedding(blob) -> np.ndarray:
+    if not blob:
+        return None
+    np_dtype, dim = _read_header(blob)
+    vec = np.frombuffer(blob, dtype=np_dtype, count=dim, offset=HEADER.size)
+    return vec.astype(np.float32, copy=False)
+
+
+def decode_embedding_matrix(blobs: list) -> np.ndarray:
+    """Decodifica muchos blobs a una matriz float32 (n, dim).
+
+    Si todos comparten cabecera, los payloads se concatenan y se leen con un
+    único np.frombuffer; si no, se decodifica fila a fila.
+    """
+    if not blobs:
+        return np.empty((0, 0), dtype=np.float32)
+    first = bytes(blobs[0][:HEADER.size])
+    if all(b[:HEADER.size] == first for b in blobs):
+        np_dtype, dim = _read_header(first)
+        payload = b"".join(memoryview(b)[HEADER.size:] for b in blobs)
+        matrix = np.frombuffer(payload, dtype=np_dtype).reshape(len(blobs), dim)
+        return matrix.astype(np.float32)
+    return np.vstack([decode_embedding(b) for b in blobs])
+
+
+def decode_embedding_rows(rows):
+    # rows: (clave, embedding_blob, embedding_vector). Devuelve (claves, matriz float32)
+    blob_keys, blobs = [], []
+    json_keys, json_vectors = [], []
+    for key, blob, raw in rows:
+        if blob:
+            blob_keys.append(key)
+            blobs.append(blob)
+            continue
+        if raw is None:
+            # Sin embedding (p. ej. vectores vacíos que migrate_json_embeddings dejó a NULL)
+            continue
+        # Filas antiguas todavía sin migrar: se parsean en C con np.fromstring
+        if isinstance(raw, (bytes, bytearray)):
+            raw = raw.decode("utf-8")
+        vec = np.fromstring(raw.strip().strip("[]"), dtype=np.float32, sep=",")
+        if vec.size:
+            json_keys.append(key)
+            json_vectors.append(vec)
+
+    dim = HEADER.unpack_from(blobs[0])[2] if blobs else (json_vectors[0].size if json_vectors else None)
+    if dim is None:
+        return [], np.empty((0, 0), dtype=np.float32)
+
+    keep = [i for i, b in enumerate(blobs) if HEADER.unpack_from(b)[2] == dim]
+    if len(keep) != len(blobs):
+        blob_keys = [blob_keys[i] for i in keep]
+        blobs = [blobs[i] for i in keep]
+    matrix = decode_embedding_matrix(blobs) if blobs else np.empty((0, dim), dtype=np.float32)
+
+    legacy = [(k, v) for k, v in zip(json_keys, json_vectors) if v.size == dim]
+    if legacy:
+        matrix = np.vstack([matrix] + [v for _, v in legacy])
+        blob_keys += [k for k, _ in legacy]
+    return blob_keys, matrix
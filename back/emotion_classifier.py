@@ -0,0 +1,122 @@
+import os
+import threading
+import numpy as np
+
+
+class EmotionClassifier:
+    """Clasificador local de emociones por centroide más cercano.
+
+    Guarda por etiqueta la suma de los embeddings normalizados y su número,
+    así que reentrenar con un sueño nuevo es una suma. La confianza es el
+    softmax de las similitudes coseno con cada centroide. Mientras alguna
+    etiqueta tenga menos de min_samples_per_label ejemplos no responde: el
+    sueño podría ser justo de esa emoción y se lo quitaría a la IA, que es la
+    única que le enseña ejemplos nuevos.
+    """
+
+    def __init__(self, labels: list, path: str = None, min_confidence: float = 0.6,
+                 min_samples_per_label: int = 5, temperature: float = 0.05):
+        self.labels = list(labels)
+        self.path = path
+        self.min_confidence = min_confidence
+        self.min_samples_per_label = min_samples_per_label
+        self.temperature = temperature
+        self.dim = None
+        self._sums = None
+        self._counts = np.zeros(len(self.labels), dtype=np.int64)
+        self._centroids = None
+        self._lock = threading.Lock()
+
+    @property
+    def n_samples(self) -> int:
+        return int(self._counts.sum())
+
+    @staticmethod
+    def _normalize(matrix):
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _refresh_centroids(self):
+        self._centroids = self._normalize(self._sums)
+
+    def fit(self, embeddings, emotions: list):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            if not len(emotions):
+                return
+            self.dim = embeddings.shape[1]
+            self._sums = np.zeros((len(self.labels), self.dim), dtype=np.float64)
+            self._counts = np.zeros(len(self.labels), dtype=np.int64)
+            index = {label: i for i, label in enumerate(self.labels)}
+            rows = np.array([index.get(e, -1) for e in emotions])
+            mask = rows >= 0
+            np.add.at(self._sums, rows[mask], self._normalize(embeddings[mask]))
+            self._counts = np.bincount(rows[mask], minlength=len(self.labels))
+            self._refresh_centroids()
+
+    def partial_fit(self, embedding, emotion: str) -> bool:
+        if emotion not in self.labels or embedding is None:
+            return False
+        vec = np.asarray(embedding, dtype=np.float32).ravel()
+        with self._lock:
+            if self.dim is None:
+                self.dim = vec.size
+                self._sums = np.zeros((len(self.labels), self.dim), dtype=np.float64)
+            if vec.size != self.dim:
+                return False
+            i = self.labels.index(emotion)
+            self._sums[i] += self._normalize(vec)
+            self._counts[i] += 1
+            self._refresh_centroids()
+        return True
+
+    def predict(self, embedding):
+        """Devuelve (etiqueta, confianza); etiqueta es None si no hay suficiente confianza."""
+        if embedding is None:
+            return None, 0.0
+        vec = np.asarray(embedding, dtype=np.float32).ravel()
+        with self._lock:
+            if self._centroids is None or vec.size != self.dim:
+                return None, 0.0
+            trained = self._counts >= self.min_samples_per_label
+            if not trained.any():
+                return None, 0.0
+            sims = self._centroids[trained] @ self._normalize(vec)
+            labels = [label for label, ok in zip(self.labels, trained) if ok]
+
+        logits = (sims - sims.max()) / self.temperature
+        probs = np.exp(logits)
+        probs /= probs.sum()
+        best = int(np.argmax(probs))
+        confidence = float(probs[best])
+        # Sin todas las etiquetas entrenadas la confianza solo compara las conocidas: se informa, pero no se decide
+        if confidence < self.min_confidence or not trained.all():
+            return None, confidence
+        return labels[best], confidence
+
+    def save(self):
+        if not self.path or self._sums is None:
+            return
+        with self._lock:
+            tmp_path = self.path + ".tmp.npz"
+            np.savez(tmp_path, labels=np.array(self.labels), sums=self._sums, counts=self._counts)
+            os.replace(tmp_path, self.path)
+
+    def load(self) -> bool:
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with np.load(self.path) as data:
+                if list(data["labels"]) != self.labels:
+                    print("EmotionClassifier: Las categorías guardadas no coinciden, se reentrenará.")
+                    return False
+                with self._lock:
+                    self._sums = data["sums"]
+                    self._counts = data["counts"]
+                    self.dim = self._sums.shape[1]
+                    self._refresh_centroids()
+            return True
+        except Exception as e:
+            print(f"EmotionClassifier: No se pudo cargar el modelo: {e}")
+            return False
@@ -0,0 +1,145 @@
+import random
+import sqlite3
+import threading
+import time
+
+
+class EnrichmentQueue:
+    """Cola persistente (SQLite) de tareas de enriquecimiento pendientes.
+
+    Una tarea es (dream_id, tipo): "emotion", "creative", "analysis" o
+    "enrichment". Los fallos se reintentan con espera exponencial y, tras
+    max_attempts intentos, la tarea queda en estado "failed".
+    """
+
+    def __init__(self, path: str, max_attempts: int = 8, base_delay: float = 2.0, max_delay: float = 300.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS enrichment_tasks ("
+            "dream_id INTEGER NOT NULL, task TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending', "
+            "attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL, last_error TEXT, "
+            "PRIMARY KEY (dream_id, task))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_enrichment_due ON enrichment_tasks(status, next_attempt_at)")
+        # Las tareas que estaban en curso cuando se cerró la aplicación vuelven a la cola
+        self._conn.execute("UPDATE enrichment_tasks SET status = 'pending' WHERE status = 'running'")
+        self._conn.commit()
+
+    def enqueue(self, dream_id: int, tasks):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO enrichment_tasks (dream_id, task, next_attempt_at) VALUES (?, ?, ?)",
+                [(dream_id, task, now) for task in tasks]
+            )
+            self._conn.commit()
+
+    def claim(self):
+        """Marca como en curso la tarea pendiente más antigua que ya toca; devuelve (dream_id, tarea, intentos) o None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT dream_id, task, attempts FROM enrichment_tasks "
+                "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT 1",
+                (time.time(),)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE enrichment_tasks SET status = 'running' WHERE dream_id = ? AND task = ?", row[:2])
+            self._conn.commit()
+            return row
+
+    def complete(self, dream_id: int, task: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM enrichment_tasks WHERE dream_id = ? AND task = ?", (dream_id, task))
+            self._conn.commit()
+
+    def fail(self, dream_id: int, task: str, error) -> bool:
+        """Programa el siguiente intento; devuelve False si la tarea se da por fallida."""
+        with self._lock:
+            attempts = self._conn.execute(
+                "SELECT attempts FROM enrichment_tasks WHERE dream_id = ? AND task = ?", (dream_id, task)
+            ).fetchone()[0] + 1
+            retry = attempts < self.max_attempts
+            # Espera exponencial con jitter para no reintentar todas a la vez tras un límite de peticiones
+            delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+            self._conn.execute(
+                "UPDATE enrichment_tasks SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? "
+                "WHERE dream_id = ? AND task = ?",
+                ("pending" if retry else "failed", attempts, time.time() + delay, str(error)[:500], dream_id, task)
+            )
+            self._conn.commit()
+            return retry
+
+    def retry_failed(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE enrichment_tasks SET status = 'pending', attempts = 0, next_attempt_at = ? WHERE status = 'failed'",
+                (time.time(),)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def seconds_until_next(self):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_attempt_at) FROM enrichment_tasks WHERE status = 'pending'"
+            ).fetchone()
+        return None if row[0] is None else max(row[0] - time.time(), 0.0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM enrichment_tasks GROUP BY status").fetchall())
+        return {"pending": counts.get("pending", 0), "running": counts.get("running", 0), "failed": counts.get("failed", 0)}
+
+
+class EnrichmentWorkerPool:
+    """Hilos que vacían la EnrichmentQueue llamando a handler(dream_id, tarea).
+
+    handler lanza excepción si la tarea debe reintentarse. El número de hilos
+    limita cuántas peticiones a la IA hay en vuelo a la vez.
+    """
+
+    def __init__(self, queue: EnrichmentQueue, handler, workers: int = 2, idle_wait: float = 30.0):
+        self.queue = queue
+        self.handler = handler
+        self.idle_wait = idle_wait
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._threads = []
+        for i in range(workers):
+            t = threading.Thread(target=self._run, daemon=True, name=f"enrichment-{i}")
+            t.start()
+            self._threads.append(t)
+
+    def notify(self):
+        self._wakeup.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            item = self.queue.claim()
+            if item is None:
+                wait = self.queue.seconds_until_next()
+                self._wakeup.wait(self.idle_wait if wait is None else min(wait, self.idle_wait))
+                self._wakeup.clear()
+                continue
+
+            dream_id, task, attempts = item
+            try:
+                self.handler(dream_id, task)
+                self.queue.complete(dream_id, task)
+            except Exception as e:
+                if self.queue.fail(dream_id, task, e):
+                    print(f"Enriquecimiento: '{task}' del sueño {dream_id} falló (intento {attempts + 1}), se reintentará: {e}")
+                else:
+                    print(f"Enriquecimiento: '{task}' del sueño {dream_id} descartado tras {attempts + 1} intentos: {e}")
@@ -0,0 +1,247 @@
+"""Servidor local compatible con la API de chat de OpenAI, para pruebas de carga.
+
+No llama a ningún modelo: responde texto sintético con latencia, jitter y
+tasa de errores configurables. Uso:
+
+    python -m back.fake_llm_server --port 8089 --latency 0.8 --jitter 0.3 --error-rate 0.02
+    DREAMS_LLM_PROVIDER=local python main.py
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_WORDS = (
+    "luna mar puerta casa bosque sombra camino agua fuego espejo tren ciudad escalera "
+    "niebla jardín reloj voz ventana río montaña pájaro llave noche luz viento"
+).split()
+_FALLBACK_EMOTIONS = ["Alegría", "Tristeza", "Miedo", "Ira", "Calma"]
+_CATEGORIES_RE = re.compile(r"categorías:\s*([^.]+)\.")
+
+
+class FakeLLMConfig:
+    def __init__(self, latency: float = 0.5, jitter: float = 0.2, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, tokens_per_second: float = 200.0, seed: int = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.tokens_per_second = tokens_per_second
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def draw(self):
+        # Devuelve (espera en segundos, código de error o None) para una petición
+        with self.lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+            roll = self.rng.random()
+            if roll < self.rate_limit_rate:
+                status = 429
+            elif roll < self.rate_limit_rate + self.error_rate:
+                status = 500
+            else:
+                status = None
+            if status:
+                self.errors += 1
+            return delay, status
+
+
+def _seeded(messages) -> random.Random:
+    # Mismo prompt -> misma respuesta, para que las ejecuciones sean repetibles
+    digest = hashlib.sha256(json.dumps(messages, ensure_ascii=False, sort_keys=True).encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _sentence(rng, words: int) -> str:
+    text = " ".join(rng.choice(_WORDS) for _ in range(max(words, 1)))
+    return text[0].upper() + text[1:] + "."
+
+
+def _paragraph(rng, words: int) -> str:
+    sentences = []
+    while words > 0:
+        n = min(words, rng.randint(6, 14))
+        sentences.append(_sentence(rng, n))
+        words -= n
+    return " ".join(sentences)
+
+
+def _object_for_schema(schema: dict, rng, short: bool = False):
+    kind = schema.get("type")
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    if kind == "object":
+        return {name: _object_for_schema(sub, rng) for name, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [_object_for_schema(schema.get("items", {"type": "string"}), rng, short=True) for _ in range(rng.randint(2, 5))]
+    if kind in ("integer", "number"):
+        return rng.randint(0, 10)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    return rng.choice(_WORDS) if short else _paragraph(rng, rng.randint(8, 30))
+
+
+def build_reply(body: dict) -> str:
+    messages = body.get("messages", [])
+    rng = _seeded(messages)
+    prompt = " ".join(str(m.get("content", "")) for m in messages)
+    max_tokens = int(body.get("max_tokens") or 300)
+
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        return json.dumps(_object_for_schema(response_format["json_schema"]["schema"], rng), ensure_ascii=False)
+
+    match = _CATEGORIES_RE.search(prompt)
+    if match:
+        categories = [c.strip() for c in match.group(1).split(",") if c.strip()]
+        return rng.choice(categories or _FALLBACK_EMOTIONS)
+
+    if "JSON" in prompt:
+        return json.dumps({
+            "symbols": rng.sample(_WORDS, 4),
+            "interpretation": _paragraph(rng, min(max_tokens // 2, 120)),
+            "advice": _sentence(rng, 10)
+        }, ensure_ascii=False)
+
+    return _paragraph(rng, int(max_tokens * 0.6))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeLLM/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "fake", "object": "model", "owned_by": "local"}]})
+        else:
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON", "type": "invalid_request_error"}})
+            return
+
+        config = self.server.config
+        delay, status = config.draw()
+        time.sleep(delay)
+        if status == 429:
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}}, {"Retry-After": "1"})
+            return
+        if status:
+            self._send_json(status, {"error": {"message": "Simulated server error", "type": "server_error"}})
+            return
+
+        content = build_reply(body)
+        model = body.get("model", "fake")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        if body.get("stream"):
+            self._stream(completion_id, created, model, content, config.tokens_per_second)
+            return
+
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(content.split()), "total_tokens": len(content.split())}
+        })
+
+    def _stream(self, completion_id, created, model, content, tokens_per_second):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(delta, finish_reason=None):
+            chunk = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        pause = 1.0 / tokens_per_second if tokens_per_second > 0 else 0.0
+        event({"role": "assistant", "content": ""})
+        for token in re.findall(r"\S+\s*", content):
+            event({"content": token})
+            if pause:
+                time.sleep(pause)
+        event({}, "stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8089, config: FakeLLMConfig = None, verbose: bool = False) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.config = config or FakeLLMConfig()
+    server.verbose = verbose
+    return server
+
+
+def start_in_thread(host: str = "127.0.0.1", port: int = 0, config: FakeLLMConfig = None) -> ThreadingHTTPServer:
+    """Arranca el servidor en un hilo; con port=0 elige un puerto libre (server.server_address[1])."""
+    server = make_server(host, port, config)
+    threading.Thread(target=server.serve_forever, daemon=True, name="fake-llm").start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local compatible con OpenAI para pruebas de carga.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.5, help="Latencia media por petición, en segundos")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Variación uniforme +/- sobre la latencia")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de respuestas 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fracción de respuestas 429")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Ritmo del streaming")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    config = FakeLLMConfig(args.latency, args.jitter, args.error_rate, args.rate_limit_rate, args.tokens_per_second, args.seed)
+    server = make_server(args.host, args.port, config, args.verbose)
+    print(f"Servidor de IA local en http://{args.host}:{args.port}/v1 (DREAMS_LLM_PROVIDER=local)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Peticiones: {config.requests}, errores simulados: {config.errors}")
+
+
+if __name__ == "__main__":
+    main()
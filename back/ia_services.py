@@ -1,36 +1,242 @@
 import os
 import json
+import threading
+import time
 import numpy as np
-import openai
+from concurrent.futures import ThreadPoolExecutor, wait
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
-from back.database_manager import DatabaseManager
+from back.storage import create_database_manager
+from back.vector_index import VectorIndex
+from back.ann_index import IVFIndex
+from back.llm_cache import LLMCache
+from back.embedding_cache import EmbeddingCache
+from back.emotion_classifier import EmotionClassifier
+from back.enrichment_queue import EnrichmentQueue, EnrichmentWorkerPool
+from back.llm_providers import provider_from_env
+from back.embedding_codec import DEFAULT_EMBEDDING_MODEL, embedding_model_version
+from back.paths import data_path
+from back.text_terms import make_snippet, tokenize
 load_dotenv()
 
+
+def load_embedding_model(model_name: str):
+    from sentence_transformers import SentenceTransformer
+
+    # Copia local serializada del modelo: evita consultas al hub de Hugging Face
+    model_dir = os.environ.get("DREAMS_MODEL_DIR") or data_path("models", model_name.replace("/", "__"))
+    if os.path.exists(os.path.join(model_dir, "modules.json")):
+        return SentenceTransformer(model_dir, local_files_only=True)
+
+    model = SentenceTransformer(model_name)
+    try:
+        model.save(model_dir)
+        print(f"IAService: Modelo guardado en {model_dir} para los próximos arranques.")
+    except Exception as e:
+        print(f"IAService: No se pudo guardar el modelo en caché local: {e}")
+    return model
+
+
 class IAService:
     EMOTION_CATEGORIES = ["Alegría", "Tristeza", "Miedo", "Ira", "Calma"]
+    # Subir la versión al cambiar un prompt invalida sus respuestas en caché
+    PROMPT_VERSIONS = {"emotion": 1, "creative": 1, "analysis": 1, "enrichment": 1}
 
     def __init__(self):
+        # Una sola petición estructurada para emoción + análisis en lugar de dos
+        self.combined_enrichment = os.environ.get("DREAMS_COMBINED_ENRICHMENT", "0") == "1"
+        # Guardar el sueño en bruto al momento y dejar las llamadas a la IA en una cola persistente
+        self.deferred_enrichment = os.environ.get("DREAMS_DEFERRED_ENRICHMENT", "0") == "1"
+        self.enrichment_queue = None
+        self.enrichment_workers = None
+        self.vector_index = None
+        self._index_lock = threading.Lock()
+        # Índice aproximado IVF en disco en lugar de la matriz exacta en memoria (corpus grandes)
+        self.ann_index = os.environ.get("DREAMS_ANN_INDEX", "0") == "1"
+        # Las llamadas a OpenAI son independientes y de red: se lanzan en paralelo
+        self._executor = ThreadPoolExecutor(max_workers=int(os.environ.get("DREAMS_IA_WORKERS", "4")), thread_name_prefix="ia")
+        # La reconstrucción del índice IVF (KMeans) tarda; en su propio hilo no ocupa el pool de los guardados
+        self._index_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ann-rebuild")
+        self.llm_cache = None
+        if os.environ.get("DREAMS_LLM_CACHE", "1") == "1":
+            try:
+                self.llm_cache = LLMCache(os.environ.get("DREAMS_LLM_CACHE_PATH") or data_path("llm_cache.sqlite"))
+            except Exception as e:
+                print(f"IAService: Caché de respuestas desactivada: {e}")
+        # openai y sentence_transformers/torch tardan varios segundos en importarse:
+        # se cargan la primera vez que se usan o en segundo plano con preload_async()
+        self.embedding_model_name = os.environ.get("DREAMS_EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+        # Se guarda con cada vector; cachés, índices y lecturas solo usan los del modelo actual
+        self.embedding_model_version = embedding_model_version()
+        model_slug = self.embedding_model_version.replace("/", "__")
+        # Los embeddings ya calculados (búsquedas repetidas, reimportaciones) no vuelven a pasar por el modelo
+        self.embedding_cache = None
+        if os.environ.get("DREAMS_EMBEDDING_CACHE", "1") == "1":
+            try:
+                self.embedding_cache = EmbeddingCache(
+                    data_path("embedding_cache", model_slug),
+                    self.embedding_model_version,
+                    max_disk_entries=int(os.environ.get("DREAMS_EMBEDDING_CACHE_ENTRIES", "200000"))
+                )
+            except Exception as e:
+                print(f"IAService: Caché de embeddings desactivada: {e}")
+        self._client = None
+        self._embedder = None
+        self._client_lock = threading.Lock()
+        self._embedder_lock = threading.Lock()
+        self._classifier_lock = threading.Lock()
+        self._emotion_classifier = None
+        self._classifier_loaded = False
+        self.startup_timings = {}
         try:
-            self.client = openai.OpenAI(api_key=os.environ.get("OPENAI_5ECRET_K3Y"))
-            self.model = "gpt-4o"
-            print("IAService: Conexión con OpenAI establecida.")
-
-            self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
-            print("IAService: Modelo de Embeddings cargado.")
-
-            self.db_manager = DatabaseManager()
-            print("IAService: DatabaseManager inicializado.")
+            t0 = time.perf_counter()
+            self.db_manager = create_database_manager()
+            self.startup_timings["db"] = time.perf_counter() - t0
+            print(f"IAService: {type(self.db_manager).__name__} inicializado.")
 
         except Exception as e:
             print(f"Error al inicializar IA o DB: {e}")
-            self.client = None
-            self.embedder = None
             self.db_manager = None
+        if self.deferred_enrichment and self.db_manager:
+            self._start_enrichment_workers()
+        self._report_timings()
+
+    def _open_enrichment_queue(self):
+        if self.enrichment_queue is None:
+            self.enrichment_queue = EnrichmentQueue(
+                os.environ.get("DREAMS_ENRICHMENT_QUEUE_PATH") or data_path("enrichment_queue.sqlite"),
+                max_attempts=int(os.environ.get("DREAMS_ENRICHMENT_MAX_ATTEMPTS", "8"))
+            )
+        return self.enrichment_queue
+
+    def _start_enrichment_workers(self):
+        try:
+            self._open_enrichment_queue()
+        except Exception as e:
+            print(f"IAService: Cola de enriquecimiento no disponible, se enriquecerá al guardar: {e}")
+            self.deferred_enrichment = False
+            return
+        # Los hilos de la cola limitan las peticiones simultáneas a OpenAI
+        self.enrichment_workers = EnrichmentWorkerPool(
+            self.enrichment_queue, self._run_enrichment_task,
+            workers=int(os.environ.get("DREAMS_ENRICHMENT_WORKERS", "2"))
+        )
+        print(f"IAService: Enriquecimiento diferido activo ({self.enrichment_queue.stats()['pending']} tareas pendientes).")
+
+    def _report_timings(self):
+        phases = ", ".join(f"{name}={secs * 1000:.0f}ms" for name, secs in self.startup_timings.items())
+        print(f"IAService: Tiempos de arranque: {phases}")
+
+    @property
+    def client(self):
+        # Proveedor de chat (llm_providers.LLMProvider) elegido con DREAMS_LLM_PROVIDER
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    t0 = time.perf_counter()
+                    try:
+                        provider = provider_from_env()
+                        if hasattr(provider, "client"):
+                            _ = provider.client
+                        self._client = provider
+                        print(f"IAService: Proveedor de IA listo ({provider.cache_id}).")
+                    except Exception as e:
+                        print(f"Error al inicializar el proveedor de IA: {e}")
+                        return None
+                    self.startup_timings["llm"] = time.perf_counter() - t0
+        return self._client
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            with self._embedder_lock:
+                if self._embedder is None:
+                    t0 = time.perf_counter()
+                    try:
+                        self._embedder = self._load_embedder()
+                    except Exception as e:
+                        print(f"Error al cargar el modelo de embeddings: {e}")
+                        return None
+                    self.startup_timings["embedder"] = time.perf_counter() - t0
+                    print(f"IAService: Modelo de Embeddings cargado en {self.startup_timings['embedder']:.1f}s.")
+        return self._embedder
+
+    def _load_embedder(self):
+        return load_embedding_model(self.embedding_model_name)
+
+    def preload_async(self):
+        def preload():
+            self.ensure_emotion_classifier()
+            _ = self.embedder
+            _ = self.client
+            self._report_timings()
+        threading.Thread(target=preload, daemon=True, name="ia-preload").start()
+
+    @property
+    def emotion_classifier(self):
+        # Como el modelo de embeddings: se carga (o se entrena con la BD) la primera vez que se usa
+        return self.ensure_emotion_classifier()
+
+    def ensure_emotion_classifier(self):
+        if not self._classifier_loaded and self.db_manager:
+            with self._classifier_lock:
+                if not self._classifier_loaded:
+                    t0 = time.perf_counter()
+                    self._emotion_classifier = self._load_emotion_classifier()
+                    self._classifier_loaded = True
+                    self.startup_timings["classifier"] = time.perf_counter() - t0
+        return self._emotion_classifier
+
+    def _load_emotion_classifier(self):
+        if os.environ.get("DREAMS_LOCAL_EMOTION", "1") != "1":
+            return None
+        classifier = EmotionClassifier(
+            self.EMOTION_CATEGORIES,
+            path=data_path(f"emotion_classifier_{self.embedding_model_version.replace('/', '__')}.npz"),
+            min_confidence=float(os.environ.get("DREAMS_EMOTION_MIN_CONFIDENCE", "0.6"))
+        )
+        if classifier.load():
+            print(f"IAService: Clasificador de emociones local cargado ({classifier.n_samples} ejemplos).")
+            return classifier
+
+        # Solo etiquetas de la IA: las del propio clasificador reforzarían sus errores
+        emotions, vectors = self.db_manager.fetch_labeled_embeddings(self.EMOTION_CATEGORIES, model_version=self.embedding_model_version, source="ia")
+        if emotions:
+            classifier.fit(vectors, emotions)
+            classifier.save()
+        print(f"IAService: Clasificador de emociones local entrenado con {classifier.n_samples} sueños.")
+        return classifier
+
+    def _chat_completion(self, kind: str, dream_text: str, temperature: float, fmt: str = None, on_token=None, **request) -> str:
+        # on_token(texto): si se indica, la respuesta se pide con stream=True y se entrega por fragmentos
+        key = None
+        if self.llm_cache:
+            key = LLMCache.make_key(self.client.cache_id, f"{kind}-v{self.PROMPT_VERSIONS[kind]}", dream_text, temperature, fmt)
+            cached = self.llm_cache.get(key)
+            if cached is not None:
+                if on_token:
+                    on_token(cached)
+                return cached
+
+        content = self.client.chat(temperature=temperature, on_token=on_token, **request)
+        # Solo se guardan respuestas válidas: los errores lanzan excepción antes de llegar aquí
+        if key is not None and content:
+            self.llm_cache.set(key, content)
+        return content
+
+    def analyze_emotion(self, dream_text: str, embedding=None, strict: bool = False) -> str:
+        return self._classify_emotion(dream_text, embedding, strict)[0]
+
+    def _classify_emotion(self, dream_text: str, embedding=None, strict: bool = False):
+        # Devuelve (emoción, origen): "local" si la decide el clasificador, "ia" si la da el modelo de chat
+        if embedding is not None and self.emotion_classifier:
+            emotion, _ = self.emotion_classifier.predict(embedding)
+            if emotion:
+                return emotion, "local"
 
-    def analyze_emotion(self, dream_text: str) -> str:
         if not self.client:
-            return "Error de conexión con la IA."
+            if strict:
+                raise RuntimeError("Sin conexión con la IA.")
+            return "Error de conexión con la IA.", None
 
         system_prompt = (
             "Eres un analista de sueños profesional. Tu única tarea es leer el sueño "
@@ -40,8 +246,8 @@ class IAService:
         )
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            content = self._chat_completion(
+                "emotion", dream_text,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": dream_text}
@@ -49,21 +255,110 @@ class IAService:
                 max_tokens=10,
                 temperature=0.1
             )
-            emotion = response.choices[0].message.content.strip()
-            if emotion in self.EMOTION_CATEGORIES:
-                return emotion
-            else:
-                for valid_emotion in self.EMOTION_CATEGORIES:
-                    if valid_emotion.lower() in emotion.lower():
-                        return valid_emotion
-                return "Indefinida"
+            emotion = self._normalize_emotion(content)
+            # Solo las etiquetas de la IA alimentan el clasificador, nunca sus propias predicciones
+            self._learn_emotion(embedding, emotion)
+            return emotion, "ia"
 
         except Exception as e:
             print(f"Error en análisis de IA: {e}")
-            return "Error_IA"
+            if strict:
+                raise
+            return "Error_IA", None
+
+    def classify_many(self, items: list) -> list:
+        """Emoción de varios sueños en paralelo; items: [(texto, embedding)], devuelve [(emoción, origen)]."""
+        return list(self._executor.map(lambda item: self._classify_emotion(*item), items))
+
+    def enqueue_enrichment(self, dream_ids: list, tasks) -> int:
+        """Añade tareas a la cola persistente de enriquecimiento; las procesan los hilos del modo diferido."""
+        if not dream_ids:
+            return 0
+        queue = self._open_enrichment_queue()
+        for dream_id in dream_ids:
+            queue.enqueue(dream_id, tasks)
+        if self.enrichment_workers:
+            self.enrichment_workers.notify()
+        return len(dream_ids)
+
+    def _learn_emotion(self, embedding, emotion: str):
+        if embedding is None or not self.emotion_classifier:
+            return
+        if self.emotion_classifier.partial_fit(embedding, emotion):
+            self.emotion_classifier.save()
+
+    def _normalize_emotion(self, emotion: str) -> str:
+        emotion = (emotion or "").strip()
+        if emotion in self.EMOTION_CATEGORIES:
+            return emotion
+        for valid_emotion in self.EMOTION_CATEGORIES:
+            if valid_emotion.lower() in emotion.lower():
+                return valid_emotion
+        return "Indefinida"
+
+    def _enrichment_response_format(self) -> dict:
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "dream_enrichment",
+                "strict": True,
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "emotion": {"type": "string", "enum": list(self.EMOTION_CATEGORIES)},
+                        "symbols": {"type": "array", "items": {"type": "string"}},
+                        "interpretation": {"type": "string"},
+                        "advice": {"type": "string"}
+                    },
+                    "required": ["emotion", "symbols", "interpretation", "advice"],
+                    "additionalProperties": False
+                }
+            }
+        }
+
+    def enrich_dream(self, dream_text: str, strict: bool = False):
+        if not self.client:
+            if strict:
+                raise RuntimeError("Sin conexión con la IA.")
+            return "Error de conexión con la IA.", "Error de conexión con la IA."
+
+        system_prompt = (
+            "Eres un intérprete de sueños profesional, claro y empático. Lee el sueño y devuelve: "
+            f"(1) la emoción principal, que debe ser exactamente una de: {', '.join(self.EMOTION_CATEGORIES)}; "
+            "(2) una lista corta de símbolos importantes (máx 6); "
+            "(3) una interpretación clara y breve del significado emocional o temático (10 - 40 oraciones); "
+            "y (4) un consejo práctico o reflexión para la persona (1 oración)."
+        )
+
+        try:
+            content = self._chat_completion(
+                "enrichment", dream_text,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": dream_text}
+                ],
+                max_tokens=400,
+                temperature=0.4,
+                response_format=self._enrichment_response_format()
+            )
+            data = json.loads(content)
+            emotion = self._normalize_emotion(data.get("emotion"))
+            analysis = json.dumps({
+                "symbols": data.get("symbols", [])[:6],
+                "interpretation": data.get("interpretation", ""),
+                "advice": data.get("advice", "")
+            }, ensure_ascii=False)
+            return emotion, analysis
+        except Exception as e:
+            print(f"Error en enrich_dream: {e}")
+            if strict:
+                raise
+            return "Error_IA", f"Error en generación de análisis: {e}"
 
-    def generate_creative(self, dream_text: str, format: str) -> str:
+    def generate_creative(self, dream_text: str, format: str, on_token=None, strict: bool = False) -> str:
         if not self.client:
+            if strict:
+                raise RuntimeError("Sin conexión con la IA.")
             return "Error de conexión con la IA."
 
         fmt = format.lower().strip()
@@ -82,8 +377,8 @@ class IAService:
         )
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            content = self._chat_completion(
+                "creative", dream_text, fmt=fmt, on_token=on_token,
                 messages=[
                     {"role": "system", "content": "Eres un artista y escritor creativo."},
                     {"role": "user", "content": prompt_user}
@@ -91,19 +386,47 @@ class IAService:
                 max_tokens=500,
                 temperature=0.8
             )
-            return response.choices[0].message.content.strip()
+            return content.strip()
 
         except Exception as e:
             print(f"Error en generación creativa de IA: {e}")
+            if strict:
+                raise
             return f"Error en generación creativa de IA: {e}"
 
     def generate_embedding(self, text: str) -> np.ndarray:
+        if self.embedding_cache:
+            cached = self.embedding_cache.get(text)
+            if cached is not None:
+                return cached
         if not self.embedder:
             return None
-        return self.embedder.encode(text)
+        embedding = self.embedder.encode(text)
+        if self.embedding_cache:
+            self.embedding_cache.put(text, embedding)
+        return embedding
+
+    def generate_embeddings(self, texts: list, batch_size: int = 32) -> np.ndarray:
+        """Embeddings de varios textos; solo se codifican los que no están en caché."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        cached = [self.embedding_cache.get(t) for t in texts] if self.embedding_cache else [None] * len(texts)
+        missing = [i for i, vec in enumerate(cached) if vec is None]
+        if missing:
+            if not self.embedder:
+                return None
+            encoded = self.embedder.encode([texts[i] for i in missing], batch_size=batch_size,
+                                           convert_to_numpy=True, show_progress_bar=False)
+            for i, vec in zip(missing, encoded):
+                cached[i] = vec
+            if self.embedding_cache:
+                self.embedding_cache.put_many([texts[i] for i in missing], encoded)
+        return np.vstack([np.asarray(vec, dtype=np.float32) for vec in cached])
     
-    def generate_analysis(self, dream_text: str) -> str:
+    def generate_analysis(self, dream_text: str, on_token=None, strict: bool = False) -> str:
         if not self.client:
+            if strict:
+                raise RuntimeError("Sin conexión con la IA.")
             return "Error de conexión con la IA."
 
         prompt = (
@@ -116,8 +439,8 @@ class IAService:
         )
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            content = self._chat_completion(
+                "analysis", dream_text, on_token=on_token,
                 messages=[
                     {"role": "system", "content": "Eres experto en interpretación de sueños, claro y empático."},
                     {"role": "user", "content": prompt}
@@ -125,50 +448,249 @@ class IAService:
                 max_tokens=300,
                 temperature=0.6
             )
-            content = response.choices[0].message.content.strip()
-            return content
+            return content.strip()
         except Exception as e:
             print(f"Error en generate_analysis: {e}")
+            if strict:
+                raise
             return f"Error en generación de análisis: {e}"
 
-    def process_and_save_dream(self, title: str, content: str, format: str):
+    def process_and_save_dream(self, title: str, content: str, format: str, on_creative_token=None, on_progress=None):
+        # on_creative_token se llama desde un hilo del pool a medida que llegan los fragmentos del texto creativo;
+        # el análisis no se emite por streaming porque llega como JSON y solo tiene sentido una vez completo.
+        # on_progress(etapa) al terminar cada etapa: embedding, emotion, creative, analysis, persisted
         if not self.db_manager:
             return "Error: Gestor de Base de Datos no inicializado.", "", ""
 
-        emotion = self.analyze_emotion(content)
+        def report(stage):
+            if on_progress:
+                on_progress(stage)
 
-        creative_output = self.generate_creative(content, format)
+        if self.deferred_enrichment:
+            return self._save_dream_deferred(title, content, format, report)
 
-        analysis_output = self.generate_analysis(content)
+        def embed_and_classify():
+            # Embedding local y, con él, el clasificador; solo si duda se pide la emoción a gpt-4o.
+            # Todo en la misma tarea, en paralelo con las peticiones de creativo y análisis
+            embedding = self.generate_embedding(content)
+            report("embedding")
+            if self.combined_enrichment:
+                return embedding, None, "ia"
+            emotion, source = self._classify_emotion(content, embedding)
+            report("emotion")
+            return embedding, emotion, source
 
-        embedding = self.generate_embedding(content)
-        
-        save_success = self.db_manager.save_dream(title, content, emotion, embedding, creative_text=creative_output, creative_format=format, analysis_text=analysis_output)
+        creative_future = self._executor.submit(self.generate_creative, content, format, on_creative_token)
+        creative_future.add_done_callback(lambda f: report("creative"))
+        if self.combined_enrichment:
+            analysis_future = self._executor.submit(self.enrich_dream, content)
+        else:
+            analysis_future = self._executor.submit(self.generate_analysis, content)
+        analysis_future.add_done_callback(lambda f: report("analysis"))
+        emotion_future = self._executor.submit(embed_and_classify)
+
+        wait([creative_future, analysis_future, emotion_future])
+        embedding, emotion, emotion_source = emotion_future.result()
+        if self.combined_enrichment:
+            emotion, analysis_output = analysis_future.result()
+            self._learn_emotion(embedding, emotion)
+            report("emotion")
+        else:
+            analysis_output = analysis_future.result()
+        creative_output = creative_future.result()
 
-        if not save_success:
+        dream_id = self.db_manager.save_dream(title, content, emotion, embedding, creative_text=creative_output, creative_format=format, analysis_text=analysis_output,
+                                              embedding_model_version=self.embedding_model_version, emotion_source=emotion_source)
+
+        if not dream_id:
             return "Error al guardar sueño en la BD.", creative_output, analysis_output
+        report("persisted")
+
+        if self.vector_index is not None and embedding is not None:
+            self.vector_index.add(dream_id, embedding)
+            self._maybe_rebuild_index(self.vector_index)
 
         return emotion, creative_output, analysis_output
+
+    def _save_dream_deferred(self, title: str, content: str, format: str, report):
+        # Solo trabajo local antes de guardar: embedding y, si es fiable, la emoción del clasificador
+        embedding = self.generate_embedding(content)
+        report("embedding")
+        emotion = None
+        if embedding is not None and self.emotion_classifier:
+            emotion, _ = self.emotion_classifier.predict(embedding)
+        if emotion:
+            report("emotion")
+
+        dream_id = self.db_manager.save_dream(title, content, emotion, embedding, creative_format=format,
+                                              embedding_model_version=self.embedding_model_version, emotion_source="local")
+        if not dream_id:
+            return "Error al guardar sueño en la BD.", "", ""
+        report("persisted")
+
+        if self.combined_enrichment:
+            tasks = ["creative", "enrichment"]
+        else:
+            tasks = ["creative", "analysis"] + ([] if emotion else ["emotion"])
+        self.enrichment_queue.enqueue(dream_id, tasks)
+        self.enrichment_workers.notify()
+
+        if self.vector_index is not None and embedding is not None:
+            self.vector_index.add(dream_id, embedding)
+            self._maybe_rebuild_index(self.vector_index)
+
+        pending = "(Pendiente: se generará en segundo plano)"
+        return emotion or "Pendiente", pending, pending
+
+    def _run_enrichment_task(self, dream_id: int, task: str):
+        # Llamado por los hilos de EnrichmentWorkerPool; una excepción hace que la tarea se reintente
+        dream = self.db_manager.fetch_dream_by_id(dream_id)
+        if dream is None:
+            raise RuntimeError("No se pudo leer el sueño de la BD.")
+        content = dream['content']
+        embedding = None
+        if task in ("emotion", "enrichment"):
+            # Con el embedding guardado se usa (y se entrena) el clasificador local
+            embedding = self.db_manager.fetch_dream_embedding(dream_id, model_version=self.embedding_model_version)
+
+        if task == "emotion":
+            emotion, source = self._classify_emotion(content, embedding, strict=True)
+            fields = {"emotion": emotion, "emotion_source": source}
+        elif task == "creative":
+            fields = {"creative_text": self.generate_creative(content, dream['creative_format'] or "", strict=True)}
+        elif task == "analysis":
+            fields = {"analysis_text": self.generate_analysis(content, strict=True)}
+        elif task == "enrichment":
+            emotion, analysis = self.enrich_dream(content, strict=True)
+            self._learn_emotion(embedding, emotion)
+            fields = {"emotion": emotion, "emotion_source": "ia", "analysis_text": analysis}
+        else:
+            print(f"IAService: Tarea de enriquecimiento desconocida '{task}', se descarta.")
+            return
+
+        if not self.db_manager.update_dream_enrichment(dream_id, **fields):
+            raise RuntimeError("No se pudo actualizar el sueño en la BD.")
+
+    def invalidate_vector_index(self):
+        # El índice en memoria ya no refleja la BD (p. ej. tras una importación): se recarga en la próxima búsqueda
+        with self._index_lock:
+            self.vector_index = None
+
+    def _ensure_vector_index(self):
+        if self.vector_index is not None:
+            return self.vector_index
+        with self._index_lock:
+            if self.vector_index is None:
+                self.vector_index = self._load_ann_index() if self.ann_index else self._load_exact_index()
+                print(f"IAService: Índice semántico cargado con {len(self.vector_index)} sueños.")
+        return self.vector_index
+
+    def _load_exact_index(self):
+        ids, vectors = self.db_manager.fetch_all_embeddings(model_version=self.embedding_model_version)
+        index = VectorIndex()
+        index.load(ids, vectors)
+        return index
+
+    def _load_ann_index(self):
+        index = IVFIndex(
+            data_path("ann", self.embedding_model_version.replace("/", "__")),
+            nprobe=int(os.environ.get("DREAMS_ANN_NPROBE", "16"))
+        )
+        if index.open():
+            # Solo se leen de la BD los sueños guardados después de la última escritura del índice
+            ids, vectors = self.db_manager.fetch_all_embeddings(after_id=index.max_id, model_version=self.embedding_model_version)
+            for dream_id, vec in zip(ids, vectors):
+                index.add(dream_id, vec)
+        else:
+            ids, vectors = self.db_manager.fetch_all_embeddings(model_version=self.embedding_model_version)
+            if not len(ids):
+                return self._load_exact_index()
+            index.load(ids, vectors)
+        self._maybe_rebuild_index(index)
+        return index
+
+    def _maybe_rebuild_index(self, index):
+        if isinstance(index, IVFIndex) and index.needs_rebuild():
+            self._index_executor.submit(index.rebuild)
+
+    def semantic_search(self, query: str, top_k: int = 5) -> list:
+        if not self.db_manager:
+            return []
+        query_vec = self.generate_embedding(query)
+        if query_vec is None:
+            return []
+
+        index = self._ensure_vector_index()
+        hits = index.search(query_vec, top_k)
+        if not hits:
+            return []
+
+        scores = dict(hits)
+        rows = self.db_manager.fetch_dreams_by_ids([dream_id for dream_id, _ in hits])
+        for row in rows:
+            row['score'] = scores[row['id']]
+        return rows
+
+    def hybrid_search(self, query: str, top_k: int = 10, candidates: int = 50, rrf_k: int = 60) -> list:
+        """Búsqueda por palabras clave y semántica a la vez, fusionadas con reciprocal rank fusion.
+
+        Devuelve filas listas para la tabla de resultados: las columnas de
+        fetch_dreams_by_ids más 'score', 'sources' y 'snippet'.
+        """
+        if not self.db_manager or not query.strip():
+            return []
+
+        # La consulta de texto va a la BD mientras aquí se calcula el embedding y se busca en el índice
+        text_future = self._executor.submit(self.db_manager.search_fulltext, query, candidates)
+        vector_hits = []
+        query_vec = self.generate_embedding(query)
+        if query_vec is not None:
+            vector_hits = self._ensure_vector_index().search(query_vec, candidates)
+        try:
+            text_hits = text_future.result()
+        except Exception as e:
+            print(f"Error en la búsqueda por texto: {e}")
+            text_hits = []
+
+        fused, sources = {}, {}
+        for source, hits in (("texto", text_hits), ("semántica", vector_hits)):
+            for rank, (dream_id, _) in enumerate(hits, start=1):
+                fused[dream_id] = fused.get(dream_id, 0.0) + 1.0 / (rrf_k + rank)
+                sources.setdefault(dream_id, []).append(source)
+        if not fused:
+            return []
+
+        ranked = sorted(fused, key=fused.get, reverse=True)[:top_k]
+        rows = self.db_manager.fetch_dreams_by_ids(ranked, with_content=True)
+        terms = tokenize(query, min_length=2)
+        for row in rows:
+            row['score'] = fused[row['id']]
+            row['sources'] = sources[row['id']]
+            row['snippet'] = make_snippet(row.pop('content', ''), terms)
+        return rows
+
+    def get_metrics_version(self):
+        if not self.db_manager:
+            return None
+        return self.db_manager.fetch_dataset_version()
+
     def get_visual_metrics(self):
         if not self.db_manager:
             return "Error: DB no disponible.", "", ""
 
-        data = self.db_manager.fetch_metrics_data()
+        data = self.db_manager.fetch_emotion_aggregates()
         
         if not data:
             return "No hay sueños registrados.", "", ""
 
         emotion_counts = {e: 0 for e in self.EMOTION_CATEGORIES}
-        full_text = []
-        
         for item in data:
             emotion = item['emotion']
             if emotion in self.EMOTION_CATEGORIES:
-                emotion_counts[emotion] += 1
-            full_text.append(item['content'])
+                emotion_counts[emotion] += item['count']
             
-        evolution_data = [(item['date'], item['emotion']) for item in data]
+        evolution_data = [(item['date'], item['emotion'], item['count']) for item in data]
         
-        wordcloud_text = " ".join(full_text)
+        wordcloud_frequencies = self.db_manager.fetch_top_terms(limit=200)
         
-        return emotion_counts, evolution_data, wordcloud_text
+        return emotion_counts, evolution_data, wordcloud_frequencies
@@ -0,0 +1,87 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+
+
+class LLMProvider(ABC):
+    """Interfaz mínima que IAService usa para hablar con un modelo de chat."""
+
+    model = None
+
+    @property
+    def cache_id(self) -> str:
+        # Identifica al backend en las claves de la caché de respuestas
+        return self.model
+
+    @abstractmethod
+    def chat(self, messages: list, temperature: float, on_token=None, **request) -> str:
+        """Devuelve el texto de la respuesta; con on_token la pide por streaming y entrega cada fragmento."""
+
+
+class OpenAIChatProvider(LLMProvider):
+    """Cualquier API compatible con OpenAI: la oficial o un servidor local (base_url)."""
+
+    def __init__(self, model: str = "gpt-4o", api_key: str = None, base_url: str = None, timeout: float = 60.0, max_retries: int = 2):
+        self.model = model
+        self.base_url = base_url
+        self._api_key = api_key
+        self._timeout = timeout
+        self._max_retries = max_retries
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def cache_id(self) -> str:
+        return self.model if not self.base_url else f"{self.model}@{self.base_url}"
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import openai
+                    self._client = openai.OpenAI(
+                        api_key=self._api_key, base_url=self.base_url,
+                        timeout=self._timeout, max_retries=self._max_retries
+                    )
+        return self._client
+
+    def chat(self, messages: list, temperature: float, on_token=None, **request) -> str:
+        if not on_token:
+            response = self.client.chat.completions.create(model=self.model, messages=messages, temperature=temperature, **request)
+            return response.choices[0].message.content
+
+        parts = []
+        stream = self.client.chat.completions.create(model=self.model, messages=messages, temperature=temperature, stream=True, **request)
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                on_token(delta)
+        return "".join(parts)
+
+
+def provider_from_env() -> LLMProvider:
+    """Construye el proveedor según DREAMS_LLM_PROVIDER: "openai" (por defecto) o "local".
+
+    "local" apunta al servidor de pruebas de back/fake_llm_server.py (o a
+    cualquier otro compatible) en DREAMS_LLM_BASE_URL.
+    """
+    kind = os.environ.get("DREAMS_LLM_PROVIDER", "openai").lower()
+    model = os.environ.get("DREAMS_LLM_MODEL", "gpt-4o")
+    timeout = float(os.environ.get("DREAMS_LLM_TIMEOUT", "60"))
+    max_retries = int(os.environ.get("DREAMS_LLM_MAX_RETRIES", "2"))
+    if kind == "openai":
+        return OpenAIChatProvider(
+            model, api_key=os.environ.get("OPENAI_5ECRET_K3Y"), base_url=os.environ.get("DREAMS_LLM_BASE_URL") or None,
+            timeout=timeout, max_retries=max_retries
+        )
+    if kind == "local":
+        return OpenAIChatProvider(
+            model, api_key=os.environ.get("DREAMS_LLM_API_KEY", "local"),
+            base_url=os.environ.get("DREAMS_LLM_BASE_URL", "http://127.0.0.1:8089/v1"),
+            timeout=timeout, max_retries=max_retries
+        )
+    raise ValueError(f"Proveedor de IA desconocido: {kind}")
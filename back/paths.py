@@ -0,0 +1,8 @@
+import os
+
+
+def data_path(*parts) -> str:
+    # Carpeta local para cachés e índices; se puede cambiar con DREAMS_DATA_DIR
+    base = os.environ.get("DREAMS_DATA_DIR") or os.path.join(os.path.expanduser("~"), ".diario_dreams")
+    os.makedirs(base, exist_ok=True)
+    return os.path.join(base, *parts)
@@ -0,0 +1,199 @@
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+
+# Modelo cargado una vez en cada proceso del pool
+_worker_model = None
+
+
+def _init_worker(model_name: str, threads: int):
+    global _worker_model
+    if threads:
+        # Sin límite, cada proceso usaría todos los núcleos y se pisarían entre ellos
+        import torch
+        torch.set_num_threads(threads)
+    from back.ia_services import load_embedding_model
+    _worker_model = load_embedding_model(model_name)
+
+
+def _encode(texts: list, batch_size: int) -> np.ndarray:
+    vectors = _worker_model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+class EmbeddingBackfill:
+    """Recalcula los embeddings que no son del modelo actual, de forma reanudable.
+
+    Las filas se leen en orden de id (cursor del servidor en MySQL), cada
+    bloque se codifica en un pool de procesos mientras se escriben los
+    anteriores, y cada bloque se guarda en su propia transacción. Tras cada
+    escritura se anota el último id en un fichero de checkpoint: si el proceso
+    se interrumpe, la siguiente ejecución continúa desde ahí.
+    """
+
+    def __init__(self, db_manager, model_name: str, model_version: str, checkpoint_path: str,
+                 workers: int = 1, batch_size: int = 256, chunk_size: int = 2000):
+        self.db_manager = db_manager
+        self.model_name = model_name
+        self.model_version = model_version
+        self.checkpoint_path = checkpoint_path
+        # workers=0 codifica en este mismo proceso (p. ej. con GPU)
+        self.workers = workers
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+
+    def load_checkpoint(self) -> dict:
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if checkpoint.get("model_version") != self.model_version:
+            print(f"EmbeddingBackfill: El checkpoint es de '{checkpoint.get('model_version')}', se empieza desde el principio.")
+            return {}
+        return checkpoint
+
+    def _save_checkpoint(self, last_id: int, done: int):
+        checkpoint = {
+            "model_version": self.model_version, "last_id": last_id, "done": done,
+            "updated": datetime.now().isoformat(timespec="seconds")
+        }
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    def _executor(self):
+        if self.workers <= 0:
+            _init_worker(self.model_name, 0)
+            # Un hilo aparte basta para que la escritura en la BD se solape con la codificación
+            return ThreadPoolExecutor(max_workers=1)
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        # "spawn": torch no admite fork una vez inicializado
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker, initargs=(self.model_name, threads)
+        )
+
+    def status(self) -> dict:
+        checkpoint = self.load_checkpoint()
+        return {
+            "model_version": self.model_version,
+            "pending": self.db_manager.count_stale_embeddings(self.model_version),
+            "checkpoint": checkpoint or None,
+        }
+
+    def run(self, restart: bool = False) -> int:
+        """Recalcula los pendientes y devuelve cuántos se reescribieron.
+
+        Si se interrumpe (error o Ctrl+C) relanza la excepción: el checkpoint
+        queda en el último bloque guardado para continuar en la próxima ejecución.
+        """
+        checkpoint = {} if restart else self.load_checkpoint()
+        last_id = checkpoint.get("last_id", 0)
+        done = checkpoint.get("done", 0)
+        pending = self.db_manager.count_stale_embeddings(self.model_version, last_id)
+        if not pending:
+            print(f"EmbeddingBackfill: Todos los embeddings son ya de '{self.model_version}'.")
+            self._clear_checkpoint()
+            return 0
+        resumed = f", continuando tras el id {last_id}" if last_id else ""
+        print(f"EmbeddingBackfill: {pending} sueños por recalcular con '{self.model_version}'{resumed}.")
+
+        start = time.perf_counter()
+        processed = 0
+        in_flight = deque()
+        # Bloques codificándose a la vez: uno por proceso más uno en cola para no dejar el pool parado
+        max_in_flight = max(self.workers, 1) + 1
+        executor = self._executor()
+        stream = self.db_manager.iter_stale_embeddings(self.model_version, last_id, self.chunk_size)
+        try:
+            def write_oldest():
+                nonlocal last_id, done, processed
+                rows, future = in_flight.popleft()
+                vectors = future.result()
+                written = self.db_manager.update_embeddings(list(zip((r[0] for r in rows), vectors)), self.model_version)
+                if written != len(rows):
+                    raise RuntimeError(f"No se pudo guardar el bloque que termina en el id {rows[-1][0]}.")
+                last_id = rows[-1][0]
+                done += written
+                processed += written
+                self._save_checkpoint(last_id, done)
+                rate = processed / max(time.perf_counter() - start, 1e-9)
+                print(f"EmbeddingBackfill: {processed}/{pending} recalculados ({rate:.0f}/s), último id {last_id}.")
+
+            for rows in stream:
+                in_flight.append((rows, executor.submit(_encode, [r[1] for r in rows], self.batch_size)))
+                if len(in_flight) >= max_in_flight:
+                    write_oldest()
+            while in_flight:
+                write_oldest()
+        except (Exception, KeyboardInterrupt) as e:
+            print(f"EmbeddingBackfill: Interrumpido ({e or type(e).__name__}). "
+                  f"Se reanudará tras el id {last_id} en la próxima ejecución.")
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            stream.close()
+        executor.shutdown()
+
+        self._clear_checkpoint()
+        elapsed = time.perf_counter() - start
+        print(f"EmbeddingBackfill: Terminado: {processed} embeddings recalculados en {elapsed:.1f}s.")
+        return processed
+
+    def _clear_checkpoint(self):
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
+
+
+if __name__ == "__main__":
+    from back.embedding_codec import DEFAULT_EMBEDDING_MODEL, embedding_model_version
+    from back.paths import data_path
+    from back.storage import create_database_manager
+
+    parser = argparse.ArgumentParser(
+        description="Recalcula los embeddings guardados con otro modelo (DREAMS_EMBEDDING_MODEL). "
+                    "Se puede interrumpir: la siguiente ejecución continúa donde se quedó."
+    )
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Procesos que codifican en paralelo (0: en este proceso, p. ej. con GPU)")
+    parser.add_argument("--batch-size", type=int, default=256, help="Tamaño de lote para el modelo de embeddings")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Sueños por bloque y por transacción")
+    parser.add_argument("--checkpoint", default=None, help="Fichero de checkpoint (por defecto en la carpeta de datos)")
+    parser.add_argument("--restart", action="store_true", help="Ignorar el checkpoint y recorrer la tabla desde el principio")
+    parser.add_argument("--status", action="store_true", help="Mostrar los sueños pendientes y el checkpoint, sin recalcular")
+    args = parser.parse_args()
+
+    version = embedding_model_version()
+    slug = version.replace("/", "__")
+    backfill = EmbeddingBackfill(
+        create_database_manager(),
+        os.environ.get("DREAMS_EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL),
+        version,
+        args.checkpoint or data_path(f"reembed_{slug}.json"),
+        workers=args.workers, batch_size=args.batch_size, chunk_size=args.chunk_size
+    )
+    if args.status:
+        print(json.dumps(backfill.status(), indent=2, ensure_ascii=False))
+        sys.exit(0)
+    # Una ejecución que continúa otra también termina de reescribir los vectores de aquella
+    resumed = bool(backfill.load_checkpoint()) and not args.restart
+    try:
+        processed = backfill.run(restart=args.restart)
+    except (Exception, KeyboardInterrupt):
+        sys.exit(1)
+    if processed or resumed:
+        # El índice IVF guardado solo se pone al día por id y no vería los vectores reescritos
+        shutil.rmtree(data_path("ann", slug), ignore_errors=True)
+        print("EmbeddingBackfill: Reinicia la aplicación para recargar el índice semántico.")
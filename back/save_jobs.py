@@ -0,0 +1,65 @@
+import itertools
+import os
+import queue
+import threading
+
+
+class DreamJobQueue:
+    """Cola acotada de sueños pendientes de procesar y guardar.
+
+    Los trabajos se ejecutan en hilos propios (no en el pool de IAService, que
+    es el que usan por dentro para las llamadas a OpenAI). Cada trabajo avisa a
+    su listener con listener(job_id, evento, datos), siendo evento:
+      "queued", "started", "progress" (datos = etapa), "token" (datos = ("creative", texto); solo
+      se emite el texto creativo, el análisis llega entero con "done"),
+      "done" (datos = (emoción, creativo, análisis)) o "error" (datos = excepción).
+    """
+
+    STAGES = ("embedding", "emotion", "creative", "analysis", "persisted")
+
+    def __init__(self, ia_service, max_pending: int = None, workers: int = None):
+        self.ia_service = ia_service
+        self._jobs = queue.Queue(maxsize=max_pending or int(os.environ.get("DREAMS_SAVE_QUEUE_SIZE", "10")))
+        self._ids = itertools.count(1)
+        self._threads = []
+        for i in range(workers or int(os.environ.get("DREAMS_SAVE_WORKERS", "2"))):
+            t = threading.Thread(target=self._run, daemon=True, name=f"dream-job-{i}")
+            t.start()
+            self._threads.append(t)
+
+    def pending(self) -> int:
+        return self._jobs.qsize()
+
+    def submit(self, title: str, content: str, format: str, listener) -> int:
+        """Encola un sueño; devuelve su id o None si la cola está llena."""
+        job_id = next(self._ids)
+        try:
+            self._jobs.put_nowait((job_id, title, content, format, listener))
+        except queue.Full:
+            return None
+        listener(job_id, "queued", None)
+        return job_id
+
+    @staticmethod
+    def _bind(listener, job_id: int, event: str, kind: str = None):
+        # job_id y listener quedan fijados aquí: los callbacks de los futures pueden llegar
+        # cuando este hilo ya ha pasado al siguiente trabajo
+        if kind:
+            return lambda payload: listener(job_id, event, (kind, payload))
+        return lambda payload: listener(job_id, event, payload)
+
+    def _run(self):
+        while True:
+            job_id, title, content, format, listener = self._jobs.get()
+            try:
+                listener(job_id, "started", None)
+                result = self.ia_service.process_and_save_dream(
+                    title, content, format,
+                    on_creative_token=self._bind(listener, job_id, "token", "creative"),
+                    on_progress=self._bind(listener, job_id, "progress")
+                )
+                listener(job_id, "done", result)
+            except Exception as e:
+                listener(job_id, "error", e)
+            finally:
+                self._jobs.task_done()
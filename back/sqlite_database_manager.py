@@ -0,0 +1,557 @@
+import os
+import json
+import sqlite3
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import date, datetime
+import numpy as np
+from back.embedding_codec import encode_embedding, decode_embedding_rows, embedding_model_version as current_embedding_model_version
+from back.text_terms import term_counts, tokenize
+
+# Sueños cuyo embedding falta o lo generó otro modelo: los que recalcula back/reembed.py
+STALE_EMBEDDING_FILTER = (
+    "(embedding_model_version IS NULL OR embedding_model_version <> ? "
+    "OR (embedding_blob IS NULL AND embedding_vector IS NULL))"
+)
+
+
+# Columnas de fecha que se devuelven como date/datetime, igual que con el conector de MySQL
+_DATE_COLUMNS = {"date_recorded": datetime.fromisoformat, "day": date.fromisoformat}
+
+
+def _to_db(value):
+    # Las fechas se guardan como texto ISO; sin adaptadores globales de sqlite3, que afectarían
+    # a las demás conexiones del proceso (LLMCache, EnrichmentQueue...)
+    if isinstance(value, datetime):
+        return value.isoformat(" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _dict_factory(cursor, row):
+    result = {}
+    for col, value in zip(cursor.description, row):
+        parse = _DATE_COLUMNS.get(col[0])
+        result[col[0]] = parse(value) if parse and isinstance(value, str) else value
+    return result
+
+
+class SQLiteDatabaseManager:
+    """Motor de almacenamiento en un fichero SQLite local, con la misma API que DatabaseManager.
+
+    Pensado para instalaciones de un solo usuario y para CI: sin servidor,
+    arranque inmediato y lecturas sin ida y vuelta por red. Usa WAL, una
+    conexión por hilo y las sentencias preparadas que sqlite3 guarda en caché.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.embedding_storage = os.environ.get("DREAMS_EMBEDDING_STORAGE", "float32").lower()
+        self._local = threading.local()
+        # WAL admite lectores concurrentes pero un solo escritor: las escrituras se serializan aquí
+        self._write_lock = threading.Lock()
+        self.fulltext_available = True
+        self._ensure_database_and_table()
+
+    @property
+    def connection(self):
+        conn = getattr(self._local, "connection", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, isolation_level=None,
+                check_same_thread=False, cached_statements=256, timeout=30
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.create_function("crc32", 1, lambda s: zlib.crc32(str(s).encode("utf-8")), deterministic=True)
+            self._local.connection = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        with self._write_lock:
+            conn = self.connection
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn.cursor()
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _ensure_database_and_table(self):
+        with self._transaction() as cursor:
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS dreams (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                content TEXT NOT NULL,
+                date_recorded DATETIME NOT NULL,
+                emotion_tag TEXT,
+                creative_format TEXT,
+                creative_text TEXT,
+                analysis_text TEXT,
+                embedding_vector TEXT,
+                embedding_blob BLOB,
+                embedding_model_version TEXT,
+                emotion_source TEXT
+            )
+            """)
+            columns = {row[1] for row in cursor.execute("PRAGMA table_info(dreams)")}
+            if "embedding_model_version" not in columns:
+                # Los vectores ya guardados se atribuyen al modelo configurado (ADD COLUMN con DEFAULT no reescribe la tabla)
+                version = current_embedding_model_version().replace("'", "''")
+                cursor.execute(f"ALTER TABLE dreams ADD COLUMN embedding_model_version TEXT DEFAULT '{version}'")
+                print(f"SQLiteDatabaseManager: Columna 'embedding_model_version' añadida; los embeddings existentes se marcan como '{version}'.")
+            if "emotion_source" not in columns:
+                # No se sabe quién puso las emociones ya guardadas: se quedan a NULL y no entrenan el clasificador
+                cursor.execute("ALTER TABLE dreams ADD COLUMN emotion_source TEXT")
+                print("SQLiteDatabaseManager: Columna 'emotion_source' añadida.")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_dreams_date_id ON dreams (date_recorded, id)")
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS dream_emotion_daily (
+                day DATE NOT NULL,
+                emotion_tag TEXT NOT NULL,
+                dream_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, emotion_tag)
+            ) WITHOUT ROWID
+            """)
+            # La comparación de texto por defecto de SQLite ya es binaria: "año" != "ano"
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS dream_term_monthly (
+                month TEXT NOT NULL,
+                term TEXT NOT NULL,
+                term_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (month, term)
+            ) WITHOUT ROWID
+            """)
+            cursor.execute("SELECT EXISTS(SELECT 1 FROM dream_emotion_daily), EXISTS(SELECT 1 FROM dream_term_monthly), EXISTS(SELECT 1 FROM dreams)")
+            has_aggregates, has_terms, has_dreams = cursor.fetchone()
+            if has_dreams and not has_aggregates:
+                self._rebuild_emotion_aggregates(cursor)
+            if has_dreams and not has_terms:
+                self._rebuild_term_index(cursor)
+        self._ensure_fulltext()
+        print(f"SQLiteDatabaseManager: Base de datos '{self.path}' lista.")
+
+    def _ensure_fulltext(self):
+        # Índice FTS5 de contenido externo sobre dreams, mantenido con triggers
+        try:
+            with self._transaction() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'dreams_fts'")
+                if cursor.fetchone():
+                    return
+                cursor.execute(
+                    "CREATE VIRTUAL TABLE dreams_fts USING fts5("
+                    "title, content, content='dreams', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+                )
+                cursor.execute("""
+                CREATE TRIGGER dreams_fts_insert AFTER INSERT ON dreams BEGIN
+                    INSERT INTO dreams_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+                END
+                """)
+                cursor.execute("""
+                CREATE TRIGGER dreams_fts_delete AFTER DELETE ON dreams BEGIN
+                    INSERT INTO dreams_fts (dreams_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+                END
+                """)
+                cursor.execute("""
+                CREATE TRIGGER dreams_fts_update AFTER UPDATE OF title, content ON dreams BEGIN
+                    INSERT INTO dreams_fts (dreams_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+                    INSERT INTO dreams_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+                END
+                """)
+                cursor.execute("INSERT INTO dreams_fts (dreams_fts) VALUES ('rebuild')")
+                print("SQLiteDatabaseManager: Índice de texto completo creado.")
+        except sqlite3.OperationalError as err:
+            # SQLite compilado sin FTS5: la búsqueda híbrida queda solo semántica
+            print(f"SQLiteDatabaseManager: Búsqueda por texto no disponible: {err}")
+            self.fulltext_available = False
+
+    def close(self):
+        conn = getattr(self._local, "connection", None)
+        if conn is not None:
+            self._local.connection = None
+            conn.close()
+
+    def _serialize_embedding(self, embedding):
+        if self.embedding_storage == "json":
+            return (json.dumps(np.array(embedding).tolist()) if embedding is not None else json.dumps([])), None
+        return None, encode_embedding(embedding, self.embedding_storage)
+
+    def _add_daily_counts(self, cursor, counts: dict):
+        # counts: {(día, emoción): n}
+        cursor.executemany("""
+        INSERT INTO dream_emotion_daily (day, emotion_tag, dream_count) VALUES (?, ?, ?)
+        ON CONFLICT (day, emotion_tag) DO UPDATE SET dream_count = dream_count + excluded.dream_count
+        """, [(_to_db(day), emotion, n) for (day, emotion), n in counts.items()])
+
+    def _add_term_counts(self, cursor, counts: dict):
+        # counts: {(mes "YYYY-MM", término): n}
+        cursor.executemany("""
+        INSERT INTO dream_term_monthly (month, term, term_count) VALUES (?, ?, ?)
+        ON CONFLICT (month, term) DO UPDATE SET term_count = term_count + excluded.term_count
+        """, [(month, term, n) for (month, term), n in counts.items()])
+
+    def save_dream(self, title: str, content: str, emotion: str, embedding, creative_text: str = None, creative_format: str = None, analysis_text: str = None,
+                   embedding_model_version: str = None, emotion_source: str = None):
+        embedding_json, embedding_blob = self._serialize_embedding(embedding)
+        # Sin versión explícita, el vector es del modelo configurado; sin vector no hay versión
+        model_version = (embedding_model_version or current_embedding_model_version()) if embedding is not None else None
+        now = datetime.now()
+        try:
+            with self._transaction() as cursor:
+                cursor.execute("""
+                INSERT INTO dreams (title, content, date_recorded, emotion_tag, creative_format, creative_text, analysis_text, embedding_vector, embedding_blob, embedding_model_version, emotion_source)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (title, content, _to_db(now), emotion, creative_format, creative_text, analysis_text, embedding_json, embedding_blob, model_version,
+                      emotion_source if emotion else None))
+                dream_id = cursor.lastrowid
+                self._add_daily_counts(cursor, {(now.date(), emotion or 'Indefinida'): 1})
+                month = now.strftime("%Y-%m")
+                self._add_term_counts(cursor, {(month, term): n for term, n in term_counts(content).items()})
+            print(f"SQLiteDatabaseManager: Sueño '{title}' guardado con ID: {dream_id}")
+            return dream_id
+        except sqlite3.Error as err:
+            print(f"Error al guardar sueño: {err}")
+            return False
+
+    def update_dream_enrichment(self, dream_id: int, emotion: str = None, creative_text: str = None, analysis_text: str = None,
+                                emotion_source: str = None) -> bool:
+        """Rellena los campos de IA que siguen a NULL; repetir la misma tarea no cambia nada."""
+        try:
+            with self._transaction() as cursor:
+                cursor.execute(
+                    "SELECT date(date_recorded), emotion_tag, creative_text, analysis_text FROM dreams WHERE id = ?",
+                    (dream_id,)
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    return True
+                day, current_emotion, current_creative, current_analysis = row
+
+                updates = {}
+                if emotion is not None and current_emotion is None:
+                    updates['emotion_tag'] = emotion
+                    updates['emotion_source'] = emotion_source
+                if creative_text is not None and current_creative is None:
+                    updates['creative_text'] = creative_text
+                if analysis_text is not None and current_analysis is None:
+                    updates['analysis_text'] = analysis_text
+                if updates:
+                    assignments = ", ".join(f"{col} = ?" for col in updates)
+                    cursor.execute(f"UPDATE dreams SET {assignments} WHERE id = ?", tuple(updates.values()) + (dream_id,))
+                if 'emotion_tag' in updates:
+                    cursor.execute(
+                        "UPDATE dream_emotion_daily SET dream_count = dream_count - 1 WHERE day = ? AND emotion_tag = 'Indefinida'",
+                        (day,)
+                    )
+                    self._add_daily_counts(cursor, {(day, emotion): 1})
+            return True
+        except sqlite3.Error as err:
+            print(f"Error al actualizar el enriquecimiento del sueño {dream_id}: {err}")
+            return False
+
+    def save_dreams_bulk(self, dreams: list) -> int:
+        if not dreams:
+            return 0
+        now = datetime.now()
+        default_version = current_embedding_model_version()
+        data = []
+        for d in dreams:
+            embedding_json, embedding_blob = self._serialize_embedding(d.get('embedding'))
+            data.append((
+                d['title'], d['content'], d.get('date_recorded') or now, d.get('emotion'),
+                d.get('creative_format'), d.get('creative_text'), d.get('analysis_text'),
+                embedding_json, embedding_blob,
+                (d.get('embedding_model_version') or default_version) if d.get('embedding') is not None else None,
+                d.get('emotion_source') if d.get('emotion') else None
+            ))
+
+        daily, terms = {}, {}
+        for row in data:
+            key = (row[2].date(), row[3] or 'Indefinida')
+            daily[key] = daily.get(key, 0) + 1
+            month = row[2].strftime("%Y-%m")
+            for term, n in term_counts(row[1]).items():
+                terms[(month, term)] = terms.get((month, term), 0) + n
+
+        try:
+            with self._transaction() as cursor:
+                cursor.executemany("""
+                INSERT INTO dreams (title, content, date_recorded, emotion_tag, creative_format, creative_text, analysis_text, embedding_vector, embedding_blob, embedding_model_version, emotion_source)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, [(row[0], row[1], _to_db(row[2])) + row[3:] for row in data])
+                self._add_daily_counts(cursor, daily)
+                self._add_term_counts(cursor, terms)
+            return len(data)
+        except sqlite3.Error as err:
+            print(f"Error al guardar sueños en bloque: {err}")
+            return 0
+
+    def _query(self, sql: str, params=(), error: str = "consultar la base de datos", default=None, dictionary: bool = True):
+        try:
+            cursor = self.connection.cursor()
+            if dictionary:
+                cursor.row_factory = _dict_factory
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        except sqlite3.Error as err:
+            print(f"Error al {error}: {err}")
+            return default
+
+    def fetch_all_dreams(self) -> list:
+        return self._query(
+            "SELECT id, title, substr(content, 1, 300) AS preview, date_recorded, emotion_tag, creative_format, "
+            "substr(creative_text, 1, 300) AS creative_preview, substr(analysis_text, 1, 300) AS analysis_preview "
+            "FROM dreams ORDER BY date_recorded DESC",
+            error="recuperar sueños", default=[]
+        )
+
+    def fetch_dreams_page(self, after=None, before=None, limit: int = 100, with_previews: bool = False) -> list:
+        columns = "id, title, date_recorded, emotion_tag, creative_format"
+        if with_previews:
+            columns += ", substr(content, 1, 300) AS preview, substr(creative_text, 1, 300) AS creative_preview, substr(analysis_text, 1, 300) AS analysis_preview"
+        if after is not None:
+            where, params, order = "WHERE (date_recorded, id) < (?, ?)", (_to_db(after[0]), after[1]), "DESC"
+        elif before is not None:
+            where, params, order = "WHERE (date_recorded, id) > (?, ?)", (_to_db(before[0]), before[1]), "ASC"
+        else:
+            where, params, order = "", (), "DESC"
+        rows = self._query(
+            f"SELECT {columns} FROM dreams {where} ORDER BY date_recorded {order}, id {order} LIMIT ?",
+            params + (limit,), error="recuperar página de sueños", default=[]
+        )
+        if order == "ASC":
+            rows.reverse()
+        return rows
+
+    def fetch_dream_by_id(self, dream_id: int) -> dict:
+        rows = self._query(
+            "SELECT id, title, content, date_recorded, emotion_tag, creative_format, creative_text, analysis_text FROM dreams WHERE id = ?",
+            (dream_id,), error="recuperar sueño por ID"
+        )
+        return rows[0] if rows else None
+
+    def fetch_dream_embedding(self, dream_id: int, model_version: str = None):
+        query = (
+            "SELECT id, embedding_blob, embedding_vector FROM dreams "
+            "WHERE id = ? AND (embedding_blob IS NOT NULL OR embedding_vector IS NOT NULL)"
+        )
+        params = (dream_id,)
+        if model_version:
+            query += " AND embedding_model_version = ?"
+            params += (model_version,)
+        rows = self._query(query, params, error="recuperar el embedding del sueño", default=[], dictionary=False)
+        _, matrix = decode_embedding_rows(rows)
+        return matrix[0] if len(matrix) else None
+
+    def fetch_dreams_by_ids(self, dream_ids: list, with_content: bool = False) -> list:
+        if not dream_ids:
+            return []
+        placeholders = ", ".join(["?"] * len(dream_ids))
+        columns = "id, title, date_recorded, emotion_tag, creative_format" + (", content" if with_content else "")
+        rows = self._query(
+            f"SELECT {columns} FROM dreams WHERE id IN ({placeholders})",
+            tuple(dream_ids), error="recuperar sueños por IDs", default=[]
+        )
+        by_id = {r['id']: r for r in rows}
+        return [by_id[i] for i in dream_ids if i in by_id]
+
+    def search_fulltext(self, query: str, limit: int = 50) -> list:
+        """Búsqueda BM25 en título y contenido con FTS5; devuelve [(id, puntuación)]."""
+        terms = tokenize(query, min_length=2)
+        if not terms or not self.fulltext_available:
+            return []
+        # Cada término entre comillas: la consulta del usuario nunca se interpreta como sintaxis FTS5
+        match = " OR ".join('"' + t.replace('"', '""') + '"' for t in dict.fromkeys(terms))
+        rows = self._query(
+            "SELECT rowid, -bm25(dreams_fts) FROM dreams_fts WHERE dreams_fts MATCH ? ORDER BY bm25(dreams_fts) LIMIT ?",
+            (match, limit), error="buscar por texto", default=[], dictionary=False
+        )
+        return [(dream_id, float(score)) for dream_id, score in rows]
+
+    def fetch_all_embeddings(self, after_id: int = None, model_version: str = None):
+        query = (
+            "SELECT id, embedding_blob, embedding_vector FROM dreams "
+            "WHERE id > ? AND (embedding_blob IS NOT NULL OR embedding_vector IS NOT NULL)"
+        )
+        params = (after_id or 0,)
+        if model_version:
+            query += " AND embedding_model_version = ?"
+            params += (model_version,)
+        rows = self._query(query, params, error="recuperar embeddings", dictionary=False)
+        if rows is None:
+            return [], np.empty((0, 0), dtype=np.float32)
+        return decode_embedding_rows(rows)
+
+    def fetch_labeled_embeddings(self, labels: list, model_version: str = None, source: str = None):
+        if not labels:
+            return [], np.empty((0, 0), dtype=np.float32)
+        placeholders = ", ".join(["?"] * len(labels))
+        query = (
+            "SELECT emotion_tag, embedding_blob, embedding_vector FROM dreams "
+            f"WHERE emotion_tag IN ({placeholders}) AND (embedding_blob IS NOT NULL OR embedding_vector IS NOT NULL)"
+        )
+        params = tuple(labels)
+        if model_version:
+            query += " AND embedding_model_version = ?"
+            params += (model_version,)
+        if source:
+            query += " AND emotion_source = ?"
+            params += (source,)
+        rows = self._query(query, params, error="recuperar embeddings etiquetados", dictionary=False)
+        if rows is None:
+            return [], np.empty((0, 0), dtype=np.float32)
+        return decode_embedding_rows(rows)
+
+    def fetch_unlabeled_dream_ids(self, after_id: int = 0) -> list:
+        """Ids, en orden, de los sueños sin emoción con id mayor que after_id."""
+        rows = self._query(
+            "SELECT id FROM dreams WHERE id > ? AND emotion_tag IS NULL ORDER BY id",
+            (after_id,), error="recuperar sueños sin emoción", default=[], dictionary=False
+        )
+        return [row[0] for row in rows]
+
+    def migrate_json_embeddings(self, batch_size: int = 500) -> int:
+        if self.embedding_storage == "json":
+            print("SQLiteDatabaseManager: El almacenamiento está en modo JSON, no hay nada que migrar.")
+            return 0
+        migrated = 0
+        while True:
+            rows = self._query(
+                "SELECT id, embedding_vector FROM dreams WHERE embedding_blob IS NULL AND embedding_vector IS NOT NULL ORDER BY id LIMIT ?",
+                (batch_size,), error="leer embeddings a migrar", default=[], dictionary=False
+            )
+            if not rows:
+                break
+            updates = []
+            for dream_id, raw in rows:
+                vec = np.fromstring(raw.strip().strip("[]"), dtype=np.float32, sep=",")
+                updates.append((encode_embedding(vec, self.embedding_storage), dream_id))
+            try:
+                with self._transaction() as cursor:
+                    cursor.executemany("UPDATE dreams SET embedding_blob = ?, embedding_vector = NULL WHERE id = ?", updates)
+            except sqlite3.Error as err:
+                print(f"Error al migrar embeddings: {err}")
+                return migrated
+            migrated += len(updates)
+        print(f"SQLiteDatabaseManager: Migración de embeddings completada ({migrated} filas).")
+        return migrated
+
+    def count_stale_embeddings(self, model_version: str, after_id: int = 0) -> int:
+        rows = self._query(
+            f"SELECT COUNT(*) FROM dreams WHERE id > ? AND {STALE_EMBEDDING_FILTER}",
+            (after_id, model_version), error="contar embeddings pendientes", default=[(0,)], dictionary=False
+        )
+        return rows[0][0]
+
+    def iter_stale_embeddings(self, model_version: str, after_id: int = 0, fetch_size: int = 1000):
+        """Genera listas de (id, content) de los sueños a recalcular, en orden de id.
+
+        Sin servidor no hay cursor del lado del servidor: se pagina por id para
+        no mantener abierta una lectura (y su instantánea del WAL) todo el proceso.
+        """
+        while True:
+            rows = self._query(
+                f"SELECT id, content FROM dreams WHERE id > ? AND {STALE_EMBEDDING_FILTER} ORDER BY id LIMIT ?",
+                (after_id, model_version, fetch_size), error="leer sueños a recalcular", dictionary=False
+            )
+            if not rows:
+                return
+            yield rows
+            after_id = rows[-1][0]
+
+    def update_embeddings(self, updates: list, model_version: str) -> int:
+        """Reescribe los embeddings de varios sueños en una transacción; updates: [(id, embedding)]."""
+        if not updates:
+            return 0
+        data = []
+        for dream_id, embedding in updates:
+            embedding_json, embedding_blob = self._serialize_embedding(embedding)
+            data.append((embedding_json, embedding_blob, model_version, dream_id))
+        try:
+            with self._transaction() as cursor:
+                cursor.executemany(
+                    "UPDATE dreams SET embedding_vector = ?, embedding_blob = ?, embedding_model_version = ? WHERE id = ?",
+                    data
+                )
+            return len(data)
+        except sqlite3.Error as err:
+            print(f"Error al actualizar embeddings: {err}")
+            return 0
+
+    def _rebuild_emotion_aggregates(self, cursor):
+        cursor.execute("DELETE FROM dream_emotion_daily")
+        cursor.execute("""
+        INSERT INTO dream_emotion_daily (day, emotion_tag, dream_count)
+        SELECT date(date_recorded), COALESCE(emotion_tag, 'Indefinida'), COUNT(*) FROM dreams
+        GROUP BY date(date_recorded), COALESCE(emotion_tag, 'Indefinida')
+        """)
+        print("SQLiteDatabaseManager: Tabla de conteos diarios por emoción reconstruida.")
+
+    def rebuild_emotion_aggregates(self) -> bool:
+        try:
+            with self._transaction() as cursor:
+                self._rebuild_emotion_aggregates(cursor)
+            return True
+        except sqlite3.Error as err:
+            print(f"Error al reconstruir los conteos por emoción: {err}")
+            return False
+
+    def _rebuild_term_index(self, cursor, batch_size: int = 2000):
+        cursor.execute("DELETE FROM dream_term_monthly")
+        last_id = 0
+        while True:
+            rows = cursor.execute(
+                "SELECT id, date_recorded, content FROM dreams WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            counts = {}
+            for _, date_recorded, content in rows:
+                month = datetime.fromisoformat(date_recorded).strftime("%Y-%m")
+                for term, n in term_counts(content).items():
+                    counts[(month, term)] = counts.get((month, term), 0) + n
+            self._add_term_counts(cursor, counts)
+            last_id = rows[-1][0]
+        print("SQLiteDatabaseManager: Índice de términos listo.")
+
+    def fetch_emotion_aggregates(self) -> list:
+        rows = self._query(
+            "SELECT day, emotion_tag, dream_count FROM dream_emotion_daily WHERE dream_count > 0 ORDER BY day ASC",
+            error="recuperar conteos por emoción", default=[]
+        )
+        return [{'date': row['day'].isoformat(), 'emotion': row['emotion_tag'], 'count': row['dream_count']} for row in rows]
+
+    def fetch_top_terms(self, limit: int = 200, month: str = None) -> dict:
+        if month:
+            rows = self._query(
+                "SELECT term, term_count FROM dream_term_monthly WHERE month = ? ORDER BY term_count DESC LIMIT ?",
+                (month, limit), error="recuperar frecuencias de términos", default=[], dictionary=False
+            )
+        else:
+            rows = self._query(
+                "SELECT term, SUM(term_count) AS n FROM dream_term_monthly GROUP BY term ORDER BY n DESC LIMIT ?",
+                (limit,), error="recuperar frecuencias de términos", default=[], dictionary=False
+            )
+        return {term: int(n) for term, n in rows}
+
+    def fetch_dataset_version(self):
+        rows = self._query("""
+        SELECT (SELECT COALESCE(MAX(id), 0) FROM dreams),
+               COALESCE(SUM(dream_count), 0),
+               COALESCE(SUM(crc32(day || emotion_tag) * dream_count), 0)
+        FROM dream_emotion_daily
+        """, error="recuperar la versión de los datos", dictionary=False)
+        return tuple(int(v) for v in rows[0]) if rows else None
+
+    def fetch_metrics_data(self) -> list:
+        rows = self._query(
+            "SELECT date_recorded, emotion_tag, content FROM dreams ORDER BY date_recorded ASC",
+            error="recuperar datos para métricas", default=[]
+        )
+        return [{'date': row['date_recorded'].isoformat(), 'emotion': row['emotion_tag'], 'content': row['content']} for row in rows]
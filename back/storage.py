@@ -0,0 +1,18 @@
+import os
+from back.paths import data_path
+
+
+def create_database_manager():
+    """Gestor de almacenamiento según DREAMS_DB_ENGINE: "mysql" (por defecto) o "sqlite".
+
+    Con "sqlite" los datos van a DREAMS_SQLITE_PATH (por defecto dreams.sqlite
+    en la carpeta de datos) y no hace falta servidor ni el conector de MySQL.
+    """
+    engine = os.environ.get("DREAMS_DB_ENGINE", "mysql").lower()
+    if engine == "sqlite":
+        from back.sqlite_database_manager import SQLiteDatabaseManager
+        return SQLiteDatabaseManager(os.environ.get("DREAMS_SQLITE_PATH") or data_path("dreams.sqlite"))
+    if engine == "mysql":
+        from back.database_manager import DatabaseManager
+        return DatabaseManager()
+    raise ValueError(f"Motor de base de datos desconocido: {engine}")
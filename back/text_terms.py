@@ -0,0 +1,42 @@
+import re
+from collections import Counter
+
+SPANISH_STOPWORDS = frozenset("""
+a al algo algun alguna algunas alguno algunos ante antes aquel aquella aquellas aquello aquellos aqui aquí asi así
+aun aún bajo bien cada casi como cómo con contra cual cuál cuales cuando cuándo cuanto de del desde donde dónde
+dos durante e el él ella ellas ello ellos en entre era eran eres es esa esas ese eso esos esta está estaba
+estaban estado estamos estan están estar estas este esto estos estoy fue fuera fueron fui ha había habia
+habían han has hasta hay haber he hemos hice hizo la las le les lo los mas más me mi mí mis mucho muchos muy
+nada ni no nos nosotros o os otra otras otro otros para pero poco por porque puede pues que qué quien quién
+quienes se sea ser si sí sido siempre sin sino sobre solo sólo son soy su sus tal también tambien tan tanto
+te tenía tenia tengo ti tiene tienen todo todos tu tú tus un una unas uno unos usted va vez y ya yo
+sueño sueños soñé soñaba
+""".split())
+
+_WORD_RE = re.compile(r"[^\W\d_]+")
+
+
+def tokenize(text: str, min_length: int = 3, max_length: int = 64) -> list:
+    return [
+        w for w in _WORD_RE.findall((text or "").lower())
+        if min_length <= len(w) <= max_length and w not in SPANISH_STOPWORDS
+    ]
+
+
+def term_counts(text: str) -> Counter:
+    return Counter(tokenize(text))
+
+
+def make_snippet(text: str, terms, width: int = 160) -> str:
+    """Fragmento de `text` centrado en la primera aparición de alguno de los términos."""
+    text = " ".join((text or "").split())
+    if len(text) <= width:
+        return text
+    lowered = text.lower()
+    positions = [p for p in (lowered.find(t.lower()) for t in terms) if p >= 0]
+    if not positions:
+        return text[:width].rstrip() + "…"
+    start = max(0, min(positions) - width // 3)
+    end = min(len(text), start + width)
+    start = max(0, end - width)
+    return ("…" if start > 0 else "") + text[start:end].strip() + ("…" if end < len(text) else "")
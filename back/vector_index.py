@@ -0,0 +1,96 @@
+import threading
+import numpy as np
+
+
+class VectorIndex:
+    """Índice en memoria para búsqueda semántica por similitud coseno.
+
+    Los vectores se guardan normalizados en una única matriz float32 contigua,
+    de modo que cada consulta es un solo producto matriz-vector seguido de un
+    top-k con argpartition.
+    """
+
+    def __init__(self, dim: int = None, initial_capacity: int = 1024):
+        self._lock = threading.Lock()
+        self.dim = dim
+        self._capacity = initial_capacity
+        self._size = 0
+        self._ids = np.empty(0, dtype=np.int64)
+        self._matrix = np.empty((0, dim or 0), dtype=np.float32)
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix
+
+    def _reserve(self, needed: int):
+        if self._matrix.shape[0] >= needed:
+            return
+        capacity = max(self._capacity, self._matrix.shape[0] * 2, needed)
+        matrix = np.empty((capacity, self.dim), dtype=np.float32)
+        ids = np.empty(capacity, dtype=np.int64)
+        if self._size:
+            matrix[:self._size] = self._matrix[:self._size]
+            ids[:self._size] = self._ids[:self._size]
+        self._matrix = matrix
+        self._ids = ids
+
+    def load(self, ids, vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2:
+            vectors = vectors.reshape(len(ids), -1)
+        with self._lock:
+            self.dim = vectors.shape[1] if vectors.size else self.dim
+            self._size = 0
+            self._matrix = np.empty((0, self.dim or 0), dtype=np.float32)
+            self._ids = np.empty(0, dtype=np.int64)
+            if not len(ids):
+                return
+            self._reserve(len(ids))
+            self._matrix[:len(ids)] = vectors
+            self._normalize(self._matrix[:len(ids)])
+            self._ids[:len(ids)] = np.asarray(ids, dtype=np.int64)
+            self._size = len(ids)
+
+    def add(self, dream_id: int, vector) -> bool:
+        vec = np.asarray(vector, dtype=np.float32).ravel()
+        if not vec.size:
+            return False
+        with self._lock:
+            if self.dim is None:
+                self.dim = vec.size
+            if vec.size != self.dim:
+                print(f"VectorIndex: dimensión {vec.size} no coincide con {self.dim}, se ignora el sueño {dream_id}.")
+                return False
+            self._reserve(self._size + 1)
+            row = self._matrix[self._size:self._size + 1]
+            row[0] = vec
+            self._normalize(row)
+            self._ids[self._size] = dream_id
+            self._size += 1
+            return True
+
+    def search(self, query, top_k: int = 5) -> list:
+        q = np.asarray(query, dtype=np.float32).ravel()
+        with self._lock:
+            n = self._size
+            if n == 0 or top_k <= 0 or q.size != self.dim:
+                return []
+            norm = np.linalg.norm(q)
+            if norm == 0:
+                return []
+            scores = self._matrix[:n] @ (q / norm)
+            ids = self._ids[:n]
+
+            k = min(top_k, n)
+            if k < n:
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(n)
+            top = top[np.argsort(-scores[top])]
+            return [(int(ids[i]), float(scores[i])) for i in top]
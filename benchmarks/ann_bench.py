@@ -0,0 +1,105 @@
+"""Recall y latencia del índice IVF (back/ann_index.py) frente a la búsqueda exacta.
+
+    python -m benchmarks.ann_bench --rows 1000000 --nprobe 4,8,16,32 --output ann.json
+    python -m benchmarks.ann_bench --embeddings vectors.npy
+
+Sin --embeddings se generan vectores agrupados en torno a centros aleatorios,
+más parecidos a embeddings reales que el ruido uniforme. Las consultas son
+vectores del corpus con algo de ruido.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from benchmarks.report import environment, percentiles, write_report
+
+
+def clustered_vectors(rng: np.random.Generator, n: int, dim: int, clusters: int = 1000, spread: float = 0.35) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    vectors = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, 100_000):
+        size = min(100_000, n - start)
+        block = centers[rng.integers(0, clusters, size)] + spread * rng.standard_normal((size, dim), dtype=np.float32)
+        vectors[start:start + size] = block
+    return vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--embeddings", default=None, help="Fichero .npy con embeddings reales")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nprobe", default="4,8,16,32", help="Valores de nprobe separados por comas")
+    parser.add_argument("--nlist", type=int, default=None, help="Por defecto, sqrt(filas)")
+    parser.add_argument("--index-dir", default=None, help="Carpeta del índice (por defecto, una temporal)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Escribir el informe JSON en este fichero")
+    args = parser.parse_args()
+
+    from back.ann_index import IVFIndex
+    from back.vector_index import VectorIndex
+
+    rng = np.random.default_rng(args.seed)
+    if args.embeddings:
+        vectors = np.load(args.embeddings, mmap_mode="r")[:args.rows]
+    else:
+        vectors = clustered_vectors(rng, args.rows, args.dim)
+    n, dim = vectors.shape
+    ids = np.arange(1, n + 1, dtype=np.int64)
+    picks = rng.integers(0, n, args.queries)
+    queries = np.asarray(vectors[picks], dtype=np.float32) + 0.05 * rng.standard_normal((args.queries, dim), dtype=np.float32)
+
+    exact = VectorIndex()
+    t0 = time.perf_counter()
+    exact.load(ids, vectors)
+    exact_load = time.perf_counter() - t0
+    exact_secs, truth = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        hits = exact.search(q, args.top_k)
+        exact_secs.append(time.perf_counter() - t0)
+        truth.append({i for i, _ in hits})
+    del exact
+
+    index_dir = args.index_dir or tempfile.mkdtemp(prefix="ivf_bench_")
+    try:
+        ivf = IVFIndex(index_dir)
+        t0 = time.perf_counter()
+        ivf.load(ids, vectors, nlist=args.nlist)
+        build = time.perf_counter() - t0
+
+        reopened = IVFIndex(index_dir)
+        t0 = time.perf_counter()
+        reopened.open()
+        open_secs = time.perf_counter() - t0
+
+        results = {
+            "exact": {"load_seconds": exact_load, "search": percentiles(exact_secs)},
+            "ivf": {"build_seconds": build, "open_seconds": open_secs, "nlist": len(ivf._centroids)},
+        }
+        for nprobe in (int(p) for p in args.nprobe.split(",")):
+            secs, recalls = [], []
+            for q, expected in zip(queries, truth):
+                t0 = time.perf_counter()
+                hits = reopened.search(q, args.top_k, nprobe=nprobe)
+                secs.append(time.perf_counter() - t0)
+                recalls.append(len({i for i, _ in hits} & expected) / max(len(expected), 1))
+            results["ivf"][f"nprobe_{nprobe}"] = {"recall_at_k": float(np.mean(recalls)), "search": percentiles(secs)}
+    finally:
+        if not args.index_dir:
+            shutil.rmtree(index_dir, ignore_errors=True)
+
+    report = {
+        "environment": environment(),
+        "parameters": dict(vars(args), rows=n, dim=dim, cpu_count=os.cpu_count()),
+        "results": results,
+    }
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Corpus sintético de sueños en español y embeddings para los benchmarks."""
+import random
+from datetime import datetime, timedelta
+import numpy as np
+
+EMOTIONS = ["Alegría", "Tristeza", "Miedo", "Ira", "Calma"]
+FORMATS = ["Poema", "Historia Corta", "Guion Corto"]
+
+_PLACES = [
+    "una casa antigua", "un bosque de niebla", "la estación de tren", "una playa de noche", "la escuela",
+    "un hospital vacío", "la casa de mi abuela", "un barco en medio del mar", "una ciudad sin nombre",
+    "un ascensor que no paraba", "el desierto", "una biblioteca infinita", "el patio de mi infancia"
+]
+_PEOPLE = [
+    "mi madre", "un desconocido", "mi hermano", "una amiga de la infancia", "un perro blanco",
+    "mi abuelo", "una mujer con sombrero", "un niño que no hablaba", "mis compañeros de trabajo"
+]
+_EVENTS = [
+    "me perseguía una sombra", "volaba sobre los tejados", "buscaba una llave perdida", "hablaba sin voz",
+    "el agua subía sin parar", "las puertas no se abrían", "se me caían los dientes", "llegaba tarde a un examen",
+    "encontraba una habitación secreta", "caía desde muy alto", "todos se reían de mí", "bailábamos bajo la lluvia"
+]
+_ENDINGS = [
+    "y desperté con calma.", "y sentí mucho miedo.", "y todo se volvió luz.", "y no podía moverme.",
+    "y me reía sin motivo.", "y lloraba sin saber por qué.", "y grité con todas mis fuerzas.", "y el reloj se detuvo."
+]
+
+
+def synthetic_dream(rng: random.Random, i: int):
+    """Devuelve (título, contenido, formato) de un sueño inventado."""
+    sentences = [
+        f"Estaba en {rng.choice(_PLACES)} con {rng.choice(_PEOPLE)}, {rng.choice(_EVENTS)} {rng.choice(_ENDINGS)}"
+        for _ in range(rng.randint(2, 6))
+    ]
+    return f"Sueño {i}: {rng.choice(_PLACES)}", " ".join(sentences), rng.choice(FORMATS)
+
+
+def random_embeddings(rng: np.random.Generator, n: int, dim: int = 384) -> np.ndarray:
+    vectors = rng.standard_normal((n, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def iter_dream_batches(n: int, batch_size: int = 1000, dim: int = 384, seed: int = 0, embeddings: np.ndarray = None, days: int = 730):
+    """Genera n sueños en lotes de dicts para DatabaseManager.save_dreams_bulk.
+
+    Las fechas se reparten en los últimos `days` días. Si se pasa una matriz
+    de embeddings precalculados se recorre de forma cíclica.
+    """
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    start = datetime.now() - timedelta(days=days)
+    for offset in range(0, n, batch_size):
+        size = min(batch_size, n - offset)
+        if embeddings is not None:
+            idx = np.arange(offset, offset + size) % len(embeddings)
+            vectors = embeddings[idx]
+        else:
+            vectors = random_embeddings(np_rng, size, dim)
+        batch = []
+        for j in range(size):
+            title, content, fmt = synthetic_dream(rng, offset + j)
+            batch.append({
+                'title': title,
+                'content': content,
+                'emotion': rng.choice(EMOTIONS),
+                'creative_format': fmt,
+                'embedding': vectors[j],
+                'date_recorded': start + timedelta(seconds=rng.randint(0, days * 86400)),
+            })
+        yield batch
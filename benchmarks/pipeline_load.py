@@ -0,0 +1,134 @@
+"""Prueba de carga del guardado completo (IA + embedding + BD) contra el servidor de IA local.
+
+    python -m benchmarks.pipeline_load --dreams 200 --concurrency 8 --latency 0.8 --jitter 0.3
+
+Usa una base de datos aparte (--database, por defecto dreams_bench) y su propia
+carpeta de datos, y desactiva la caché de respuestas para que cada sueño haga
+sus peticiones.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.corpus import synthetic_dream
+from benchmarks.report import environment, percentiles, write_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dreams", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--database", default="dreams_bench")
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--base-url", default=None, help="Usar un servidor ya arrancado en vez del integrado")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="Escribir el informe JSON en este fichero")
+    args = parser.parse_args()
+
+    from back.fake_llm_server import FakeLLMConfig, start_in_thread
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        config = FakeLLMConfig(args.latency, args.jitter, args.error_rate, args.rate_limit_rate, args.tokens_per_second, args.seed)
+        server = start_in_thread(config=config)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    # Se configura antes de crear IAService, que lee el entorno al arrancar
+    os.environ["DREAMS_LLM_PROVIDER"] = "local"
+    os.environ["DREAMS_LLM_BASE_URL"] = base_url
+    os.environ["DREAMS_LLM_CACHE"] = "0"
+    os.environ["MYSQL_DATABASE"] = args.database
+
+    # Clasificador, caché de embeddings y cola de enriquecimiento van a una carpeta propia de la
+    # prueba: las emociones aleatorias del servidor falso no deben entrenar el clasificador real
+    # ni dejar tareas con ids de sueños de esta BD en la cola de la aplicación.
+    # El modelo de embeddings sí se lee de la carpeta real para no descargarlo otra vez.
+    from back.embedding_codec import DEFAULT_EMBEDDING_MODEL
+    from back.paths import data_path
+    model_name = os.environ.get("DREAMS_EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+    os.environ.setdefault("DREAMS_MODEL_DIR", data_path("models", model_name.replace("/", "__")))
+    scratch = data_path("bench", args.database)
+    os.makedirs(scratch, exist_ok=True)
+    os.environ["DREAMS_DATA_DIR"] = scratch
+    if os.environ.get("DREAMS_DB_ENGINE", "mysql").lower() == "sqlite":
+        os.environ["DREAMS_SQLITE_PATH"] = data_path("dreams.sqlite")
+
+    from back.ia_services import IAService
+
+    ia = IAService()
+    if ia.db_manager is None:
+        sys.exit("No se pudo abrir la base de datos de pruebas.")
+    ia.ensure_emotion_classifier()
+    _ = ia.embedder
+    _ = ia.client
+
+    rng = random.Random(args.seed)
+    dreams = [synthetic_dream(rng, i) for i in range(args.dreams)]
+    totals, failures = [], 0
+    stages = {}
+    first_token = []
+    lock = threading.Lock()
+
+    def run(dream):
+        nonlocal failures
+        title, content, fmt = dream
+        t0 = time.perf_counter()
+        marks = {}
+        seen_token = []
+
+        def on_token(_):
+            if not seen_token:
+                seen_token.append(time.perf_counter() - t0)
+
+        def on_progress(stage):
+            marks[stage] = time.perf_counter() - t0
+
+        emotion, creative, analysis = ia.process_and_save_dream(
+            title, content, fmt, on_creative_token=on_token, on_progress=on_progress
+        )
+        elapsed = time.perf_counter() - t0
+        with lock:
+            totals.append(elapsed)
+            if seen_token:
+                first_token.append(seen_token[0])
+            for stage, secs in marks.items():
+                stages.setdefault(stage, []).append(secs)
+            if any("Error" in str(v) for v in (emotion, creative, analysis)):
+                failures += 1
+
+    t_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(run, dreams))
+    wall = time.perf_counter() - t_start
+
+    report = {
+        "environment": environment(),
+        "dreams": args.dreams,
+        "concurrency": args.concurrency,
+        "llm": {"base_url": base_url, "latency": args.latency, "jitter": args.jitter,
+                "error_rate": args.error_rate, "rate_limit_rate": args.rate_limit_rate},
+        "wall_seconds": wall,
+        "throughput_per_second": args.dreams / wall if wall else None,
+        "failures": failures,
+        "total": percentiles(totals),
+        "first_token": percentiles(first_token),
+        "stages": {stage: percentiles(samples) for stage, samples in stages.items()},
+    }
+    if server is not None:
+        report["llm"]["requests"] = server.config.requests
+        report["llm"]["simulated_errors"] = server.config.errors
+        server.shutdown()
+
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Utilidades comunes de los benchmarks: percentiles, entorno e informe JSON."""
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+
+def percentiles(samples: list) -> dict:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+    return {
+        "count": len(ordered),
+        "mean_ms": 1000 * sum(ordered) / len(ordered),
+        "p50_ms": 1000 * pick(0.50),
+        "p95_ms": 1000 * pick(0.95),
+        "p99_ms": 1000 * pick(0.99),
+        "max_ms": 1000 * ordered[-1],
+    }
+
+
+def environment() -> dict:
+    import numpy as np
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit or None,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def write_report(report: dict, output: str = None):
+    text = json.dumps(report, indent=2, ensure_ascii=False, default=str)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+
+def _flatten(value, prefix=""):
+    if isinstance(value, dict):
+        for key, sub in value.items():
+            yield from _flatten(sub, f"{prefix}{key}.")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix[:-1], float(value)
+
+
+def compare(report: dict, baseline: dict, tolerance: float = 0.2) -> list:
+    """Métricas que empeoran más de `tolerance` respecto al informe base.
+
+    Las claves *_ms, *seconds y *_bytes se consideran "menos es mejor" y
+    las *_per_second "más es mejor"; el resto se ignora.
+    """
+    current = dict(_flatten(report.get("results", {})))
+    regressions = []
+    for key, old in _flatten(baseline.get("results", {})):
+        new = current.get(key)
+        if new is None or old <= 0:
+            continue
+        if key.endswith(("_ms", "seconds", "_bytes")):
+            worse = new > old * (1 + tolerance)
+        elif key.endswith("_per_second"):
+            worse = new < old * (1 - tolerance)
+        else:
+            continue
+        if worse:
+            regressions.append({"metric": key, "baseline": old, "current": new, "change": new / old - 1})
+    return regressions
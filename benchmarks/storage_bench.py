@@ -0,0 +1,192 @@
+"""Benchmark de escalado del almacenamiento (MySQL o SQLite) y de la búsqueda semántica.
+
+    python -m benchmarks.storage_bench --sizes 1k,100k,1M --output storage.json
+    python -m benchmarks.storage_bench --sizes 1k --baseline storage.json
+
+Cada tamaño usa su propia base de datos (<--database>_<tamaño>; con
+--engine sqlite, un fichero en <DREAMS_DATA_DIR>/bench), que se
+rellena con sueños sintéticos y embeddings aleatorios (o los de --embeddings,
+un .npy). Con --reuse se conserva entre ejecuciones si ya tiene las filas.
+Nunca apunta a la base de datos de la aplicación.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import numpy as np
+from benchmarks.corpus import iter_dream_batches, random_embeddings, synthetic_dream
+from benchmarks.report import compare, environment, percentiles, write_report
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().lower()
+    factor = {"k": 1_000, "m": 1_000_000}.get(text[-1], 1)
+    return int(float(text[:-1] if factor > 1 else text) * factor)
+
+
+def drop_database(config: dict, name: str):
+    import mysql.connector
+    conn = mysql.connector.connect(**{k: v for k, v in config.items() if k != 'database'})
+    try:
+        conn.cursor().execute(f"DROP DATABASE IF EXISTS {name}")
+    finally:
+        conn.close()
+
+
+def open_database(name: str, reset: bool, engine: str):
+    os.environ["DREAMS_DB_ENGINE"] = engine
+    from back.storage import create_database_manager
+    if engine == "sqlite":
+        from back.paths import data_path
+        path = data_path("bench", f"{name}.sqlite")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if reset:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        os.environ["DREAMS_SQLITE_PATH"] = path
+        return create_database_manager()
+
+    os.environ["MYSQL_DATABASE"] = name
+    if reset:
+        config = {
+            'host': os.environ.get("MYSQL_HOST"),
+            'user': os.environ.get("MYSQL_USER"),
+            'password': os.environ.get("MYSQL_PASSWORD"),
+            'port': os.environ.get("MYSQL_PORT"),
+        }
+        drop_database(config, name)
+    return create_database_manager()
+
+
+def row_count(db) -> int:
+    version = db.fetch_dataset_version()
+    return version[1] if version else 0
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - t0, result
+
+
+def bench_size(n: int, args, embeddings) -> dict:
+    label = f"{n // 1_000_000}m" if n >= 1_000_000 and n % 1_000_000 == 0 else (f"{n // 1000}k" if n % 1000 == 0 else str(n))
+    name = f"{args.database}_{label}"
+    db = open_database(name, reset=not args.reuse, engine=args.engine)
+    result = {"database": name, "engine": args.engine}
+    # Se indica igual que hace IAService, para que las lecturas filtradas por modelo vean el corpus
+    from back.embedding_codec import embedding_model_version
+    model_version = embedding_model_version()
+
+    existing = row_count(db)
+    if existing < n:
+        print(f"[{label}] Insertando {n - existing} sueños sintéticos en {name}...", file=sys.stderr)
+        t0 = time.perf_counter()
+        inserted = 0
+        for batch in iter_dream_batches(n - existing, batch_size=args.batch_size, dim=args.dim, seed=args.seed + existing, embeddings=embeddings):
+            for d in batch:
+                d['embedding_model_version'] = model_version
+            inserted += db.save_dreams_bulk(batch)
+        elapsed = time.perf_counter() - t0
+        result["bulk_insert"] = {"rows": inserted, "seconds": elapsed, "rows_per_second": inserted / elapsed if elapsed else None}
+    result["rows"] = row_count(db)
+
+    rng = random.Random(args.seed)
+    np_rng = np.random.default_rng(args.seed)
+
+    repeats = 1 if n >= args.heavy_threshold else args.repeats
+    samples = []
+    for _ in range(repeats):
+        secs, rows = timed(db.fetch_all_dreams)
+        samples.append(secs)
+    result["fetch_all_dreams"] = dict(percentiles(samples), rows=len(rows))
+    del rows
+
+    secs_page = [timed(db.fetch_dreams_page, limit=100)[0] for _ in range(args.queries)]
+    result["fetch_dreams_page"] = percentiles(secs_page)
+
+    secs, (ids, matrix) = timed(db.fetch_all_embeddings, model_version=model_version)
+    result["fetch_all_embeddings"] = {"seconds": secs, "rows": len(ids), "matrix_bytes": int(matrix.nbytes)}
+
+    sample_ids = [rng.choice(ids) for _ in range(args.queries)] if ids else []
+    result["fetch_dream_by_id"] = percentiles([timed(db.fetch_dream_by_id, i)[0] for i in sample_ids])
+
+    tracemalloc.start()
+    secs, metrics = timed(db.fetch_metrics_data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result["fetch_metrics_data"] = {"seconds": secs, "rows": len(metrics), "peak_bytes": peak}
+    del metrics
+
+    from back.vector_index import VectorIndex
+    index = VectorIndex()
+    secs, _ = timed(index.load, ids, matrix)
+    del matrix
+    result["vector_index_load"] = {"seconds": secs, "size": len(index)}
+    queries = random_embeddings(np_rng, args.queries, index.dim or args.dim) if len(index) else []
+    search_secs, hydrate_secs = [], []
+    for q in queries:
+        secs, hits = timed(index.search, q, args.top_k)
+        search_secs.append(secs)
+        hydrate_secs.append(timed(db.fetch_dreams_by_ids, [i for i, _ in hits])[0])
+    result["semantic_search"] = percentiles(search_secs)
+    result["semantic_search_hydrate"] = percentiles(hydrate_secs)
+
+    # Al final, para no cambiar el tamaño del corpus durante las lecturas
+    single = []
+    for i in range(args.saves):
+        title, content, fmt = synthetic_dream(rng, n + i)
+        vector = random_embeddings(np_rng, 1, args.dim)[0]
+        secs, _ = timed(db.save_dream, title, content, rng.choice(["Alegría", "Calma", "Miedo"]), vector, creative_format=fmt,
+                         embedding_model_version=model_version)
+        single.append(secs)
+    total = sum(single)
+    result["save_dream"] = dict(percentiles(single), saves_per_second=len(single) / total if total else None)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1k,100k,1M", help="Tamaños separados por comas (sufijos k y M)")
+    parser.add_argument("--engine", choices=["mysql", "sqlite"], default=os.environ.get("DREAMS_DB_ENGINE", "mysql"))
+    parser.add_argument("--database", default="dreams_bench", help="Prefijo de las bases de datos de prueba")
+    parser.add_argument("--reuse", action="store_true", help="No borrar las bases de datos que ya tengan las filas")
+    parser.add_argument("--embeddings", default=None, help="Fichero .npy con embeddings precalculados")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200, help="Consultas por medición de latencia")
+    parser.add_argument("--saves", type=int, default=200, help="Llamadas a save_dream para medir el rendimiento")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--heavy-threshold", type=int, default=500_000, help="A partir de aquí las lecturas completas se miden una vez")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Escribir el informe JSON en este fichero")
+    parser.add_argument("--baseline", default=None, help="Informe anterior con el que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Empeoramiento relativo admitido frente a --baseline")
+    args = parser.parse_args()
+
+    embeddings = None
+    if args.embeddings:
+        embeddings = np.load(args.embeddings, mmap_mode="r")
+        args.dim = embeddings.shape[1]
+
+    report = {"environment": environment(), "parameters": vars(args), "results": {}}
+    for size in args.sizes.split(","):
+        n = parse_size(size)
+        report["results"][size.strip()] = bench_size(n, args, embeddings)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["regressions"] = compare(report, json.load(f), args.tolerance)
+        exit_code = 1 if report["regressions"] else 0
+    write_report(report, args.output)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
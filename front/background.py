@@ -0,0 +1,68 @@
+import random
+from collections import OrderedDict
+import numpy as np
+from PIL import Image, ImageFilter
+
+SIZE_BUCKET = 64
+
+
+def size_bucket(width: int, height: int):
+    # Se redondea hacia arriba: la imagen puede sobrar por la derecha/abajo, nunca faltar
+    return (-(-width // SIZE_BUCKET) * SIZE_BUCKET, -(-height // SIZE_BUCKET) * SIZE_BUCKET)
+
+
+def render_background(width: int, height: int, top, mid, bottom, blob_color, blobs: int = 12, seed: int = 0) -> Image.Image:
+    top, mid, bottom = (np.asarray(c, dtype=np.float32) for c in (top, mid, bottom))
+
+    # Degradado vertical en una sola operación: top -> mid hasta el 60 %, mid -> bottom después
+    t = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None]
+    upper = top + (mid - top) * (t / 0.6)
+    lower = mid + (bottom - mid) * ((t - 0.6) / 0.4)
+    rows = np.where(t < 0.6, upper, lower).astype(np.uint8).astype(np.float32)
+    img = np.broadcast_to(rows[:, None, :], (height, width, 3)).copy()
+
+    # Manchas: se cuenta cuántas elipses cubren cada píxel y se mezcla una sola vez,
+    # equivalente a componer una capa RGBA por elipse
+    rng = random.Random(seed)
+    coverage = np.zeros((height, width), dtype=np.uint8)
+    for _ in range(blobs):
+        ellipse_w = rng.randint(int(width*0.2), int(width*0.6))
+        ellipse_h = rng.randint(int(height*0.08), int(height*0.25))
+        x = rng.randint(-int(width*0.2), int(width*0.8))
+        y = rng.randint(-int(height*0.1), int(height*0.9))
+        x0, x1 = max(x, 0), min(x + ellipse_w, width)
+        y0, y1 = max(y, 0), min(y + ellipse_h, height)
+        if x0 >= x1 or y0 >= y1:
+            continue
+        cx, cy = x + ellipse_w / 2.0, y + ellipse_h / 2.0
+        xs = ((np.arange(x0, x1, dtype=np.float32) + 0.5 - cx) / (ellipse_w / 2.0)) ** 2
+        ys = ((np.arange(y0, y1, dtype=np.float32) + 0.5 - cy) / (ellipse_h / 2.0)) ** 2
+        coverage[y0:y1, x0:x1] += (ys[:, None] + xs[None, :]) <= 1.0
+
+    alpha = 18 / 255.0
+    keep = (1.0 - alpha) ** coverage.astype(np.float32)
+    img = img * keep[..., None] + np.asarray(blob_color, dtype=np.float32) * (1.0 - keep[..., None])
+    out = Image.fromarray(img.astype(np.uint8), "RGB")
+
+    # El desenfoque se aplica a un cuarto de resolución: el resultado es igual de suave y mucho más barato
+    small = out.resize((max(width // 4, 1), max(height // 4, 1)), Image.BILINEAR)
+    small = small.filter(ImageFilter.GaussianBlur(radius=2))
+    return small.resize((width, height), Image.BILINEAR)
+
+
+class BackgroundCache:
+    def __init__(self, max_items: int = 6):
+        self.max_items = max_items
+        self._items = OrderedDict()
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+        return item
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
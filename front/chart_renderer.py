@@ -0,0 +1,136 @@
+import io
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# Se usa la API orientada a objetos (Figure + Agg) y no pyplot, para poder
+# dibujar fuera del hilo principal de Tk.
+
+PANEL_BG = "#0F1225"
+
+EMOTION_COLORS = {
+    "Alegría": '#4D4D80',
+    "Calma": '#3C3F68',
+    "Tristeza": '#606271',
+    "Miedo": '#B2B2B2',
+    "Ira": '#C93C3C',
+    "Indefinida": '#333333'
+}
+
+
+def _figure_to_png(fig) -> bytes:
+    FigureCanvasAgg(fig)
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", facecolor=fig.get_facecolor())
+    return buf.getvalue()
+
+
+def render_emotion_pie(emotion_counts) -> bytes:
+    colors = ['#4D4D80', '#282C4D', '#3C3F68', '#606271', '#7A7D94']
+
+    fig = Figure(figsize=(6, 4), dpi=100)
+    ax = fig.add_subplot(111)
+
+    labels = [k for k, v in emotion_counts.items() if v > 0]
+    sizes = [v for v in emotion_counts.values() if v > 0]
+
+    if not sizes:
+        ax.text(0.5, 0.5, 'No hay datos de sueños para graficar.', ha='center', va='center', color='gray')
+    else:
+        ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors[:len(labels)], textprops={'color': 'white'})
+        ax.axis('equal')
+
+    ax.set_title("Distribución de Emociones", color='white')
+    fig.patch.set_facecolor(PANEL_BG)
+    ax.set_facecolor(PANEL_BG)
+    return _figure_to_png(fig)
+
+
+def render_emotion_evolution(evolution_data) -> bytes:
+    import pandas as pd
+    import matplotlib.dates as mdates
+
+    df = pd.DataFrame(evolution_data, columns=['date', 'emotion', 'count'])
+    df['date'] = pd.to_datetime(df['date'])
+
+    df_pivot = df.pivot_table(index='date', columns='emotion', values='count', aggfunc='sum').fillna(0)
+
+    fig = Figure(figsize=(12, 5), dpi=100)
+    ax = fig.add_subplot(111)
+
+    fig.patch.set_facecolor(PANEL_BG)
+    ax.set_facecolor(PANEL_BG)
+    ax.tick_params(axis='x', colors='white')
+    ax.tick_params(axis='y', colors='white')
+    ax.xaxis.label.set_color('white')
+    ax.yaxis.label.set_color('white')
+    ax.spines['bottom'].set_color('white')
+    ax.spines['left'].set_color('white')
+
+    ax.set_title("Evolución de Frecuencia Emocional", color='white')
+    ax.set_xlabel("Fecha", color='white')
+    ax.set_ylabel("Frecuencia Diaria", color='white')
+
+    if df_pivot.empty:
+        ax.text(0.5, 0.5, 'No hay datos suficientes para la evolución temporal.', ha='center', va='center', color='gray')
+    else:
+        for emotion in df_pivot.columns:
+            ax.plot(df_pivot.index, df_pivot[emotion], label=emotion,
+                    color=EMOTION_COLORS.get(emotion, '#FFFFFF'), linewidth=2)
+
+        ax.legend(loc='upper left', frameon=False, labelcolor='white')
+
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
+        fig.autofmt_xdate(rotation=45)
+    return _figure_to_png(fig)
+
+
+def render_wordcloud(frequencies) -> bytes:
+    if not frequencies:
+        return None
+    from wordcloud import WordCloud
+
+    wc = WordCloud(width=800,
+                   height=400,
+                   background_color=PANEL_BG,
+                   colormap='plasma',
+                   min_font_size=10,
+                   normalize_plurals=False).generate_from_frequencies(frequencies)
+    buf = io.BytesIO()
+    wc.to_image().save(buf, format="PNG")
+    return buf.getvalue()
+
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def render_wordcloud_async(frequencies):
+    """Lanza la nube de palabras en un proceso aparte; devuelve un Future con el PNG."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # "spawn" evita heredar por fork el intérprete con Tk y sus hilos
+            _process_pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+    return _process_pool.submit(render_wordcloud, frequencies)
+
+
+class ChartCache:
+    """PNG de los gráficos indexados por versión del conjunto de datos."""
+
+    def __init__(self, max_versions: int = 2):
+        self.max_versions = max_versions
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def get(self, version):
+        with self._lock:
+            return self._items.get(version)
+
+    def put(self, version, images: dict):
+        with self._lock:
+            self._items[version] = images
+            while len(self._items) > self.max_versions:
+                self._items.pop(next(iter(self._items)))
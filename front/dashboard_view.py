@@ -1,15 +1,16 @@
 import tkinter as tk
 import threading
+import queue
 from tkinter import ttk, messagebox
-from PIL import Image, ImageDraw, ImageFilter, ImageTk
+from PIL import Image, ImageTk
 import random, math, time
 import re
 import json
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
 import io
+from back.save_jobs import DreamJobQueue
+from front.starfield import StarField
+from front.background import BackgroundCache, render_background, size_bucket
+from front.chart_renderer import ChartCache, render_emotion_pie, render_emotion_evolution, render_wordcloud, render_wordcloud_async
 
 PALETA = {
     "espejismo": "#1C1F3B",
@@ -35,40 +36,10 @@ def lerp_color(a_hex, b_hex, t: float):
     b_ = int(a[2] + (b[2] - a[2]) * t)
     return rgb_to_hex((r, g, b_))
 
-class Star:
-    def __init__(self, canvas, x, y, size, vx, vy, twinkle_speed):
-        self.canvas = canvas
-        self.x = x
-        self.y = y
-        self.size = size
-        self.vx = vx
-        self.vy = vy
-        self.twinkle_speed = twinkle_speed
-        self.phase = random.random()*2*math.pi
-        self.item = canvas.create_oval(x, y, x+size, y+size, fill="#ffffff", outline="")
-        canvas.tag_raise(self.item)
-
-    def update(self, w, h):
-        self.x += self.vx
-        self.y += self.vy
-        self.phase += self.twinkle_speed
-        if self.x < -10: self.x = w + 5
-        if self.x > w + 10: self.x = -5
-        if self.y < -10: self.y = h + 5
-        if self.y > h + 10: self.y = -5
-
-        brightness = 0.6 + 0.4 * (0.5 + 0.5 * math.sin(self.phase))
-        v = int(255 * brightness)
-        color = f"#{v:02x}{v:02x}{v:02x}"
-        self.canvas.coords(self.item, self.x, self.y, self.x + self.size, self.y + self.size)
-        try:
-            self.canvas.itemconfigure(self.item, fill=color)
-            self.canvas.tag_raise(self.item)
-        except tk.TclError:
-            pass
-
-
 class DashboardView(tk.Frame):
+    LIST_PAGE_SIZE = 100
+    LIST_MAX_ROWS = 500
+
     def __init__(self, parent):
         super().__init__(parent)
         self.parent = parent
@@ -79,11 +50,35 @@ class DashboardView(tk.Frame):
         self.ia_error = None
         self._ia_ready = False
 
+        # Estado de la lista paginada del historial
+        self._list_generation = 0
+        self._list_keys = {}
+        self._list_loading = False
+        self._list_at_start = True
+        self._list_exhausted = True
+        # Cada búsqueda lanzada; las respuestas de búsquedas antiguas se descartan
+        self._search_generation = 0
+
+        # Sueños en proceso: los hilos de DreamJobQueue publican eventos en _ui_queue
+        self.job_queue = None
+        self._ui_queue = queue.Queue()
+        self._ui_polling_after = None
+        self._jobs_state = {}
+        self._stream_job_id = None
+
+        self._chart_cache = ChartCache()
+        self._chart_photos = []
+
         self.bg_canvas = tk.Canvas(self, highlightthickness=0)
         self.bg_canvas.place(relx=0, rely=0, relwidth=1, relheight=1)
         self.bg_image = None
+        self._bg_cache = BackgroundCache()
+        self._bg_seed = random.randrange(1 << 30)
+        self._resize_after = None
+        self._pending_size = (1200, 800)
         self._make_background_image(width=1200, height=800)
-        self.stars = []
+        self.stars = None
+        self._last_frame = None
         self._create_stars(45)
 
         self.panel = tk.Frame(self, bg=PALETA["panel"], bd=0)
@@ -101,7 +96,7 @@ class DashboardView(tk.Frame):
 
         self.loading_frame = tk.Frame(self.panel, bg=PALETA["panel"])
         self.loading_frame.pack(fill="both", expand=True, padx=40, pady=40)
-        self.loading_label = tk.Label(self.loading_frame, text="Cargando el motor de I.A. — esto puede tardar unos segundos...",
+        self.loading_label = tk.Label(self.loading_frame, text="Conectando con la base de datos...",
                                       bg=PALETA["panel"], fg=PALETA["gris_medio"], font=('Times New Roman', 12))
         self.loading_label.pack(pady=10)
         self.loading_dots = tk.Label(self.loading_frame, text="", bg=PALETA["panel"], fg=PALETA["gris_medio"], font=('Times New Roman', 18))
@@ -132,6 +127,8 @@ class DashboardView(tk.Frame):
             ia = IAService()  
             self.ia_service = ia
             self.ia_error = None
+            # Las pestañas de la BD quedan usables ya; el modelo de embeddings carga detrás
+            ia.preload_async()
         except Exception as e:
             self.ia_service = None
             self.ia_error = e
@@ -160,6 +157,8 @@ class DashboardView(tk.Frame):
             return
 
         try:
+            self.job_queue = DreamJobQueue(self.ia_service)
+
             self.notebook = ttk.Notebook(self.panel)
             self.notebook.pack(padx=16, pady=8, fill="both", expand=True)
 
@@ -199,117 +198,178 @@ class DashboardView(tk.Frame):
         threading.Thread(target=self._init_ia_service_background, daemon=True).start()
 
     def _load_dreams_list_safe(self):
+        # Vuelve a la primera página del historial
         try:
             rows = []
             if self.ia_service and getattr(self.ia_service, "db_manager", None):
                 try:
-                    rows = self.ia_service.db_manager.fetch_all_dreams()
+                    rows = self.ia_service.db_manager.fetch_dreams_page(limit=self.LIST_PAGE_SIZE)
                 except Exception:
                     rows = []
-            else:
-                rows = []
             def update_tree():
-                try:
-                    if not hasattr(self, "tree"):
-                        cols = ("id", "title", "date", "emotion", "format")
-                        self.tree = ttk.Treeview(self.tab_consulta, columns=cols, show="headings", height=8)
-                        for c in cols:
-                            self.tree.heading(c, text=c.capitalize())
-                            self.tree.column(c, width=140)
-                        self.tree.pack(fill="both", expand=False, padx=8, pady=8)
-                        self.tree.bind("<Double-1>", self._on_row_double)
-                    for r in self.tree.get_children():
-                        self.tree.delete(r)
-                    for d in rows:
-                        self.tree.insert("", "end", values=(d['id'], d['title'], d['date_recorded'], d['emotion_tag'], d.get('creative_format','')))
-                except Exception:
-                    pass
+                self._list_generation += 1
+                self._apply_dreams_page(self._list_generation, "reset", rows)
             self.after(10, update_tree)
         except Exception:
             pass
 
-    def _make_background_image(self, width=1200, height=800):
-        img = Image.new('RGB', (width, height), color=PALETA["martinica"])
-        draw = ImageDraw.Draw(img)
-
-        top = hex_to_rgb(PALETA["martinica"])
-        mid = hex_to_rgb(PALETA["fjord"])
-        bottom = hex_to_rgb(PALETA["bahi_aeste"])
-
-        for y in range(height):
-            t = y / float(height - 1)
-            if t < 0.6:
-                t2 = t / 0.6
-                color = (
-                    int(top[0] + (mid[0] - top[0]) * t2),
-                    int(top[1] + (mid[1] - top[1]) * t2),
-                    int(top[2] + (mid[2] - top[2]) * t2)
-                )
+    def _load_dreams_page_async(self, direction):
+        if self._list_loading or not self.ia_service or not getattr(self.ia_service, "db_manager", None):
+            return
+        self._list_loading = True
+        generation = self._list_generation
+        keys = [self._list_keys[i] for i in self.tree.get_children() if i in self._list_keys]
+        if not keys:
+            self._list_loading = False
+            return
+        after = keys[-1] if direction == "next" else None
+        before = keys[0] if direction == "prev" else None
+
+        def worker():
+            try:
+                rows = self.ia_service.db_manager.fetch_dreams_page(after=after, before=before, limit=self.LIST_PAGE_SIZE)
+            except Exception:
+                rows = []
+            self.after(0, lambda: self._apply_dreams_page(generation, direction, rows))
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _apply_dreams_page(self, generation, direction, rows):
+        # Solo se mantienen LIST_MAX_ROWS filas en el Treeview; el resto se pide al hacer scroll
+        if generation != self._list_generation:
+            return
+        self._list_loading = False
+        try:
+            tree = self.tree
+            children = tree.get_children()
+            anchor = None
+            if children and direction != "reset":
+                anchor = children[min(int(tree.yview()[0] * len(children)), len(children) - 1)]
+
+            def insert(d, index):
+                iid = f"d{d['id']}"
+                if tree.exists(iid):
+                    return
+                tree.insert("", index, iid=iid, values=(d['id'], d['title'], d['date_recorded'], d['emotion_tag'], d.get('creative_format','')))
+                self._list_keys[iid] = (d['date_recorded'], d['id'])
+
+            if direction == "reset":
+                tree.delete(*children)
+                self._list_keys = {}
+                for d in rows:
+                    insert(d, "end")
+                self._list_at_start = True
+                self._list_exhausted = len(rows) < self.LIST_PAGE_SIZE
+            elif direction == "next":
+                for d in rows:
+                    insert(d, "end")
+                self._list_exhausted = len(rows) < self.LIST_PAGE_SIZE
+                excess = list(tree.get_children())[:max(0, len(tree.get_children()) - self.LIST_MAX_ROWS)]
+                if excess:
+                    tree.delete(*excess)
+                    self._list_at_start = False
             else:
-                t2 = (t - 0.6) / 0.4
-                color = (
-                    int(mid[0] + (bottom[0] - mid[0]) * t2),
-                    int(mid[1] + (bottom[1] - mid[1]) * t2),
-                    int(mid[2] + (bottom[2] - mid[2]) * t2)
-                )
-            draw.line([(0, y), (width, y)], fill=color)
-
-        for i in range(12):
-            ellipse_w = random.randint(int(width*0.2), int(width*0.6))
-            ellipse_h = random.randint(int(height*0.08), int(height*0.25))
-            x = random.randint(-int(width*0.2), int(width*0.8))
-            y = random.randint(-int(height*0.1), int(height*0.9))
-            overlay = Image.new('RGBA', (width, height), (0,0,0,0))
-            odraw = ImageDraw.Draw(overlay)
-            col = hex_to_rgb(PALETA["espejismo"])
-            odraw.ellipse([x, y, x+ellipse_w, y+ellipse_h], fill=(col[0], col[1], col[2], 18))
-            img = Image.alpha_composite(img.convert('RGBA'), overlay)
-
-        img = img.filter(ImageFilter.GaussianBlur(radius=8))
-        self.bg_pil = img.convert('RGB')
-        self.bg_image = ImageTk.PhotoImage(self.bg_pil)
+                for d in reversed(rows):
+                    insert(d, 0)
+                self._list_at_start = len(rows) < self.LIST_PAGE_SIZE
+                excess = list(tree.get_children())[self.LIST_MAX_ROWS:]
+                if excess:
+                    tree.delete(*excess)
+                    self._list_exhausted = False
+
+            for iid in list(self._list_keys):
+                if not tree.exists(iid):
+                    del self._list_keys[iid]
+            if anchor and tree.exists(anchor):
+                tree.yview_moveto(tree.index(anchor) / max(len(tree.get_children()), 1))
+        except Exception:
+            pass
+
+    def _on_tree_scroll(self, first, last):
+        self.tree_scrollbar.set(first, last)
+        if float(last) > 0.9 and not self._list_exhausted:
+            self._load_dreams_page_async("next")
+        elif float(first) < 0.1 and not self._list_at_start:
+            self._load_dreams_page_async("prev")
+
+    def _make_background_image(self, width=1200, height=800):
+        bucket = size_bucket(width, height)
+        cached = self._bg_cache.get(bucket)
+        if cached is None:
+            bg_pil = render_background(
+                bucket[0], bucket[1],
+                top=hex_to_rgb(PALETA["martinica"]),
+                mid=hex_to_rgb(PALETA["fjord"]),
+                bottom=hex_to_rgb(PALETA["bahi_aeste"]),
+                blob_color=hex_to_rgb(PALETA["espejismo"]),
+                seed=self._bg_seed
+            )
+            cached = (bg_pil, ImageTk.PhotoImage(bg_pil))
+            self._bg_cache.put(bucket, cached)
+        if self.bg_image is cached[1]:
+            return
+        self.bg_pil, self.bg_image = cached
         self.bg_canvas.delete("bg_img")
         self.bg_canvas.create_image(0, 0, image=self.bg_image, anchor='nw', tags="bg_img")
         self.bg_canvas.lower("bg_img")
-        self.bg_canvas.update()
-        
+
     def _create_stars(self, n=30):
-        self.bg_canvas.delete("star")
-        self.stars = []
+        if self.stars is not None:
+            self.stars.destroy()
         w = self.winfo_width() or 1200
         h = self.winfo_height() or 800
-        for _ in range(n):
-            x = random.uniform(0, w)
-            y = random.uniform(0, h)
-            size = random.uniform(1.2, 3.8)
-            vx = random.uniform(-0.15, 0.15)
-            vy = random.uniform(-0.3, -0.05)
-            tw = random.uniform(0.05, 0.2)
-            s = Star(self.bg_canvas, x, y, size, vx, vy, tw)
-            self.bg_canvas.addtag_withtag("star", s.item)
-            self.stars.append(s)
-        self.bg_canvas.tag_raise("star")
+        self.stars = StarField(self.bg_canvas, n, w, h)
 
     def _on_resize(self, event):
-        w = max(600, event.width)
-        h = max(400, event.height)
+        # Durante un arrastre llegan decenas de <Configure>: solo se dibuja el tamaño final
+        self._pending_size = (max(600, event.width), max(400, event.height))
+        if self._resize_after:
+            self.after_cancel(self._resize_after)
+        self._resize_after = self.after(120, self._apply_resize)
+
+    def _apply_resize(self):
+        self._resize_after = None
+        w, h = self._pending_size
         self._make_background_image(width=w, height=h)
-        if len(self.stars) < 5:
+        if self.stars is None or len(self.stars) < 5:
             self._create_stars(45)
 
+    def _animation_delay(self):
+        # None: ventana oculta o minimizada, no se anima. Sin foco basta con ~10 fps.
+        try:
+            top = self.winfo_toplevel()
+            if top.state() in ("iconic", "withdrawn") or not self.winfo_viewable():
+                return None
+            if top.focus_displayof() is None:
+                return 100
+        except (tk.TclError, KeyError):
+            return None
+        return 33
+
     def _animate(self):
+        delay = self._animation_delay()
+        if delay is None:
+            self._last_frame = None
+            self.after(500, self._animate)
+            return
+
+        now = time.perf_counter()
+        dt = 1.0 if self._last_frame is None else min((now - self._last_frame) / 0.033, 5.0)
+        self._last_frame = now
+
         w = self.winfo_width() or 1200
         h = self.winfo_height() or 800
-        for s in self.stars:
-            s.update(w, h)
-        if random.random() < 0.012:
+        try:
+            self.stars.step(w, h, dt)
+        except tk.TclError:
+            pass
+        if random.random() < 0.012 * dt:
             x0 = random.uniform(0, w)
             y0 = random.uniform(0, h)
             size = random.uniform(2.5, 6.0)
             item = self.bg_canvas.create_oval(x0, y0, x0+size, y0+size, fill="#ffffff", outline="")
             self.bg_canvas.lift(item)
             self.bg_canvas.after(380, lambda it=item: self.bg_canvas.delete(it))
-        self.after(33, self._animate)
+        self.after(delay, self._animate)
 
     def _setup_registro_tab(self, tab):
         tab.configure(bg=PALETA["panel"])
@@ -346,6 +406,16 @@ class DashboardView(tk.Frame):
         frame.grid_columnconfigure(1, weight=1)
         frame.grid_rowconfigure(1, weight=1)
 
+        jobs_box = tk.Frame(tab, bg=PALETA["panel"])
+        jobs_box.pack(fill="x", padx=12, pady=(0,6))
+        tk.Label(jobs_box, text="Cola de procesamiento", bg=PALETA["panel"], fg=PALETA["gris_medio"]).pack(anchor="w")
+        job_cols = ("job", "title", "status", "progress")
+        self.jobs_tree = ttk.Treeview(jobs_box, columns=job_cols, show="headings", height=3)
+        for c, text, width in zip(job_cols, ("#", "Título", "Estado", "Progreso"), (40, 220, 100, 380)):
+            self.jobs_tree.heading(c, text=text)
+            self.jobs_tree.column(c, width=width)
+        self.jobs_tree.pack(fill="x", pady=(6,0))
+
         result_box = tk.Frame(tab, bg=PALETA["panel"])
         result_box.pack(fill="x", padx=12, pady=(6,12))
         tk.Label(result_box, text="Resultado Creativo", bg=PALETA["panel"], fg=PALETA["gris_medio"]).pack(anchor="w")
@@ -370,27 +440,89 @@ class DashboardView(tk.Frame):
             messagebox.showwarning("IA no lista", "El motor de IA aún no está listo. Intenta de nuevo en unos segundos o presiona 'Reintentar' en la pestaña de consulta.")
             return
 
-        try:
-            emocion, creativo, analisis = self.ia_service.process_and_save_dream(titulo, contenido, formato)
-        except Exception as e:
-            messagebox.showerror("Error", f"Ocurrió un error al procesar el sueño: {e}")
+        job_id = self.job_queue.submit(titulo, contenido, formato,
+                                       lambda job, event, payload: self._ui_queue.put((job, event, payload)))
+        if job_id is None:
+            messagebox.showwarning("Cola llena", "Hay demasiados sueños en cola. Espera a que terminen algunos.")
             return
 
-        self.text_creativo.delete("1.0", tk.END)
-        self.text_creativo.insert(tk.END, creativo if creativo else "(No generado)")
-
-        self.text_analysis.delete("1.0", tk.END)
-        self.text_analysis.insert(tk.END, self._extract_interpretation_and_advice(analisis))
-
+        # Los resultados en vivo siguen al último sueño enviado; el formulario queda libre para el siguiente
+        self._jobs_state[job_id] = {"title": titulo, "format": formato, "stages": []}
+        self._stream_job_id = job_id
+        self.jobs_tree.insert("", 0, iid=str(job_id), values=(job_id, titulo, "En cola", ""))
+        self.entry_titulo.delete(0, tk.END)
+        self.text_contenido.delete("1.0", tk.END)
+        self._drain_ui_queue()
+
+    def _drain_ui_queue(self):
+        # Procesa los eventos que los hilos de trabajo dejan en la cola; solo este hilo toca los widgets
+        if self._ui_polling_after:
+            self.after_cancel(self._ui_polling_after)
+            self._ui_polling_after = None
         try:
-            self._update_creative_label(formato)
-        except Exception:
+            while True:
+                job_id, event, payload = self._ui_queue.get_nowait()
+                state = self._jobs_state.get(job_id)
+                if state is None:
+                    continue
+                following = job_id == self._stream_job_id
+                if event == "started":
+                    self._set_job_row(job_id, "Procesando")
+                    if following:
+                        self.text_creativo.delete("1.0", tk.END)
+                        self.text_analysis.delete("1.0", tk.END)
+                        self.text_analysis.insert(tk.END, "(Generando análisis…)")
+                elif event == "progress":
+                    state["stages"].append(payload)
+                    self._set_job_row(job_id, "Procesando")
+                elif event == "token" and following:
+                    # Solo llega el texto creativo; el análisis es JSON y se muestra formateado al terminar
+                    _, text = payload
+                    self.text_creativo.insert(tk.END, text)
+                    self.text_creativo.see(tk.END)
+                elif event == "done":
+                    del self._jobs_state[job_id]
+                    self._on_dream_saved(job_id, state, payload, following)
+                elif event == "error":
+                    del self._jobs_state[job_id]
+                    self._set_job_row(job_id, "Error")
+                    messagebox.showerror("Error", f"Ocurrió un error al procesar el sueño '{state['title']}': {payload}")
+        except queue.Empty:
+            pass
+        if self._jobs_state:
+            self._ui_polling_after = self.after(50, self._drain_ui_queue)
+
+    def _set_job_row(self, job_id, status, stages=None):
+        labels = {"embedding": "embedding", "emotion": "emoción", "creative": "creativo",
+                  "analysis": "análisis", "persisted": "guardado"}
+        if stages is None:
+            stages = self._jobs_state.get(job_id, {}).get("stages", [])
+        progress = "  ".join(f"✓ {labels[s]}" for s in DreamJobQueue.STAGES if s in stages)
+        try:
+            self.jobs_tree.item(str(job_id), values=(job_id, self.jobs_tree.set(str(job_id), "title"), status, progress))
+        except tk.TclError:
             pass
 
+    def _on_dream_saved(self, job_id, state, result, following):
+        emocion, creativo, analisis = result
+
+        if following:
+            self.text_creativo.delete("1.0", tk.END)
+            self.text_creativo.insert(tk.END, creativo if creativo else "(No generado)")
+
+            self.text_analysis.delete("1.0", tk.END)
+            self.text_analysis.insert(tk.END, self._extract_interpretation_and_advice(analisis))
+
+            try:
+                self._update_creative_label(state["format"])
+            except Exception:
+                pass
+
         if isinstance(emocion, str) and ("Error" in emocion or "Error" in creativo or "Error" in analisis):
-            messagebox.showerror("Error de Servidor", "Ocurrió un error al procesar o guardar el sueño. Revisa la terminal y tu conexión a MySQL/OpenAI.")
+            self._set_job_row(job_id, "Error", state["stages"])
+            messagebox.showerror("Error de Servidor", f"Ocurrió un error al procesar o guardar el sueño '{state['title']}'. Revisa la terminal y tu conexión a MySQL/OpenAI.")
         else:
-            messagebox.showinfo("Éxito", f"Sueño guardado y analizado.\nEmoción: {emocion}.\nAnálisis generado en el campo de abajo.")
+            self._set_job_row(job_id, f"Listo: {emocion}", state["stages"])
 
             try:
                 threading.Thread(target=self._load_dreams_list_safe, daemon=True).start()
@@ -406,16 +538,22 @@ class DashboardView(tk.Frame):
         self.search_entry.pack(side="left", fill="x", expand=True, padx=6)
         search_btn = tk.Button(top, text="Buscar sueño", bd=0, padx=8, pady=6, bg=PALETA["bahi_aeste"], fg="white")
         search_btn.pack(side="left", padx=6)
-        search_btn.bind("<Button-1>", lambda e: self._perform_semantic_search())
+        search_btn.bind("<Button-1>", lambda e: self._perform_search())
+        self.search_entry.bind("<Return>", lambda e: self._perform_search())
         self._bind_hover(search_btn, PALETA["bahi_aeste"], PALETA["fjord"])
         ttk.Button(top, text="Refrescar Lista", command=lambda: threading.Thread(target=self._load_dreams_list_safe, daemon=True).start()).pack(side="left", padx=6)
 
         cols = ("id", "title", "date", "emotion", "format")
-        self.tree = ttk.Treeview(tab, columns=cols, show="headings", height=8)
+        tree_frame = tk.Frame(tab, bg=PALETA["panel"])
+        tree_frame.pack(fill="both", expand=False, padx=8, pady=8)
+        self.tree = ttk.Treeview(tree_frame, columns=cols, show="headings", height=8)
         for c in cols:
             self.tree.heading(c, text=c.capitalize())
             self.tree.column(c, width=140)
-        self.tree.pack(fill="both", expand=False, padx=8, pady=8)
+        self.tree_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_tree_scroll)
+        self.tree_scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
         self.tree.bind("<Double-1>", self._on_row_double)
 
         detail = tk.Frame(tab, bg=PALETA["panel"])
@@ -467,7 +605,7 @@ class DashboardView(tk.Frame):
         analysis_raw = dream.get("analysis_text") or "(Sin análisis guardado)"
         self.detail_analysis.insert(tk.END, self._extract_interpretation_and_advice(analysis_raw))
 
-    def _perform_semantic_search(self):
+    def _perform_search(self):
         q = self.search_entry.get().strip()
         if not q:
             messagebox.showwarning("Aviso", "Escribe algo para buscar.")
@@ -477,16 +615,48 @@ class DashboardView(tk.Frame):
             messagebox.showwarning("IA no lista", "El motor de IA aún no está listo.")
             return
 
-        try:
-            res = self.ia_service.semantic_search(q)
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al buscar: {e}")
-            return
-        
+        # La primera búsqueda puede cargar el modelo y el índice semántico: se hace fuera del hilo de Tk
+        self._search_generation += 1
+        generation = self._search_generation
         self.detail_content.delete("1.0", tk.END)
         self.detail_creative.delete("1.0", tk.END)
         self.detail_analysis.delete("1.0", tk.END)
-        self.detail_content.insert(tk.END, res)
+        self.detail_content.insert(tk.END, "Buscando...")
+
+        def worker():
+            try:
+                res = self.ia_service.hybrid_search(q)
+            except Exception as e:
+                self.after(0, lambda: self._show_search_results(generation, None, e))
+                return
+            self.after(0, lambda: self._show_search_results(generation, res))
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _show_search_results(self, generation, res, error=None):
+        if generation != self._search_generation:
+            # Llegó una búsqueda más reciente mientras esta terminaba
+            return
+        self.detail_content.delete("1.0", tk.END)
+        if error is not None:
+            messagebox.showerror("Error", f"Error al buscar: {error}")
+            return
+
+        if not res:
+            self.detail_content.insert(tk.END, "No se encontraron sueños relacionados.")
+            return
+
+        # Los resultados sustituyen al historial paginado hasta pulsar "Refrescar Lista"
+        self._list_generation += 1
+        self._list_at_start = True
+        self._list_exhausted = True
+        self._list_keys = {}
+        for r in self.tree.get_children():
+            self.tree.delete(r)
+        lines = []
+        for d in res:
+            self.tree.insert("", "end", values=(d['id'], d['title'], d['date_recorded'], d['emotion_tag'], d.get('creative_format','')))
+            lines.append(f"[{' + '.join(d['sources'])}] #{d['id']} - {d['title']}\n    {d['snippet']}")
+        self.detail_content.insert(tk.END, "Resultados de la búsqueda (doble clic para abrir):\n\n" + "\n\n".join(lines))
 
     def _setup_visualizaciones_tab(self, tab):
         tab.configure(bg=PALETA["panel"])
@@ -532,93 +702,61 @@ class DashboardView(tk.Frame):
 
     def _load_visualizations_safe(self):
         self.visual_status_label.config(text="Cargando datos y dibujando gráficos, por favor espera...", fg="yellow")
-        
-        for widget in self.chart_frame.winfo_children():
-            widget.destroy()
-
+        # Los gráficos anteriores siguen visibles hasta que los nuevos estén listos
         threading.Thread(target=self._draw_all_charts, daemon=True).start()
 
 
     def _draw_all_charts(self):
+        # Todo el dibujo ocurre en este hilo (Agg -> PNG); el hilo de Tk solo muestra las imágenes
         try:
-            emotion_counts, evolution_data, wordcloud_text = self.ia_service.get_visual_metrics()
-
-            if isinstance(emotion_counts, str):
-                self.after(0, lambda: self.visual_status_label.config(text=emotion_counts, fg="red"))
-                return
+            version = self.ia_service.get_metrics_version()
+            images = self._chart_cache.get(version) if version is not None else None
+
+            if images is None:
+                emotion_counts, evolution_data, wordcloud_frequencies = self.ia_service.get_visual_metrics()
+
+                if isinstance(emotion_counts, str):
+                    self.after(0, lambda: self.visual_status_label.config(text=emotion_counts, fg="red"))
+                    return
+
+                wordcloud_future = None
+                if wordcloud_frequencies:
+                    try:
+                        wordcloud_future = render_wordcloud_async(wordcloud_frequencies)
+                    except Exception:
+                        pass
+                images = {
+                    "pie": render_emotion_pie(emotion_counts),
+                    "evolution": render_emotion_evolution(evolution_data),
+                }
+                try:
+                    images["wordcloud"] = wordcloud_future.result() if wordcloud_future else render_wordcloud(wordcloud_frequencies)
+                except Exception:
+                    images["wordcloud"] = render_wordcloud(wordcloud_frequencies)
+                if version is not None:
+                    self._chart_cache.put(version, images)
 
-            self.after(0, lambda: self._draw_emotion_pie(emotion_counts))
-            self.after(0, lambda: self._draw_emotion_evolution(evolution_data)) 
-            self.after(0, lambda: self._draw_wordcloud(wordcloud_text))
-            
+            self.after(0, lambda: self._show_chart_images(images))
             self.after(0, lambda: self.visual_status_label.config(text="Gráficos actualizados con éxito.", fg="lime green"))
 
         except Exception as e:
             self.after(0, lambda: self.visual_status_label.config(text=f"Error fatal al dibujar gráficos: {e}", fg="red"))
 
 
-    def _draw_emotion_pie(self, emotion_counts):
-        colors = ['#4D4D80', '#282C4D', '#3C3F68', '#606271', '#7A7D94'] 
-        
-        fig = Figure(figsize=(6, 4), dpi=100)
-        ax = fig.add_subplot(111)
-        
-        labels = [k for k, v in emotion_counts.items() if v > 0]
-        sizes = [v for v in emotion_counts.values() if v > 0]
-        
-        if not sizes:
-             ax.text(0.5, 0.5, 'No hay datos de sueños para graficar.', ha='center', va='center', color='gray')
-        else:
-            ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors[:len(labels)], textprops={'color': 'white'})
-            ax.axis('equal') 
-        
-        ax.set_title("Distribución de Emociones", color='white')
-        fig.patch.set_facecolor(PALETA["panel"])
-        ax.set_facecolor(PALETA["panel"])
-
-        canvas = FigureCanvasTkAgg(fig, master=self.chart_frame)
-        canvas_widget = canvas.get_tk_widget()
-        canvas_widget.pack(fill="x", expand=True, padx=10, pady=20, side=tk.TOP)
-        canvas.draw()
-
-
-    def _draw_wordcloud(self, text):
-            import matplotlib.pyplot as plt 
-            from wordcloud import WordCloud 
-            
-            for widget in self.chart_frame.winfo_children():
-                if widget.winfo_ismapped() and isinstance(widget, tk.Label):
-                    if hasattr(widget, 'wordcloud_marker'):
-                        widget.destroy()
-
-            if not text.strip():
-                label = tk.Label(self.chart_frame, text="No hay suficiente texto para la Nube de Palabras.", 
-                                bg=PALETA["panel"], fg="gray")
-                label.pack(side=tk.TOP, padx=10, pady=10)
-                return
-
-            wc = WordCloud(width=800, 
-                        height=400, 
-                        background_color=PALETA["panel"], 
-                        colormap='plasma', 
-                        min_font_size=10,
-                        normalize_plurals=False).generate(text)
-            
-            fig, ax = plt.subplots(figsize=(8, 4), dpi=100)
-            ax.imshow(wc, interpolation='bilinear')
-            ax.axis("off") 
-            fig.patch.set_facecolor(PALETA["panel"])
-            plt.tight_layout(pad=0) 
-
-
-            canvas = FigureCanvasTkAgg(fig, master=self.chart_frame)
-            canvas_widget = canvas.get_tk_widget()
-            
-            canvas_widget.pack(fill="x", expand=True, padx=10, pady=20, side=tk.TOP) 
-            
-
-            canvas_widget.wordcloud_marker = True 
-            canvas.draw()
+    def _show_chart_images(self, images):
+        for widget in self.chart_frame.winfo_children():
+            widget.destroy()
+        self._chart_photos = []
+
+        for key in ("pie", "evolution", "wordcloud"):
+            png = images.get(key)
+            if png is None:
+                tk.Label(self.chart_frame, text="No hay suficiente texto para la Nube de Palabras.",
+                         bg=PALETA["panel"], fg="gray").pack(side=tk.TOP, padx=10, pady=10)
+                continue
+            photo = ImageTk.PhotoImage(Image.open(io.BytesIO(png)))
+            self._chart_photos.append(photo)
+            tk.Label(self.chart_frame, image=photo, bg=PALETA["panel"], bd=0).pack(fill="x", expand=True, padx=10, pady=20, side=tk.TOP)
 
     def _bind_hover(self, widget, base_color, hover_color):
         widget._anim_after = None
@@ -749,56 +887,3 @@ class DashboardView(tk.Frame):
         if len(txt) > 2000:
             return txt[:2000] + "\n\n...(texto demasiado largo, ver consola para JSON completo)"
         return txt
-
-    def _draw_emotion_evolution(self, evolution_data):
-        import pandas as pd
-        import matplotlib.dates as mdates
-        
-        EMOTION_COLORS = {
-            "Alegría": '#4D4D80', 
-            "Calma": '#3C3F68',
-            "Tristeza": '#606271', 
-            "Miedo": '#B2B2B2', 
-            "Ira": '#C93C3C',
-            "Indefinida": '#333333'
-        }
-
-        df = pd.DataFrame(evolution_data, columns=['date', 'emotion'])
-        df['date'] = pd.to_datetime(df['date'])
-
-        df_counts = df.groupby(['date', 'emotion']).size().reset_index(name='count')
-        
-        df_pivot = df_counts.pivot(index='date', columns='emotion', values='count').fillna(0)
-        
-        fig = Figure(figsize=(12, 5), dpi=100)
-        ax = fig.add_subplot(111)
-
-        fig.patch.set_facecolor(PALETA["panel"])
-        ax.set_facecolor(PALETA["panel"])
-        ax.tick_params(axis='x', colors='white')
-        ax.tick_params(axis='y', colors='white')
-        ax.xaxis.label.set_color('white')
-        ax.yaxis.label.set_color('white')
-        ax.spines['bottom'].set_color('white')
-        ax.spines['left'].set_color('white')
-        
-        ax.set_title("Evolución de Frecuencia Emocional", color='white')
-        ax.set_xlabel("Fecha", color='white')
-        ax.set_ylabel("Frecuencia Diaria", color='white')
-
-        if df_pivot.empty:
-            ax.text(0.5, 0.5, 'No hay datos suficientes para la evolución temporal.', ha='center', va='center', color='gray')
-        else:
-            for emotion in df_pivot.columns:
-                ax.plot(df_pivot.index, df_pivot[emotion], label=emotion, 
-                        color=EMOTION_COLORS.get(emotion, '#FFFFFF'), linewidth=2)
-            
-            ax.legend(loc='upper left', frameon=False, labelcolor='white')
-
-            ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
-            fig.autofmt_xdate(rotation=45) 
-
-        canvas = FigureCanvasTkAgg(fig, master=self.chart_frame)
-        canvas_widget = canvas.get_tk_widget()
-        canvas_widget.pack(fill="x", expand=True, padx=10, pady=10, side=tk.TOP)
-        canvas.draw()
@@ -0,0 +1,67 @@
+import numpy as np
+
+
+class StarField:
+    """Estrellas del fondo con el estado en arrays de NumPy.
+
+    Cada frame se calcula en bloque y se envía a Tk como un único script Tcl;
+    el brillo se cuantiza en unos pocos niveles y solo se reconfiguran las
+    estrellas que cambian de nivel.
+    """
+
+    def __init__(self, canvas, n: int, width: float, height: float, levels: int = 8, tag: str = "star", seed: int = None):
+        self.canvas = canvas
+        self.tag = tag
+        self.levels = levels
+        rng = np.random.default_rng(seed)
+        self.x = rng.uniform(0, width, n)
+        self.y = rng.uniform(0, height, n)
+        self.size = rng.uniform(1.2, 3.8, n)
+        self.vx = rng.uniform(-0.15, 0.15, n)
+        self.vy = rng.uniform(-0.3, -0.05, n)
+        self.twinkle_speed = rng.uniform(0.05, 0.2, n)
+        self.phase = rng.uniform(0, 2 * np.pi, n)
+        self.level = np.full(n, -1, dtype=np.int16)
+
+        values = (255 * np.linspace(0.6, 1.0, levels)).astype(int)
+        self.colors = [f"#{v:02x}{v:02x}{v:02x}" for v in values]
+        self.items = [
+            canvas.create_oval(x, y, x + s, y + s, fill="#ffffff", outline="", tags=(tag,))
+            for x, y, s in zip(self.x, self.y, self.size)
+        ]
+        canvas.tag_raise(tag)
+        self._path = str(canvas)
+
+    def __len__(self):
+        return len(self.items)
+
+    def step(self, w: float, h: float, dt: float = 1.0):
+        # dt en "frames de 33 ms", para mantener la velocidad aparente si baja la frecuencia
+        self.x += self.vx * dt
+        self.y += self.vy * dt
+        self.phase += self.twinkle_speed * dt
+        self.x[self.x < -10] = w + 5
+        self.x[self.x > w + 10] = -5
+        self.y[self.y < -10] = h + 5
+        self.y[self.y > h + 10] = -5
+
+        brightness = 0.5 + 0.5 * np.sin(self.phase)
+        level = np.rint(brightness * (self.levels - 1)).astype(np.int16)
+        changed = np.nonzero(level != self.level)[0]
+        self.level = level
+
+        x0 = self.x.round(1)
+        y0 = self.y.round(1)
+        x1 = (self.x + self.size).round(1)
+        y1 = (self.y + self.size).round(1)
+        path = self._path
+        commands = [
+            f"{path} coords {item} {a} {b} {c} {d}"
+            for item, a, b, c, d in zip(self.items, x0.tolist(), y0.tolist(), x1.tolist(), y1.tolist())
+        ]
+        commands.extend(f"{path} itemconfigure {self.items[i]} -fill {self.colors[level[i]]}" for i in changed)
+        self.canvas.tk.eval("\n".join(commands))
+
+    def destroy(self):
+        self.canvas.delete(self.tag)
+        self.items = []
@@ -0,0 +1,84 @@
+import os
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+# Los módulos se importan como back.* desde la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from back.text_terms import tokenize  # noqa: E402
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Carpeta de datos temporal para cachés, índices y la BD SQLite."""
+    monkeypatch.setenv("DREAMS_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("DREAMS_EMBEDDING_MODEL", raising=False)
+    monkeypatch.delenv("DREAMS_EMBEDDING_MODEL_VERSION", raising=False)
+    return tmp_path
+
+
+class HashingEmbedder:
+    """Sustituto del modelo de embeddings: bolsa de palabras con hashing, sin torch."""
+
+    dim = 64
+
+    def _one(self, text):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for word in tokenize(text):
+            vec[zlib.crc32(word.encode("utf-8")) % self.dim] += 1.0
+        return vec
+
+    def encode(self, texts, **kwargs):
+        if isinstance(texts, str):
+            return self._one(texts)
+        return np.vstack([self._one(t) for t in texts])
+
+
+@pytest.fixture
+def fake_llm():
+    """Servidor local compatible con OpenAI, sin latencia."""
+    from back.fake_llm_server import FakeLLMConfig, start_in_thread
+
+    server = start_in_thread(config=FakeLLMConfig(latency=0, jitter=0, tokens_per_second=0, seed=0))
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def make_service(data_dir, fake_llm, monkeypatch):
+    """Crea IAService sobre SQLite y el servidor falso, con HashingEmbedder como modelo.
+
+    Las variables DREAMS_* que se pasen se aplican antes de construirlo.
+    """
+    from back.ia_services import IAService
+
+    monkeypatch.setenv("DREAMS_DB_ENGINE", "sqlite")
+    monkeypatch.setenv("DREAMS_LLM_PROVIDER", "local")
+    monkeypatch.setenv("DREAMS_LLM_BASE_URL", f"http://127.0.0.1:{fake_llm.server_address[1]}/v1")
+    monkeypatch.setenv("DREAMS_LLM_CACHE", "0")
+    for name in ("DREAMS_DEFERRED_ENRICHMENT", "DREAMS_COMBINED_ENRICHMENT", "DREAMS_ANN_INDEX", "DREAMS_LOCAL_EMOTION"):
+        monkeypatch.delenv(name, raising=False)
+    services = []
+
+    def make(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        ia = IAService()
+        ia._embedder = HashingEmbedder()
+        services.append(ia)
+        return ia
+
+    yield make
+    for ia in services:
+        if ia.enrichment_workers:
+            ia.enrichment_workers.stop()
+        if ia.db_manager:
+            ia.db_manager.close()
+
+
+@pytest.fixture
+def service(make_service):
+    return make_service()
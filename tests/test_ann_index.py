@@ -0,0 +1,133 @@
+import json
+
+import numpy as np
+import pytest
+
+from back.ann_index import IVFIndex
+from back.vector_index import VectorIndex
+
+
+def _clustered(n, dim=32, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    return (centers[labels] + 0.3 * rng.standard_normal((n, dim))).astype(np.float32)
+
+
+def _exact(vectors, ids):
+    index = VectorIndex()
+    index.load(ids, vectors)
+    return index
+
+
+def _meta(index):
+    with open(index._file("meta.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_single_list_matches_exact_search(tmp_path):
+    vectors = _clustered(300)
+    ids = np.arange(1, 301)
+    index = IVFIndex(str(tmp_path / "ann"))
+    index.load(ids, vectors)
+    exact = _exact(vectors, ids)
+    for query in _clustered(5, seed=1):
+        assert [i for i, _ in index.search(query, 10)] == [i for i, _ in exact.search(query, 10)]
+
+
+def test_recall_against_exact_search(tmp_path):
+    vectors = _clustered(4000)
+    ids = np.arange(1, 4001)
+    index = IVFIndex(str(tmp_path / "ann"), nprobe=4)
+    index.load(ids, vectors, nlist=32)
+    exact = _exact(vectors, ids)
+
+    queries = _clustered(50, seed=2)
+    recall, full = [], []
+    for query in queries:
+        truth = {i for i, _ in exact.search(query, 10)}
+        recall.append(len(truth & {i for i, _ in index.search(query, 10)}) / 10)
+        full.append({i for i, _ in index.search(query, 10, nprobe=32)} == truth)
+    assert np.mean(recall) >= 0.9
+    # Recorriendo todas las listas el resultado es el exacto
+    assert all(full)
+
+
+def test_inserts_are_searchable_and_survive_reopen(tmp_path):
+    vectors = _clustered(500)
+    index = IVFIndex(str(tmp_path / "ann"), meta_every=1000)
+    index.load(np.arange(1, 501), vectors)
+    extra = _clustered(1200, seed=3)
+    # Más inserciones que la capacidad inicial: obliga a ampliar los ficheros
+    for i, vec in enumerate(extra, start=501):
+        assert index.add(i, vec)
+    assert not index.add(9999, np.ones(5))
+    assert len(index) == 1700
+    assert index.search(extra[-1], 1)[0][0] == 1700
+    assert index.needs_rebuild()
+    # meta.json solo se escribe cada meta_every inserciones o con flush()
+    assert _meta(index)["size"] == 500 + 1000
+
+    index.flush()
+    reopened = IVFIndex(str(tmp_path / "ann"))
+    assert reopened.open()
+    assert (len(reopened), reopened.max_id) == (1700, 1700)
+    assert reopened.search(extra[-1], 1)[0][0] == 1700
+
+
+def test_rebuild_keeps_inserts_made_while_building(tmp_path):
+    vectors = _clustered(600)
+    index = IVFIndex(str(tmp_path / "ann"))
+    index.load(np.arange(1, 601), vectors)
+    for i, vec in enumerate(_clustered(50, seed=4), start=601):
+        index.add(i, vec)
+    late = _clustered(1, seed=5)[0]
+    build = index.load
+
+    def load_with_concurrent_insert(ids, vecs, **kwargs):
+        index.add(651, late)
+        build(ids, vecs, **kwargs)
+
+    index.load = load_with_concurrent_insert
+    index.rebuild()
+    assert index._pending is None
+    assert (len(index), index._built, index.max_id) == (651, 650, 651)
+    stored = np.array(index._ids[:len(index)])
+    assert sorted(stored) == list(range(1, 652))
+    assert index.search(late, 1)[0][0] == 651
+    assert _meta(index)["size"] == 651
+
+
+def test_failed_rebuild_does_not_duplicate_inserts(tmp_path):
+    vectors = _clustered(200)
+    index = IVFIndex(str(tmp_path / "ann"))
+    index.load(np.arange(1, 201), vectors)
+
+    def failing_load(ids, vecs, **kwargs):
+        index.add(201, vecs[0])
+        raise MemoryError("sin memoria")
+
+    index.load = failing_load
+    with pytest.raises(MemoryError):
+        index.rebuild()
+    assert index._pending is None
+    assert list(np.array(index._ids[:len(index)])).count(201) == 1
+    assert len(index) == 201
+
+
+def test_service_rebuilds_off_the_save_pool(make_service, tmp_path, monkeypatch):
+    service = make_service(DREAMS_ANN_INDEX="1")
+    index = IVFIndex(str(tmp_path / "ann"))
+    index.load(np.arange(1, 201), _clustered(200))
+    for i, vec in enumerate(_clustered(1100, seed=6), start=201):
+        index.add(i, vec)
+    assert index.needs_rebuild()
+
+    def no_save_pool(*args, **kwargs):
+        raise AssertionError("la reconstrucción no debe ir al pool de IAService")
+
+    monkeypatch.setattr(service._executor, "submit", no_save_pool)
+    service._maybe_rebuild_index(index)
+    service._index_executor.shutdown(wait=True)
+    assert not index.needs_rebuild()
+    assert index._built == 1300
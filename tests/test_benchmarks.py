@@ -0,0 +1,69 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.report import compare, percentiles
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_percentiles():
+    assert percentiles([]) == {}
+    stats = percentiles([0.004, 0.001, 0.002, 0.003])
+    assert stats["count"] == 4
+    assert stats["mean_ms"] == pytest.approx(2.5)
+    assert (stats["p50_ms"], stats["max_ms"]) == (pytest.approx(3.0), pytest.approx(4.0))
+
+
+def test_compare_flags_only_regressions():
+    baseline = {"results": {"1k": {"fetch": {"p95_ms": 10.0}, "save": {"saves_per_second": 100.0},
+                                   "rows": 1000, "index": {"seconds": 0.0}}}}
+    current = {"results": {"1k": {"fetch": {"p95_ms": 11.0}, "save": {"saves_per_second": 70.0},
+                                  "rows": 5, "index": {"seconds": 3.0}}}}
+    regressions = compare(current, baseline, tolerance=0.2)
+    assert [r["metric"] for r in regressions] == ["1k.save.saves_per_second"]
+    assert regressions[0]["change"] == pytest.approx(-0.3)
+    assert [r["metric"] for r in compare(current, baseline, tolerance=0.05)] == ["1k.fetch.p95_ms", "1k.save.saves_per_second"]
+
+
+def _run_storage_bench(data_dir, *extra):
+    env = dict(os.environ, DREAMS_DATA_DIR=str(data_dir))
+    return subprocess.run(
+        [sys.executable, "-m", "benchmarks.storage_bench", "--engine", "sqlite", "--sizes", "60", "--dim", "16",
+         "--batch-size", "25", "--queries", "5", "--saves", "5", "--repeats", "1", *extra],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+
+
+def test_storage_bench_smoke(data_dir):
+    output = data_dir / "storage.json"
+    run = _run_storage_bench(data_dir, "--output", str(output))
+    assert run.returncode == 0, run.stderr
+
+    report = json.loads(output.read_text(encoding="utf-8"))
+    assert report["environment"]["python"] and report["parameters"]["engine"] == "sqlite"
+    result = report["results"]["60"]
+    assert result["bulk_insert"]["rows"] == 60
+    assert result["rows"] == 60
+    assert result["fetch_all_dreams"]["rows"] == 60
+    assert result["fetch_all_embeddings"]["rows"] == 60
+    assert result["vector_index_load"]["size"] == 60
+    assert result["semantic_search"]["count"] == 5
+    assert result["save_dream"]["count"] == 5
+    assert (data_dir / "bench" / "dreams_bench_60.sqlite").exists()
+
+    # Contra su propio informe y con tolerancia amplia no hay regresiones
+    compared = data_dir / "compared.json"
+    again = _run_storage_bench(data_dir, "--baseline", str(output), "--tolerance", "1000", "--output", str(compared))
+    assert again.returncode == 0, again.stderr
+    assert json.loads(compared.read_text(encoding="utf-8"))["regressions"] == []
+
+    # Un informe base imposible de igualar hace fallar la ejecución
+    fast = {"results": {"60": {"save_dream": {"max_ms": 1e-9}}}}
+    (data_dir / "fast.json").write_text(json.dumps(fast), encoding="utf-8")
+    slower = _run_storage_bench(data_dir, "--reuse", "--baseline", str(data_dir / "fast.json"), "--output", str(compared))
+    assert slower.returncode == 1
+    assert [r["metric"] for r in json.loads(compared.read_text(encoding="utf-8"))["regressions"]] == ["60.save_dream.max_ms"]
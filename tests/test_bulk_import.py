@@ -0,0 +1,113 @@
+import csv
+import json
+import types
+
+import numpy as np
+
+from back.bulk_import import BulkImporter, iter_records
+
+DREAMS = [
+    ("Lobo", "Un lobo gris me seguía por el bosque nevado", "Miedo"),
+    ("Mar", "Nadaba en un mar tranquilo bajo la luna", None),
+    ("Tren", "Perdía el tren y la estación estaba vacía", None),
+    ("Fiesta", "Bailaba en una fiesta llena de globos", "Alegría"),
+    ("Casa", "Mi casa de la infancia tenía puertas nuevas", None),
+]
+
+
+def _write_jsonl(path, dreams=DREAMS, bad_line=False):
+    with open(path, "w", encoding="utf-8") as f:
+        for i, (title, content, emotion) in enumerate(dreams):
+            f.write(json.dumps({"title": title, "content": content, "emotion": emotion,
+                                "date": f"2024-03-0{i + 1}T08:00:00"}, ensure_ascii=False) + "\n")
+            if bad_line and i == 1:
+                f.write("{no es json\n\n")
+        f.write(json.dumps({"title": "vacío", "content": "  "}) + "\n")
+    return str(path)
+
+
+def _emotions(db):
+    return db._query("SELECT title, emotion_tag, emotion_source FROM dreams ORDER BY id", dictionary=False)
+
+
+def test_iter_records_streams_jsonl_and_csv(tmp_path):
+    records = iter_records(_write_jsonl(tmp_path / "s.jsonl", bad_line=True))
+    assert isinstance(records, types.GeneratorType)
+    assert next(records)["title"] == "Lobo"
+    assert [r["title"] for r in records] == ["Mar", "Tren", "Fiesta", "Casa", "vacío"]
+
+    with open(tmp_path / "s.csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, ["titulo", "contenido", "fecha"])
+        writer.writeheader()
+        writer.writerow({"titulo": "Lobo", "contenido": "Un lobo, gris", "fecha": "2024-03-01"})
+    assert list(iter_records(str(tmp_path / "s.csv"))) == [{"titulo": "Lobo", "contenido": "Un lobo, gris", "fecha": "2024-03-01"}]
+
+
+def test_chunks_are_committed_separately(service, tmp_path, monkeypatch):
+    sizes = []
+    save = service.db_manager.save_dreams_bulk
+    monkeypatch.setattr(service.db_manager, "save_dreams_bulk", lambda chunk: sizes.append(len(chunk)) or save(chunk))
+    service.vector_index = object()
+
+    importer = BulkImporter(service, chunk_size=2, emotion_mode="none")
+    assert importer.run(_write_jsonl(tmp_path / "s.jsonl", bad_line=True)) == 5
+    assert sizes == [2, 2, 1]
+    assert service.vector_index is None
+
+    rows = service.db_manager.fetch_dreams_page(limit=10)
+    assert sorted(r["date_recorded"].day for r in rows) == [1, 2, 3, 4, 5]
+    ids, vectors = service.db_manager.fetch_all_embeddings(model_version=service.embedding_model_version)
+    assert len(ids) == 5 and vectors.shape[1] == 64
+
+
+def test_mode_none_enqueues_dreams_without_emotion(service, tmp_path):
+    importer = BulkImporter(service, chunk_size=2, emotion_mode="none")
+    importer.run(_write_jsonl(tmp_path / "s.jsonl"))
+    rows = _emotions(service.db_manager)
+    assert rows == [("Lobo", "Miedo", None), ("Mar", None, None), ("Tren", None, None),
+                    ("Fiesta", "Alegría", None), ("Casa", None, None)]
+
+    queue = service.enrichment_queue
+    assert importer.enqueued == 3
+    assert queue.stats()["pending"] == 3
+    claimed = {queue.claim()[:2] for _ in range(3)}
+    assert claimed == {(2, "emotion"), (3, "emotion"), (5, "emotion")}
+
+    # Una segunda importación solo encola sus propios sueños (y no repite los ya encolados)
+    again = BulkImporter(service, emotion_mode="none")
+    again.run(_write_jsonl(tmp_path / "t.jsonl", DREAMS[1:2]))
+    assert again.enqueued == 4
+    assert queue.stats() == {"pending": 1, "running": 3, "failed": 0}
+
+
+def test_mode_local_uses_the_classifier(service, tmp_path):
+    classifier = service.emotion_classifier
+    embedder = service.embedder
+    # Cada categoría entrenada con el vector de un sueño distinto
+    texts = [d[1] for d in DREAMS]
+    classifier.fit(np.vstack([embedder.encode(t) for t in texts]).repeat(5, axis=0),
+                   [e for e in service.EMOTION_CATEGORIES for _ in range(5)])
+
+    BulkImporter(service, emotion_mode="local").run(_write_jsonl(tmp_path / "s.jsonl"))
+    rows = _emotions(service.db_manager)
+    # Las emociones del archivo se respetan; el resto las pone el clasificador
+    assert rows[0] == ("Lobo", "Miedo", None)
+    assert rows[1] == ("Mar", service.EMOTION_CATEGORIES[1], "local")
+    assert rows[2] == ("Tren", service.EMOTION_CATEGORIES[2], "local")
+    assert rows[4] == ("Casa", service.EMOTION_CATEGORIES[4], "local")
+    assert service.enrichment_queue is None
+
+
+def test_mode_local_without_trained_classifier_leaves_emotion_empty(service, tmp_path):
+    BulkImporter(service, emotion_mode="local").run(_write_jsonl(tmp_path / "s.jsonl"))
+    assert [row[1] for row in _emotions(service.db_manager)] == ["Miedo", None, None, "Alegría", None]
+
+
+def test_mode_llm_asks_the_model_when_the_classifier_abstains(service, tmp_path):
+    BulkImporter(service, emotion_mode="llm").run(_write_jsonl(tmp_path / "s.jsonl"))
+    rows = _emotions(service.db_manager)
+    for title, emotion, source in (rows[1], rows[2], rows[4]):
+        assert emotion in service.EMOTION_CATEGORIES, title
+        assert source == "ia"
+    # Las etiquetas de la IA entrenan el clasificador
+    assert service.emotion_classifier.n_samples == 3
@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+import pytest
+
+from front.chart_renderer import ChartCache
+
+PNG_MAGIC = b"\x89PNG"
+
+
+def test_chart_cache_keeps_latest_versions():
+    cache = ChartCache(max_versions=2)
+    cache.put((1, 1, 1), {"pie": b"a"})
+    cache.put((2, 2, 2), {"pie": b"b"})
+    assert cache.get((1, 1, 1)) == {"pie": b"a"}
+    cache.put((3, 3, 3), {"pie": b"c"})
+    assert cache.get((1, 1, 1)) is None
+    assert cache.get((2, 2, 2)) == {"pie": b"b"} and cache.get((3, 3, 3)) == {"pie": b"c"}
+    assert cache.get(None) is None
+
+
+def test_dataset_version_tracks_chart_inputs(service):
+    db = service.db_manager
+    empty = service.get_metrics_version()
+    dream_id = db.save_dream("a", "un lobo en el mar", None, None)
+    pending = service.get_metrics_version()
+    assert pending != empty
+
+    # Solo cambia con lo que dibujan los gráficos: emociones por día y sueños nuevos
+    db.update_dream_enrichment(dream_id, creative_text="Poema", analysis_text="Análisis")
+    assert service.get_metrics_version() == pending
+    # Mismo id máximo y mismo total, distinta emoción: lo distingue la suma de comprobación
+    db.update_dream_enrichment(dream_id, emotion="Miedo")
+    labelled = service.get_metrics_version()
+    assert labelled[:2] == pending[:2] and labelled != pending
+
+    db.save_dream("b", "un tren", "Calma", None)
+    latest = service.get_metrics_version()
+    assert latest != labelled
+    db.rebuild_emotion_aggregates()
+    assert service.get_metrics_version() == latest
+
+
+@pytest.fixture
+def dashboard(service, monkeypatch):
+    import front.dashboard_view as dashboard_view
+
+    # Sin proceso aparte para la nube de palabras: se dibuja en el mismo hilo
+    def no_process_pool(frequencies):
+        raise RuntimeError("sin proceso")
+
+    monkeypatch.setattr(dashboard_view, "render_wordcloud_async", no_process_pool)
+    renders = []
+    real_pie = dashboard_view.render_emotion_pie
+
+    def counting_pie(counts):
+        renders.append(dict(counts))
+        return real_pie(counts)
+
+    monkeypatch.setattr(dashboard_view, "render_emotion_pie", counting_pie)
+    shown, statuses = [], []
+    view = SimpleNamespace(
+        ia_service=service,
+        _chart_cache=ChartCache(),
+        after=lambda delay, callback: callback(),
+        visual_status_label=SimpleNamespace(config=lambda **kw: statuses.append(kw["text"])),
+        _show_chart_images=shown.append,
+    )
+    draw = lambda: dashboard_view.DashboardView._draw_all_charts(view)
+    return SimpleNamespace(draw=draw, renders=renders, shown=shown, statuses=statuses)
+
+
+def test_charts_are_reused_until_the_dataset_changes(service, dashboard):
+    service.db_manager.save_dream("a", "un lobo en el bosque nevado", "Miedo", None)
+    dashboard.draw()
+    assert len(dashboard.renders) == 1
+    images = dashboard.shown[-1]
+    assert all(images[key].startswith(PNG_MAGIC) for key in ("pie", "evolution", "wordcloud"))
+
+    dashboard.draw()
+    assert len(dashboard.renders) == 1
+    assert dashboard.shown[-1] is images
+
+    service.db_manager.save_dream("b", "un mar tranquilo", "Calma", None)
+    dashboard.draw()
+    assert len(dashboard.renders) == 2
+    assert dashboard.renders[-1]["Calma"] == 1
+    assert dashboard.shown[-1] is not images
+    assert dashboard.statuses[-1] == "Gráficos actualizados con éxito."
+
+
+def test_empty_dataset_is_not_cached(dashboard):
+    dashboard.draw()
+    assert dashboard.shown == []
+    assert dashboard.statuses[-1] == "No hay sueños registrados."
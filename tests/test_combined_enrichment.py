@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+
+def _stub_chat(service, monkeypatch, reply):
+    calls = []
+
+    def chat(messages, temperature, on_token=None, **request):
+        calls.append(request)
+        return reply(request) if callable(reply) else reply
+
+    monkeypatch.setattr(service.client, "chat", chat)
+    return calls
+
+
+def test_response_format_schema(service):
+    response_format = service._enrichment_response_format()
+    assert response_format["type"] == "json_schema"
+    assert response_format["json_schema"]["strict"] is True
+    schema = response_format["json_schema"]["schema"]
+    assert schema["additionalProperties"] is False
+    assert set(schema["required"]) == set(schema["properties"]) == {"emotion", "symbols", "interpretation", "advice"}
+    assert schema["properties"]["emotion"]["enum"] == service.EMOTION_CATEGORIES
+    assert schema["properties"]["symbols"] == {"type": "array", "items": {"type": "string"}}
+
+
+def test_enrich_dream_against_fake_server(service):
+    emotion, analysis = service.enrich_dream("Un lobo gris me seguía por el bosque")
+    assert emotion in service.EMOTION_CATEGORIES
+    data = json.loads(analysis)
+    assert set(data) == {"symbols", "interpretation", "advice"}
+    assert len(data["symbols"]) <= 6
+    assert data["interpretation"] and data["advice"]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Miedo", "Miedo"),
+    ("  Calma\n", "Calma"),
+    ("Sentía mucha tristeza.", "Tristeza"),
+    ("IRA", "Ira"),
+    ("Nostalgia", "Indefinida"),
+    ("", "Indefinida"),
+    (None, "Indefinida"),
+])
+def test_normalize_emotion(service, text, expected):
+    assert service._normalize_emotion(text) == expected
+
+
+def test_enrich_dream_normalizes_and_trims(service, monkeypatch):
+    reply = json.dumps({"emotion": "miedo intenso", "symbols": [f"s{i}" for i in range(9)],
+                        "interpretation": "Algo te persigue.", "advice": "Descansa."})
+    calls = _stub_chat(service, monkeypatch, reply)
+
+    emotion, analysis = service.enrich_dream("Un lobo me seguía")
+    assert emotion == "Miedo"
+    assert json.loads(analysis) == {"symbols": [f"s{i}" for i in range(6)], "interpretation": "Algo te persigue.", "advice": "Descansa."}
+    assert calls[0]["response_format"] == service._enrichment_response_format()
+
+
+def test_enrich_dream_unknown_emotion_falls_back(service, monkeypatch):
+    _stub_chat(service, monkeypatch, json.dumps({"emotion": "Nostalgia", "symbols": [], "interpretation": "", "advice": ""}))
+    assert service.enrich_dream("Volvía a la casa de mi infancia")[0] == "Indefinida"
+
+
+def test_enrich_dream_invalid_json(service, monkeypatch):
+    _stub_chat(service, monkeypatch, "esto no es JSON")
+    emotion, analysis = service.enrich_dream("Un lobo me seguía")
+    assert emotion == "Error_IA"
+    assert analysis.startswith("Error en generación de análisis")
+    with pytest.raises(json.JSONDecodeError):
+        service.enrich_dream("Un lobo me seguía", strict=True)
+
+
+def test_combined_mode_makes_one_request_for_emotion_and_analysis(make_service, monkeypatch):
+    service = make_service(DREAMS_COMBINED_ENRICHMENT="1", DREAMS_LOCAL_EMOTION="0")
+    enrichment = json.dumps({"emotion": "Calma", "symbols": ["mar"], "interpretation": "Paz.", "advice": "Respira."})
+    calls = _stub_chat(service, monkeypatch, lambda request: enrichment if "response_format" in request else "Un poema.")
+
+    emotion, creative, analysis = service.process_and_save_dream("Mar", "Nadaba en un mar tranquilo", "Poema")
+    assert (emotion, creative) == ("Calma", "Un poema.")
+    assert json.loads(analysis)["symbols"] == ["mar"]
+    assert len(calls) == 2
+    assert sum("response_format" in request for request in calls) == 1
+
+    dream_id = service.db_manager.fetch_dreams_page(limit=1)[0]["id"]
+    row = service.db_manager._query("SELECT emotion_tag, emotion_source FROM dreams WHERE id = ?", (dream_id,))[0]
+    assert (row["emotion_tag"], row["emotion_source"]) == ("Calma", "ia")
@@ -0,0 +1,145 @@
+import itertools
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+
+import mysql.connector  # noqa: E402
+
+from back import database_manager  # noqa: E402
+from back.database_manager import DatabaseManager  # noqa: E402
+
+_sessions = itertools.count(100)
+
+
+class FakeConnection:
+    """Lo que devuelve get_connection(): un préstamo de una sesión del pool."""
+
+    def __init__(self, pool, session):
+        self.pool = pool
+        self.session = session
+        self.connection_id = session["id"]
+
+    def reconnect(self, attempts=1, delay=0):
+        if self.pool.fail_with:
+            raise self.pool.fail_with
+        self.pool.reconnects += 1
+        self.session["id"] = self.connection_id = next(_sessions)
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        if self.pool.fail_with:
+            raise self.pool.fail_with
+        self.pool.pings += 1
+
+    def close(self):
+        self.pool.free.append(self.session)
+
+
+class FakePool:
+    instances = []
+
+    def __init__(self, pool_name, pool_size, pool_reset_session, **config):
+        self.free = [{"id": next(_sessions)} for _ in range(pool_size)]
+        self.fail_with = None
+        self.pings = self.reconnects = 0
+        FakePool.instances.append(self)
+
+    def get_connection(self):
+        if not self.free:
+            raise mysql.connector.errors.PoolError("Failed getting connection; pool exhausted")
+        return FakeConnection(self, self.free.pop())
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(database_manager.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def manager(monkeypatch, clock):
+    monkeypatch.setenv("MYSQL_POOL_SIZE", "2")
+    monkeypatch.setenv("MYSQL_POOL_RECYCLE", "100")
+    monkeypatch.setenv("MYSQL_POOL_PING_AFTER", "10")
+    monkeypatch.setattr(database_manager.pooling, "MySQLConnectionPool", FakePool)
+    monkeypatch.setattr(DatabaseManager, "_ensure_database_and_table", lambda self: None)
+    FakePool.instances.clear()
+    return DatabaseManager()
+
+
+def test_connections_are_returned_to_the_pool(manager):
+    for _ in range(5):
+        assert manager.connect()
+        manager.close()
+    pool = FakePool.instances[0]
+    assert len(pool.free) == 2
+    assert (pool.pings, pool.reconnects) == (0, 0)
+
+
+def test_failed_ping_returns_connection_to_the_pool(manager, clock):
+    assert manager.connect()
+    manager.close()
+    pool = FakePool.instances[0]
+    clock[0] += 30
+    pool.fail_with = mysql.connector.errors.InterfaceError("MySQL reiniciándose")
+    # Más fallos que conexiones en el pool: ninguna se pierde ni queda el semáforo ocupado
+    for _ in range(5):
+        assert not manager.connect()
+        assert manager.connection is None
+    assert len(pool.free) == 2
+
+    pool.fail_with = None
+    assert manager.connect()
+    assert pool.pings == 1
+    manager.close()
+
+
+def test_failed_reconnect_returns_connection_to_the_pool(manager, clock):
+    assert manager.connect()
+    manager.close()
+    pool = FakePool.instances[0]
+    clock[0] += 500
+    pool.fail_with = mysql.connector.errors.InterfaceError("sin servidor")
+    for _ in range(3):
+        assert not manager.connect()
+    assert len(pool.free) == 2
+
+
+def test_old_connections_are_recycled_and_idle_ones_pinged(manager, clock):
+    assert manager.connect()
+    first = manager.connection.connection_id
+    manager.close()
+    pool = FakePool.instances[0]
+
+    clock[0] += 5
+    assert manager.connect()
+    manager.close()
+    assert (pool.pings, pool.reconnects) == (0, 0)
+
+    clock[0] += 20
+    assert manager.connect()
+    manager.close()
+    assert (pool.pings, pool.reconnects) == (1, 0)
+
+    clock[0] += 150
+    assert manager.connect()
+    renewed = manager.connection.connection_id
+    manager.close()
+    assert pool.reconnects == 1
+    assert renewed != first
+    assert first not in manager._pool_stats
+    assert manager._pool_stats[renewed]["born"] == clock[0]
+
+
+def test_pool_disabled_uses_direct_connections(monkeypatch):
+    monkeypatch.setenv("MYSQL_POOL_SIZE", "0")
+    monkeypatch.setattr(DatabaseManager, "_ensure_database_and_table", lambda self: None)
+
+    def refuse(**config):
+        raise mysql.connector.errors.InterfaceError("sin servidor")
+
+    monkeypatch.setattr(database_manager.mysql.connector, "connect", refuse)
+    manager = DatabaseManager()
+    assert not manager.connect()
+    assert manager.connection is None
@@ -0,0 +1,83 @@
+import numpy as np
+
+from back.embedding_cache import EmbeddingCache
+
+
+def _vec(seed, dim=8):
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+
+
+def test_memory_lru_eviction_falls_back_to_disk(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "modelo", max_memory_entries=2, max_disk_entries=16)
+    for i in range(3):
+        cache.put(f"texto {i}", _vec(i))
+    assert cache.stats()["memory_entries"] == 2
+
+    np.testing.assert_array_equal(cache.get("texto 0"), _vec(0))
+    assert (cache.hits_memory, cache.hits_disk) == (0, 1)
+    # El texto se normaliza antes de calcular la clave
+    np.testing.assert_array_equal(cache.get("  texto\n2 "), _vec(2))
+    assert cache.hits_memory == 1
+    assert cache.get("otro") is None
+    assert cache.misses == 1
+
+
+def test_reload_sees_only_flushed_entries(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "modelo", meta_every=3, max_disk_entries=16)
+    cache.put_many(["a", "b"], [_vec(1), _vec(2)])
+    # Aún sin meta.json al día: al reabrir, esas entradas no cuentan
+    assert EmbeddingCache(str(tmp_path), "modelo", max_disk_entries=16).get("a") is None
+
+    cache.put("c", _vec(3))
+    reopened = EmbeddingCache(str(tmp_path), "modelo", max_disk_entries=16)
+    assert reopened.stats()["disk_entries"] == 3
+    np.testing.assert_array_equal(reopened.get("b"), _vec(2))
+    assert reopened.hits_disk == 1
+
+    cache.put("d", _vec(4))
+    cache.flush()
+    np.testing.assert_array_equal(EmbeddingCache(str(tmp_path), "modelo", max_disk_entries=16).get("d"), _vec(4))
+
+
+def test_ring_overwrites_oldest_entries(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "modelo", max_memory_entries=1, max_disk_entries=4)
+    for i in range(6):
+        cache.put(f"t{i}", _vec(i))
+    assert cache.stats()["disk_entries"] == 4
+    assert cache.get("t0") is None and cache.get("t1") is None
+    for i in range(2, 6):
+        np.testing.assert_array_equal(cache.get(f"t{i}"), _vec(i))
+
+    cache.flush()
+    reopened = EmbeddingCache(str(tmp_path), "modelo", max_disk_entries=4)
+    assert reopened.get("t1") is None
+    np.testing.assert_array_equal(reopened.get("t2"), _vec(2))
+
+
+def test_torn_slot_is_a_miss(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "modelo", max_disk_entries=8)
+    cache.put_many(["a", "b"], [_vec(1), _vec(2)])
+    cache.flush()
+    # Simula una caída a mitad de escribir el vector del hueco 0
+    cache._vectors[0, :4] = 0
+    cache._vectors.flush()
+
+    reopened = EmbeddingCache(str(tmp_path), "modelo", max_disk_entries=8)
+    assert reopened.get("a") is None
+    assert reopened.misses == 1
+    np.testing.assert_array_equal(reopened.get("b"), _vec(2))
+
+
+def test_other_model_or_dimension_starts_empty(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "modelo", max_disk_entries=8)
+    cache.put("a", _vec(1))
+    cache.flush()
+    assert EmbeddingCache(str(tmp_path), "otro-modelo", max_disk_entries=8).get("a") is None
+    assert EmbeddingCache(str(tmp_path), "modelo", max_disk_entries=16).get("a") is None
+
+    cache.put("b", _vec(2, dim=12))
+    cache.flush()
+    assert cache.dim == 12
+    reopened = EmbeddingCache(str(tmp_path), "modelo", max_disk_entries=8)
+    assert reopened.get("a") is None
+    np.testing.assert_array_equal(reopened.get("b"), _vec(2, dim=12))
@@ -0,0 +1,90 @@
+import json
+
+import numpy as np
+import pytest
+
+from back.embedding_codec import (
+    HEADER, decode_embedding, decode_embedding_matrix, decode_embedding_rows, encode_embedding
+)
+
+
+def test_round_trip_float32():
+    vec = np.random.default_rng(0).standard_normal(384).astype(np.float32)
+    blob = encode_embedding(vec)
+    assert len(blob) == HEADER.size + 384 * 4
+    decoded = decode_embedding(blob)
+    assert decoded.dtype == np.float32
+    np.testing.assert_array_equal(decoded, vec)
+
+
+def test_round_trip_float16():
+    vec = np.random.default_rng(1).standard_normal(64).astype(np.float32)
+    blob = encode_embedding(vec, dtype="float16")
+    assert len(blob) == HEADER.size + 64 * 2
+    decoded = decode_embedding(blob)
+    assert decoded.dtype == np.float32
+    np.testing.assert_allclose(decoded, vec, rtol=1e-3, atol=1e-3)
+
+
+def test_empty_and_invalid():
+    assert encode_embedding(None) is None
+    assert encode_embedding([]) is None
+    assert decode_embedding(None) is None
+    assert decode_embedding(b"") is None
+    with pytest.raises(ValueError):
+        encode_embedding([1.0], dtype="float64")
+    with pytest.raises(ValueError):
+        decode_embedding(b"\x09\x00\x01\x00" + b"\x00" * 4)
+
+
+def test_matrix_with_mixed_headers():
+    rng = np.random.default_rng(2)
+    vectors = rng.standard_normal((3, 16)).astype(np.float32)
+    same = [encode_embedding(v) for v in vectors]
+    np.testing.assert_array_equal(decode_embedding_matrix(same), vectors)
+
+    mixed = [encode_embedding(vectors[0]), encode_embedding(vectors[1], dtype="float16"), encode_embedding(vectors[2])]
+    matrix = decode_embedding_matrix(mixed)
+    assert matrix.shape == (3, 16)
+    np.testing.assert_allclose(matrix, vectors, rtol=1e-3, atol=1e-3)
+    assert decode_embedding_matrix([]).shape == (0, 0)
+
+
+def test_rows_with_legacy_json():
+    rng = np.random.default_rng(3)
+    vectors = rng.standard_normal((4, 8)).astype(np.float32)
+    rows = [
+        (1, encode_embedding(vectors[0]), None),
+        (2, None, json.dumps(vectors[1].tolist())),
+        (3, encode_embedding(vectors[2]), None),
+        (4, None, json.dumps(vectors[3].tolist()).encode("utf-8")),
+    ]
+    keys, matrix = decode_embedding_rows(rows)
+    # Primero los blobs y después las filas JSON sin migrar
+    assert keys == [1, 3, 2, 4]
+    np.testing.assert_allclose(matrix, vectors[[0, 2, 1, 3]], rtol=1e-6)
+
+
+def test_rows_without_embedding_are_skipped():
+    vec = np.arange(4, dtype=np.float32)
+    keys, matrix = decode_embedding_rows([(1, None, None), (2, encode_embedding(vec), None), (3, b"", None)])
+    assert keys == [2]
+    np.testing.assert_array_equal(matrix, vec[None, :])
+    keys, matrix = decode_embedding_rows([(1, None, None)])
+    assert keys == [] and matrix.shape == (0, 0)
+
+
+def test_rows_skip_other_dimensions_and_empty():
+    rng = np.random.default_rng(4)
+    rows = [
+        (1, encode_embedding(rng.standard_normal(8)), None),
+        (2, encode_embedding(rng.standard_normal(12)), None),
+        (3, None, json.dumps(rng.standard_normal(12).tolist())),
+        (4, None, "[]"),
+    ]
+    keys, matrix = decode_embedding_rows(rows)
+    assert keys == [1]
+    assert matrix.shape == (1, 8)
+
+    keys, matrix = decode_embedding_rows([])
+    assert keys == [] and matrix.shape == (0, 0)
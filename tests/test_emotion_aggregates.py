@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import Counter
+from datetime import date
+
+
+def _daily(service):
+    return {(a["date"], a["emotion"]): a["count"] for a in service.db_manager.fetch_emotion_aggregates()}
+
+
+def _wait_until_drained(service, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if service.enrichment_queue.stats() == {"pending": 0, "running": 0, "failed": 0}:
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_save_updates_daily_counts(make_service):
+    service = make_service(DREAMS_LOCAL_EMOTION="0")
+    today = date.today().isoformat()
+    assert service.get_visual_metrics()[0] == "No hay sueños registrados."
+
+    emotions = [service.process_and_save_dream(f"Sueño {i}", f"texto {i} del mar", "Poema")[0] for i in range(3)]
+    assert _daily(service) == {(today, e): n for e, n in Counter(emotions).items()}
+
+    version = service.get_metrics_version()
+    emotion = service.process_and_save_dream("Otro", "un lobo en el bosque", "Poema")[0]
+    assert _daily(service)[(today, emotion)] == Counter(emotions)[emotion] + 1
+    assert service.get_metrics_version() != version
+
+    emotion_counts, evolution, _ = service.get_visual_metrics()
+    assert sum(emotion_counts.values()) == 4
+    assert sum(n for _, _, n in evolution) == 4
+
+
+def test_deferred_enrichment_moves_count_from_indefinida(make_service, monkeypatch):
+    service = make_service(DREAMS_DEFERRED_ENRICHMENT="1", DREAMS_LOCAL_EMOTION="0")
+    today = date.today().isoformat()
+    # Las peticiones a la IA esperan hasta comprobar los conteos previos al enriquecimiento
+    release = threading.Event()
+    provider = service.client
+    real_chat = provider.chat
+
+    def chat(*args, **kwargs):
+        assert release.wait(10)
+        return real_chat(*args, **kwargs)
+
+    monkeypatch.setattr(provider, "chat", chat)
+
+    for i in range(3):
+        assert service.process_and_save_dream(f"Sueño {i}", f"texto {i} del mar", "Poema")[0] == "Pendiente"
+    assert _daily(service) == {(today, "Indefinida"): 3}
+    version = service.get_metrics_version()
+
+    release.set()
+    assert _wait_until_drained(service)
+    daily = _daily(service)
+    assert (today, "Indefinida") not in daily
+    assert sum(daily.values()) == 3
+    assert all(emotion in service.EMOTION_CATEGORIES for _, emotion in daily)
+    assert service.get_metrics_version() != version
+
+    # Lo mismo que reconstruir los conteos desde cero
+    assert service.db_manager.rebuild_emotion_aggregates()
+    assert _daily(service) == daily
@@ -0,0 +1,138 @@
+import numpy as np
+
+from back.emotion_classifier import EmotionClassifier
+
+LABELS = ["Alegría", "Tristeza", "Miedo"]
+
+
+def _samples(per_label=6, dim=16, seed=0, labels=LABELS):
+    """Ejemplos alrededor de un eje distinto por etiqueta."""
+    rng = np.random.default_rng(seed)
+    vectors, emotions = [], []
+    for i, label in enumerate(labels):
+        axis = np.zeros(dim, dtype=np.float32)
+        axis[i] = 1.0
+        for _ in range(per_label):
+            vectors.append(axis + 0.05 * rng.standard_normal(dim).astype(np.float32))
+            emotions.append(label)
+    return np.array(vectors), emotions
+
+
+def _axis(i, dim=16):
+    vec = np.zeros(dim, dtype=np.float32)
+    vec[i] = 1.0
+    return vec
+
+
+def test_fit_predicts_each_label():
+    classifier = EmotionClassifier(LABELS)
+    vectors, emotions = _samples()
+    classifier.fit(vectors, emotions)
+    assert classifier.n_samples == 18
+    for i, label in enumerate(LABELS):
+        emotion, confidence = classifier.predict(_axis(i))
+        assert emotion == label
+        assert confidence > 0.99
+
+
+def test_fit_ignores_unknown_labels():
+    classifier = EmotionClassifier(LABELS, min_samples_per_label=1)
+    vectors, emotions = _samples(per_label=2)
+    classifier.fit(vectors, ["Indefinida"] * 2 + emotions[2:])
+    assert classifier.n_samples == 4
+    # "Alegría" se quedó sin ejemplos: el clasificador no decide
+    assert classifier.predict(_axis(1))[0] is None
+
+
+def test_abstains_until_every_label_is_trained():
+    classifier = EmotionClassifier(LABELS, min_samples_per_label=5)
+    vectors, emotions = _samples(labels=LABELS[:2])
+    classifier.fit(vectors, emotions)
+    # Un sueño de Miedo caería en la etiqueta conocida más cercana con confianza alta
+    emotion, confidence = classifier.predict(_axis(0) + 0.5 * _axis(2))
+    assert emotion is None
+    assert confidence > 0.6
+
+    for _ in range(4):
+        assert classifier.partial_fit(_axis(2), "Miedo")
+    assert classifier.predict(_axis(2))[0] is None
+    assert classifier.partial_fit(_axis(2), "Miedo")
+    assert classifier.predict(_axis(2))[0] == "Miedo"
+
+
+def test_low_confidence_returns_none():
+    classifier = EmotionClassifier(LABELS, min_confidence=0.6)
+    vectors, emotions = _samples()
+    classifier.fit(vectors, emotions)
+    # A medio camino entre dos centroides ninguno llega al umbral
+    emotion, confidence = classifier.predict(_axis(0) + _axis(1))
+    assert emotion is None
+    assert 0.3 < confidence < 0.6
+    assert classifier.predict(None) == (None, 0.0)
+    assert classifier.predict(np.ones(5)) == (None, 0.0)
+
+
+def test_partial_fit_rejects_bad_input():
+    classifier = EmotionClassifier(LABELS)
+    assert not classifier.partial_fit(_axis(0), "Indefinida")
+    assert not classifier.partial_fit(None, "Miedo")
+    assert classifier.partial_fit(_axis(0), "Alegría")
+    assert not classifier.partial_fit(np.ones(5), "Alegría")
+    assert classifier.n_samples == 1
+
+
+def test_partial_fit_matches_fit():
+    vectors, emotions = _samples()
+    batch = EmotionClassifier(LABELS)
+    batch.fit(vectors, emotions)
+    incremental = EmotionClassifier(LABELS)
+    for vec, emotion in zip(vectors, emotions):
+        incremental.partial_fit(vec, emotion)
+    query = _axis(1) + 0.3 * _axis(0)
+    assert incremental.predict(query)[0] == batch.predict(query)[0]
+    np.testing.assert_allclose(incremental.predict(query)[1], batch.predict(query)[1], rtol=1e-5)
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "classifier.npz")
+    classifier = EmotionClassifier(LABELS, path=path)
+    classifier.save()
+    assert not (tmp_path / "classifier.npz").exists()
+    vectors, emotions = _samples()
+    classifier.fit(vectors, emotions)
+    classifier.save()
+
+    loaded = EmotionClassifier(LABELS, path=path)
+    assert loaded.load()
+    assert loaded.n_samples == 18
+    assert loaded.predict(_axis(1)) == classifier.predict(_axis(1))
+
+    assert not EmotionClassifier(LABELS + ["Ira"], path=path).load()
+    assert not EmotionClassifier(LABELS, path=str(tmp_path / "no_existe.npz")).load()
+    (tmp_path / "roto.npz").write_bytes(b"no es un npz")
+    assert not EmotionClassifier(LABELS, path=str(tmp_path / "roto.npz")).load()
+
+
+def test_service_trains_only_on_llm_labels(service):
+    db = service.db_manager
+    rng = np.random.default_rng(5)
+    for i, label in enumerate(service.EMOTION_CATEGORIES):
+        for _ in range(5):
+            db.save_dream("ia", "texto", label, _axis(i, 64) + 0.05 * rng.standard_normal(64), emotion_source="ia")
+        # Predicciones del propio clasificador y etiquetas sin origen conocido
+        db.save_dream("local", "texto", label, _axis(i, 64), emotion_source="local")
+        db.save_dream("antiguo", "texto", label, _axis(i, 64))
+
+    classifier = service._load_emotion_classifier()
+    assert classifier.n_samples == 5 * len(service.EMOTION_CATEGORIES)
+    assert classifier.predict(_axis(2, 64))[0] == service.EMOTION_CATEGORIES[2]
+
+
+def test_saved_dreams_record_emotion_source(make_service):
+    service = make_service(DREAMS_LOCAL_EMOTION="0")
+    service.process_and_save_dream("Mar", "Nadaba en un mar tranquilo", "Poema")
+    dream_id = service.db_manager.fetch_dreams_page(limit=1)[0]["id"]
+    emotions, _ = service.db_manager.fetch_labeled_embeddings(service.EMOTION_CATEGORIES, source="ia")
+    row = service.db_manager._query("SELECT emotion_tag, emotion_source FROM dreams WHERE id = ?", (dream_id,))[0]
+    assert row["emotion_source"] == "ia"
+    assert emotions == [row["emotion_tag"]]
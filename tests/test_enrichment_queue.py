@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+
+from back.enrichment_queue import EnrichmentQueue, EnrichmentWorkerPool
+
+
+@pytest.fixture
+def no_jitter(monkeypatch):
+    monkeypatch.setattr("back.enrichment_queue.random.uniform", lambda a, b: b)
+
+
+def _task_row(queue, dream_id, task):
+    return queue._conn.execute(
+        "SELECT status, attempts, next_attempt_at, last_error FROM enrichment_tasks WHERE dream_id = ? AND task = ?",
+        (dream_id, task)
+    ).fetchone()
+
+
+def test_enqueue_is_idempotent_and_claims_in_order(tmp_path):
+    queue = EnrichmentQueue(str(tmp_path / "queue.sqlite"))
+    queue.enqueue(1, ["emotion", "creative"])
+    queue.enqueue(1, ["emotion"])
+    assert queue.stats() == {"pending": 2, "running": 0, "failed": 0}
+
+    claimed = {queue.claim()[:2], queue.claim()[:2]}
+    assert claimed == {(1, "emotion"), (1, "creative")}
+    assert queue.claim() is None
+    assert queue.stats()["running"] == 2
+
+    queue.complete(1, "emotion")
+    assert queue.stats() == {"pending": 0, "running": 1, "failed": 0}
+
+
+def test_exponential_backoff_with_cap(tmp_path, no_jitter):
+    queue = EnrichmentQueue(str(tmp_path / "queue.sqlite"), max_attempts=10, base_delay=2.0, max_delay=10.0)
+    queue.enqueue(7, ["analysis"])
+    delays = []
+    for _ in range(5):
+        before = time.time()
+        assert queue.fail(7, "analysis", RuntimeError("429"))
+        delays.append(_task_row(queue, 7, "analysis")[2] - before)
+    assert [round(d) for d in delays] == [2, 4, 8, 10, 10]
+
+    status, attempts, _, last_error = _task_row(queue, 7, "analysis")
+    assert (status, attempts, last_error) == ("pending", 5, "429")
+    # Todavía no toca: claim no la devuelve y seconds_until_next indica la espera
+    assert queue.claim() is None
+    assert 0 < queue.seconds_until_next() <= 10
+
+
+def test_retry_cap_marks_failed_and_retry_failed_requeues(tmp_path):
+    queue = EnrichmentQueue(str(tmp_path / "queue.sqlite"), max_attempts=3, base_delay=0)
+    queue.enqueue(3, ["creative"])
+    results = []
+    for _ in range(3):
+        assert queue.claim()[:2] == (3, "creative")
+        results.append(queue.fail(3, "creative", "error"))
+    assert results == [True, True, False]
+    assert queue.stats() == {"pending": 0, "running": 0, "failed": 1}
+    assert queue.claim() is None
+    assert queue.seconds_until_next() is None
+
+    assert queue.retry_failed() == 1
+    assert queue.claim() == (3, "creative", 0)
+
+
+def test_running_tasks_recover_after_restart(tmp_path):
+    path = str(tmp_path / "queue.sqlite")
+    queue = EnrichmentQueue(path)
+    queue.enqueue(5, ["enrichment"])
+    assert queue.claim() is not None
+    assert queue.stats()["running"] == 1
+
+    reopened = EnrichmentQueue(path)
+    assert reopened.stats() == {"pending": 1, "running": 0, "failed": 0}
+    assert reopened.claim() == (5, "enrichment", 0)
+
+
+def test_worker_pool_retries_until_success(tmp_path):
+    queue = EnrichmentQueue(str(tmp_path / "queue.sqlite"), base_delay=0.01, max_delay=0.05)
+    calls = []
+    done = threading.Event()
+
+    def handler(dream_id, task):
+        calls.append((dream_id, task))
+        if len(calls) < 3:
+            raise RuntimeError("fallo temporal")
+        done.set()
+
+    queue.enqueue(9, ["emotion"])
+    pool = EnrichmentWorkerPool(queue, handler, workers=1, idle_wait=0.05)
+    try:
+        pool.notify()
+        assert done.wait(5)
+    finally:
+        pool.stop()
+    deadline = time.time() + 5
+    while queue.stats()["running"] and time.time() < deadline:
+        time.sleep(0.01)
+    assert calls == [(9, "emotion")] * 3
+    assert queue.stats() == {"pending": 0, "running": 0, "failed": 0}
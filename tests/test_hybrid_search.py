@@ -0,0 +1,43 @@
+import pytest
+
+from back.ia_services import IAService
+
+
+def test_rrf_fuses_ranked_lists(service, monkeypatch):
+    contents = {}
+    for name in ("uno", "dos", "tres", "cuatro"):
+        dream_id = service.db_manager.save_dream(name, f"texto del sueño {name}", "Calma", None)
+        contents[name] = dream_id
+    one, two, three, four = contents.values()
+    monkeypatch.setattr(service.db_manager, "search_fulltext", lambda query, limit: [(one, 9.0), (two, 5.0), (three, 1.0)])
+    service.vector_index = type("Index", (), {"search": lambda self, q, k: [(three, 0.9), (one, 0.8), (four, 0.1)]})()
+
+    rows = service.hybrid_search("sueño", rrf_k=60)
+    # uno: 1/61 + 1/62 > tres: 1/63 + 1/61 > dos: 1/62 > cuatro: 1/63
+    assert [r["id"] for r in rows] == [one, three, two, four]
+    assert rows[0]["score"] == pytest.approx(1 / 61 + 1 / 62)
+    assert rows[1]["score"] == pytest.approx(1 / 63 + 1 / 61)
+    assert [r["sources"] for r in rows] == [["texto", "semántica"], ["texto", "semántica"], ["texto"], ["semántica"]]
+    assert all("content" not in r and r["snippet"] for r in rows)
+
+    assert [r["id"] for r in service.hybrid_search("sueño", top_k=2)] == [one, three]
+    assert service.hybrid_search("   ") == []
+
+
+def test_hybrid_search_end_to_end(service):
+    dreams = {
+        "Lobo": "Un lobo gris me seguía por el bosque nevado",
+        "Mar": "Nadaba en un mar tranquilo bajo la luna",
+        "Tren": "Perdía el tren y la estación estaba vacía",
+    }
+    ids = {}
+    for title, content in dreams.items():
+        emotion, creative, analysis = service.process_and_save_dream(title, content, "Poema")
+        assert emotion in IAService.EMOTION_CATEGORIES + ["Indefinida"]
+        assert creative and analysis
+        ids[title] = service.db_manager.fetch_dreams_page(limit=1)[0]["id"]
+
+    rows = service.hybrid_search("lobo en el bosque")
+    assert rows[0]["id"] == ids["Lobo"]
+    assert rows[0]["sources"] == ["texto", "semántica"]
+    assert "lobo" in rows[0]["snippet"].lower()
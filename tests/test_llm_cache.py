@@ -0,0 +1,58 @@
+import time
+
+from back.llm_cache import LLMCache
+
+
+def test_key_normalizes_text_and_format():
+    key = LLMCache.make_key("m", "v1", "Soñé  con\tel mar\n", 0.7, "JSON ")
+    assert key == LLMCache.make_key("m", "v1", "Soñé con el mar", 0.70001, "json")
+    # La misma letra compuesta y descompuesta (NFD) da la misma clave
+    assert key == LLMCache.make_key("m", "v1", "Soñé con el mar", 0.7, "json")
+    assert key != LLMCache.make_key("m", "v2", "Soñé con el mar", 0.7, "json")
+    assert key != LLMCache.make_key("m", "v1", "Soñé con el mar", 0.2, "json")
+
+
+def test_memory_lru_eviction_falls_back_to_disk(tmp_path):
+    cache = LLMCache(str(tmp_path / "llm.sqlite"), max_memory_entries=2)
+    for name in "abc":
+        cache.set(name, name.upper())
+    assert cache.stats()["memory_entries"] == 2
+
+    assert cache.get("a") == "A"
+    assert (cache.hits_memory, cache.hits_disk) == (0, 1)
+    assert cache.get("c") == "C"
+    assert cache.hits_memory == 1
+    assert cache.get("zzz") is None
+    assert cache.misses == 1
+
+
+def test_reload_from_disk(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    cache = LLMCache(path)
+    cache.set("k", "valor")
+    cache.set("nada", None)
+
+    reopened = LLMCache(path)
+    assert reopened.stats()["disk_entries"] == 1
+    assert reopened.get("k") == "valor"
+    assert reopened.hits_disk == 1
+    assert reopened.get("k") == "valor"
+    assert reopened.hits_memory == 1
+
+
+def test_ttl_expiry(tmp_path, monkeypatch):
+    cache = LLMCache(str(tmp_path / "llm.sqlite"), ttl_seconds=10)
+    cache.set("k", "valor")
+    now = time.time()
+    monkeypatch.setattr("back.llm_cache.time.time", lambda: now + 60)
+    assert cache.get("k") is None
+    assert LLMCache(str(tmp_path / "llm.sqlite"), ttl_seconds=10).get("k") is None
+
+
+def test_disk_prune_keeps_most_recent(tmp_path):
+    cache = LLMCache(str(tmp_path / "llm.sqlite"), max_memory_entries=1, max_disk_entries=50)
+    for i in range(100):
+        cache.set(f"k{i}", str(i))
+    assert cache.stats()["disk_entries"] == 50
+    assert cache.get("k99") == "99"
+    assert cache.get("k0") is None
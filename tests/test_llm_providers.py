@@ -0,0 +1,118 @@
+import json
+
+import pytest
+
+from back.fake_llm_server import FakeLLMConfig, start_in_thread
+from back.llm_providers import LLMProvider, OpenAIChatProvider, provider_from_env
+
+MESSAGES = [{"role": "system", "content": "Eres un artista."}, {"role": "user", "content": "Un mar tranquilo"}]
+
+
+def _local(server, **kwargs):
+    return OpenAIChatProvider("fake", api_key="local", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1", **kwargs)
+
+
+class EchoProvider(LLMProvider):
+    model = "eco"
+
+    def __init__(self):
+        self.calls = []
+
+    def chat(self, messages, temperature, on_token=None, **request):
+        self.calls.append(messages)
+        reply = f"eco: {messages[-1]['content']}"
+        if on_token:
+            for word in reply.split(" "):
+                on_token(word + " ")
+        return reply
+
+
+def test_provider_interface_is_abstract():
+    with pytest.raises(TypeError):
+        LLMProvider()
+
+    class Incomplete(LLMProvider):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    assert EchoProvider().cache_id == "eco"
+
+
+def test_provider_from_env(monkeypatch):
+    for name in ("DREAMS_LLM_PROVIDER", "DREAMS_LLM_MODEL", "DREAMS_LLM_BASE_URL", "DREAMS_LLM_TIMEOUT", "DREAMS_LLM_MAX_RETRIES"):
+        monkeypatch.delenv(name, raising=False)
+    default = provider_from_env()
+    assert isinstance(default, OpenAIChatProvider)
+    assert (default.model, default.base_url, default.cache_id) == ("gpt-4o", None, "gpt-4o")
+
+    monkeypatch.setenv("DREAMS_LLM_PROVIDER", "LOCAL")
+    monkeypatch.setenv("DREAMS_LLM_MODEL", "fake")
+    monkeypatch.setenv("DREAMS_LLM_TIMEOUT", "5")
+    monkeypatch.setenv("DREAMS_LLM_MAX_RETRIES", "0")
+    local = provider_from_env()
+    assert local.base_url == "http://127.0.0.1:8089/v1"
+    assert local.cache_id == "fake@http://127.0.0.1:8089/v1"
+    assert (local._timeout, local._max_retries) == (5.0, 0)
+
+    monkeypatch.setenv("DREAMS_LLM_PROVIDER", "otro")
+    with pytest.raises(ValueError):
+        provider_from_env()
+
+
+def test_chat_against_fake_server(fake_llm):
+    provider = _local(fake_llm)
+    reply = provider.chat(MESSAGES, temperature=0.8, max_tokens=50)
+    assert reply and reply == provider.chat(MESSAGES, temperature=0.8, max_tokens=50)
+
+    tokens = []
+    streamed = provider.chat(MESSAGES, temperature=0.8, on_token=tokens.append, max_tokens=50)
+    assert len(tokens) > 1
+    assert streamed == "".join(tokens) == reply
+    assert fake_llm.config.requests == 3
+
+
+def test_structured_response(fake_llm):
+    schema = {"type": "object", "properties": {"emotion": {"type": "string", "enum": ["Calma"]},
+                                                "symbols": {"type": "array", "items": {"type": "string"}}}}
+    reply = _local(fake_llm).chat(
+        MESSAGES, temperature=0.4,
+        response_format={"type": "json_schema", "json_schema": {"name": "t", "strict": True, "schema": schema}}
+    )
+    data = json.loads(reply)
+    assert data["emotion"] == "Calma" and isinstance(data["symbols"], list)
+
+
+@pytest.mark.parametrize("config, error", [
+    (FakeLLMConfig(latency=0, jitter=0, error_rate=1.0), "InternalServerError"),
+    (FakeLLMConfig(latency=0, jitter=0, rate_limit_rate=1.0), "RateLimitError"),
+])
+def test_server_errors_raise(config, error):
+    server = start_in_thread(config=config)
+    try:
+        with pytest.raises(Exception) as exc_info:
+            _local(server, max_retries=0).chat(MESSAGES, temperature=0.8)
+        assert type(exc_info.value).__name__ == error
+        assert config.requests == config.errors == 1
+    finally:
+        server.shutdown()
+
+
+def test_service_uses_any_provider(make_service):
+    service = make_service(DREAMS_LLM_CACHE="1")
+    provider = EchoProvider()
+    service._client = provider
+    tokens = []
+    creative = service.generate_creative("Un mar tranquilo", "Poema", on_token=tokens.append)
+    assert creative.startswith("eco: ") and "".join(tokens).strip() == creative
+    assert service.generate_creative("Un mar tranquilo", "Cómic") == "Formato creativo no soportado."
+    assert len(provider.calls) == 1
+
+    # La caché de respuestas se separa por proveedor (cache_id)
+    assert service.generate_creative("Un mar tranquilo", "Poema") == creative
+    assert len(provider.calls) == 1
+    other = EchoProvider()
+    other.model = "otro-eco"
+    service._client = other
+    service.generate_creative("Un mar tranquilo", "Poema")
+    assert len(other.calls) == 1
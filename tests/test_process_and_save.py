@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+
+def _wrap_chat(service, monkeypatch, before):
+    # before(mensajes) se ejecuta en el hilo de cada llamada al proveedor, antes de la petición real
+    provider = service.client
+    real_chat = provider.chat
+
+    def chat(messages, temperature, on_token=None, **request):
+        before(messages)
+        return real_chat(messages, temperature, on_token=on_token, **request)
+
+    monkeypatch.setattr(provider, "chat", chat)
+
+
+def _kind(messages):
+    system = messages[0]["content"]
+    if "artista" in system:
+        return "creative"
+    if "analista" in system:
+        return "emotion"
+    return "analysis"
+
+
+def test_stages_are_reported_in_dependency_order(service):
+    stages = []
+    lock = threading.Lock()
+
+    def on_progress(stage):
+        with lock:
+            stages.append(stage)
+
+    emotion, creative, analysis = service.process_and_save_dream("Mar", "Nadaba en un mar tranquilo", "Poema", on_progress=on_progress)
+    assert emotion in service.EMOTION_CATEGORIES
+    assert creative and analysis
+    assert sorted(stages) == sorted(["embedding", "emotion", "creative", "analysis", "persisted"])
+    assert stages.index("embedding") < stages.index("emotion")
+    assert stages[-1] == "persisted"
+
+
+def test_llm_calls_run_concurrently(service, monkeypatch):
+    # Las tres peticiones solo pasan la barrera si están en vuelo a la vez
+    barrier = threading.Barrier(3, timeout=5)
+    seen = []
+    _wrap_chat(service, monkeypatch, lambda messages: (seen.append(_kind(messages)), barrier.wait()))
+
+    emotion, creative, analysis = service.process_and_save_dream("Mar", "Nadaba en un mar tranquilo", "Poema")
+    assert sorted(seen) == ["analysis", "creative", "emotion"]
+    assert emotion in service.EMOTION_CATEGORIES
+    assert "Error" not in creative and "Error" not in analysis
+
+
+def test_creative_tokens_are_streamed(service):
+    tokens = []
+    _, creative, _ = service.process_and_save_dream("Mar", "Nadaba en un mar tranquilo", "Poema", on_creative_token=tokens.append)
+    assert len(tokens) > 1
+    assert "".join(tokens).strip() == creative
+
+
+@pytest.mark.parametrize("failing", ["creative", "analysis", "emotion"])
+def test_failing_call_does_not_sink_the_others(service, monkeypatch, failing):
+    def before(messages):
+        if _kind(messages) == failing:
+            raise RuntimeError("fallo simulado")
+
+    _wrap_chat(service, monkeypatch, before)
+    emotion, creative, analysis = service.process_and_save_dream("Mar", "Nadaba en un mar tranquilo", "Poema")
+
+    results = {"emotion": emotion, "creative": creative, "analysis": analysis}
+    assert "fallo simulado" in results[failing] or results[failing] == "Error_IA"
+    for kind, value in results.items():
+        if kind != failing:
+            assert "Error" not in value
+
+    dream = service.db_manager.fetch_dreams_page(limit=1)[0]
+    saved = service.db_manager.fetch_dream_by_id(dream["id"])
+    assert saved["creative_text"] == creative
+    assert saved["analysis_text"] == analysis
+    assert saved["emotion_tag"] == emotion
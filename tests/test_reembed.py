@@ -0,0 +1,142 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from back import reembed
+from back.reembed import EmbeddingBackfill
+from back.sqlite_database_manager import SQLiteDatabaseManager
+from conftest import HashingEmbedder
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NEW = "modelo-nuevo"
+
+
+@pytest.fixture
+def manager(data_dir):
+    db = SQLiteDatabaseManager(str(data_dir / "dreams.sqlite"))
+    db.save_dreams_bulk([
+        {"title": f"s{i}", "content": f"sueño {i} con el mar y un lobo {'tren ' * (i % 3)}",
+         "embedding": np.ones(4), "embedding_model_version": "modelo-viejo"}
+        for i in range(10)
+    ])
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def in_process_model(monkeypatch):
+    # workers=0 codifica en este proceso: el modelo de sentence-transformers se sustituye por HashingEmbedder
+    monkeypatch.setattr(reembed, "_init_worker", lambda model_name, threads: setattr(reembed, "_worker_model", HashingEmbedder()))
+
+
+def _backfill(manager, data_dir, **kwargs):
+    kwargs.setdefault("workers", 0)
+    kwargs.setdefault("chunk_size", 3)
+    return EmbeddingBackfill(manager, "modelo", NEW, str(data_dir / "reembed.json"), **kwargs)
+
+
+def test_run_rewrites_every_stale_embedding(manager, data_dir, in_process_model):
+    backfill = _backfill(manager, data_dir)
+    assert backfill.status()["pending"] == 10
+    assert backfill.run() == 10
+    assert manager.count_stale_embeddings(NEW) == 0
+    assert not os.path.exists(backfill.checkpoint_path)
+    ids, vectors = manager.fetch_all_embeddings(model_version=NEW)
+    assert vectors.shape == (10, HashingEmbedder.dim)
+    assert backfill.run() == 0
+
+
+def test_interrupted_run_raises_and_resumes_from_checkpoint(manager, data_dir, in_process_model, monkeypatch):
+    backfill = _backfill(manager, data_dir)
+    update = manager.update_embeddings
+    calls = []
+
+    def failing_update(updates, model_version):
+        calls.append(len(updates))
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        return update(updates, model_version)
+
+    monkeypatch.setattr(manager, "update_embeddings", failing_update)
+    with pytest.raises(KeyboardInterrupt):
+        backfill.run()
+    checkpoint = backfill.load_checkpoint()
+    assert checkpoint["done"] == 6
+    assert manager.count_stale_embeddings(NEW) == 4
+    assert manager.count_stale_embeddings(NEW, checkpoint["last_id"]) == 4
+
+    monkeypatch.setattr(manager, "update_embeddings", update)
+    # Solo los que faltan: la ejecución continúa tras el último id guardado
+    assert backfill.run() == 4
+    assert manager.count_stale_embeddings(NEW) == 0
+    assert not os.path.exists(backfill.checkpoint_path)
+
+
+def test_failed_write_keeps_checkpoint(manager, data_dir, in_process_model, monkeypatch):
+    backfill = _backfill(manager, data_dir)
+    monkeypatch.setattr(manager, "update_embeddings", lambda updates, model_version: 0)
+    with pytest.raises(RuntimeError):
+        backfill.run()
+    assert backfill.load_checkpoint() == {}
+    assert manager.count_stale_embeddings(NEW) == 10
+
+
+def test_restart_ignores_checkpoint(manager, data_dir, in_process_model):
+    backfill = _backfill(manager, data_dir)
+    last_id = max(manager.fetch_all_embeddings()[0])
+    with open(backfill.checkpoint_path, "w", encoding="utf-8") as f:
+        json.dump({"model_version": NEW, "last_id": last_id, "done": 10}, f)
+    # El checkpoint dice que ya se terminó: sin --restart no se recalcula nada
+    assert backfill.run() == 0
+    assert manager.count_stale_embeddings(NEW) == 10
+
+    with open(backfill.checkpoint_path, "w", encoding="utf-8") as f:
+        json.dump({"model_version": NEW, "last_id": last_id, "done": 10}, f)
+    assert backfill.run(restart=True) == 10
+    assert manager.count_stale_embeddings(NEW) == 0
+
+
+def test_checkpoint_of_other_model_is_ignored(manager, data_dir, in_process_model):
+    backfill = _backfill(manager, data_dir)
+    with open(backfill.checkpoint_path, "w", encoding="utf-8") as f:
+        json.dump({"model_version": "otro", "last_id": 10 ** 6, "done": 1}, f)
+    assert backfill.load_checkpoint() == {}
+    assert backfill.run() == 10
+
+
+def test_process_pool(manager, data_dir, tmp_path, monkeypatch):
+    models = pytest.importorskip("sentence_transformers.models")
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models.tokenizer import WhitespaceTokenizer
+
+    # Modelo diminuto guardado en disco: los procesos del pool lo cargan con DREAMS_MODEL_DIR, sin red
+    vocab = ["sueño", "con", "el", "mar", "y", "un", "lobo", "tren"]
+    weights = np.random.default_rng(0).standard_normal((len(vocab), 8)).astype(np.float32)
+    word_embeddings = models.WordEmbeddings(tokenizer=WhitespaceTokenizer(vocab), embedding_weights=weights)
+    SentenceTransformer(modules=[word_embeddings, models.Pooling(8)], device="cpu").save(str(tmp_path / "model"))
+    monkeypatch.setenv("DREAMS_MODEL_DIR", str(tmp_path / "model"))
+
+    backfill = _backfill(manager, data_dir, workers=2)
+    assert backfill.run() == 10
+    assert manager.fetch_all_embeddings(model_version=NEW)[1].shape == (10, 8)
+
+
+def test_main_keeps_ann_index_after_interrupted_run(data_dir):
+    # Sin el modelo de embeddings el pool falla al arrancar: el índice no se borra y la salida es de error
+    ann = data_dir / "ann" / NEW
+    ann.mkdir(parents=True)
+    db = SQLiteDatabaseManager(str(data_dir / "dreams.sqlite"))
+    db.save_dream("s", "mar", None, np.ones(4), embedding_model_version="modelo-viejo")
+    db.close()
+    env = dict(os.environ, DREAMS_DB_ENGINE="sqlite", DREAMS_EMBEDDING_MODEL_VERSION=NEW,
+               DREAMS_MODEL_DIR=str(data_dir / "sin_modelo"), HF_HUB_OFFLINE="1")
+    result = subprocess.run([sys.executable, "-m", "back.reembed", "--workers", "0"], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 1
+    assert "Traceback" not in result.stderr
+    assert "Reinicia la aplicación" not in result.stdout
+    assert ann.exists()
@@ -0,0 +1,125 @@
+import threading
+
+from back.save_jobs import DreamJobQueue
+
+
+class Recorder:
+    """Listener que guarda los eventos y permite esperar al final de cada trabajo."""
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+        self._finished = threading.Condition(self._lock)
+
+    def __call__(self, job_id, event, payload):
+        with self._lock:
+            self.events.append((job_id, event, payload))
+            if event in ("done", "error"):
+                self._finished.notify_all()
+
+    def of(self, job_id):
+        with self._lock:
+            return [(event, payload) for j, event, payload in self.events if j == job_id]
+
+    def wait_finished(self, job_ids, timeout=10):
+        with self._lock:
+            return self._finished.wait_for(
+                lambda: all(any(j == job_id and e in ("done", "error") for j, e, _ in self.events) for job_id in job_ids),
+                timeout
+            )
+
+
+class BlockingService:
+    """IAService de mentira: cada sueño espera a `release` antes de terminar."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+
+    def process_and_save_dream(self, title, content, format, on_creative_token=None, on_progress=None):
+        self.started.release()
+        assert self.release.wait(10)
+        if title == "falla":
+            raise RuntimeError("fallo simulado")
+        on_creative_token("Un ")
+        on_creative_token("poema.")
+        on_progress("persisted")
+        return "Calma", "Un poema.", "{}"
+
+
+def test_submit_returns_none_when_full():
+    service = BlockingService()
+    jobs = DreamJobQueue(service, max_pending=2, workers=1)
+    listener = Recorder()
+
+    first = jobs.submit("a", "texto", "Poema", listener)
+    assert service.started.acquire(timeout=5)
+    # El trabajo en curso ya no ocupa sitio en la cola; caben dos más en espera
+    queued = [jobs.submit(t, "texto", "Poema", listener) for t in ("b", "c")]
+    assert jobs.pending() == 2
+    assert jobs.submit("d", "texto", "Poema", listener) is None
+    assert [j for j, e, _ in listener.events if e == "queued"] == [first] + queued
+
+    service.release.set()
+    assert listener.wait_finished([first] + queued)
+    assert len({first, *queued}) == 3
+    assert jobs.pending() == 0
+    assert jobs.submit("e", "texto", "Poema", listener) is not None
+
+
+def test_size_and_workers_from_env(monkeypatch):
+    monkeypatch.setenv("DREAMS_SAVE_QUEUE_SIZE", "1")
+    monkeypatch.setenv("DREAMS_SAVE_WORKERS", "3")
+    service = BlockingService()
+    jobs = DreamJobQueue(service)
+    assert len(jobs._threads) == 3
+    listener = Recorder()
+    # Con un hueco en la cola, cada envío espera a que un hilo libre recoja el anterior
+    for i in range(3):
+        assert jobs.submit(str(i), "texto", "Poema", listener) is not None
+        assert service.started.acquire(timeout=5)
+    assert jobs.submit("x", "texto", "Poema", listener) is not None
+    assert jobs.submit("y", "texto", "Poema", listener) is None
+    service.release.set()
+
+
+def test_events_per_job_and_error_isolation():
+    service = BlockingService()
+    service.release.set()
+    jobs = DreamJobQueue(service, workers=2)
+    listener = Recorder()
+
+    ok = jobs.submit("bien", "texto", "Poema", listener)
+    failing = jobs.submit("falla", "texto", "Poema", listener)
+    assert listener.wait_finished([ok, failing])
+
+    # "queued" lo emite submit() y "started" el hilo del trabajo: entre ellos no hay orden fijo
+    events = listener.of(ok)
+    assert sorted(events[:2]) == [("queued", None), ("started", None)]
+    assert events[2:] == [
+        ("token", ("creative", "Un ")), ("token", ("creative", "poema.")),
+        ("progress", "persisted"), ("done", ("Calma", "Un poema.", "{}")),
+    ]
+    events = listener.of(failing)
+    assert sorted(e for e, _ in events[:2]) == ["queued", "started"]
+    assert events[2][0] == "error" and len(events) == 3
+    assert str(events[-1][1]) == "fallo simulado"
+
+
+def test_progress_events_from_the_real_pipeline(service):
+    jobs = DreamJobQueue(service, workers=1)
+    listener = Recorder()
+    job_id = jobs.submit("Mar", "Nadaba en un mar tranquilo", "Poema", listener)
+    assert listener.wait_finished([job_id])
+
+    events = listener.of(job_id)
+    names = [e for e, _ in events]
+    assert sorted(names[:2]) == ["queued", "started"] and names[-1] == "done"
+    stages = [payload for e, payload in events if e == "progress"]
+    assert sorted(stages) == sorted(DreamJobQueue.STAGES)
+    assert stages[-1] == "persisted"
+    tokens = [payload for e, payload in events if e == "token"]
+    assert tokens and all(field == "creative" for field, _ in tokens)
+    emotion, creative, analysis = events[-1][1]
+    assert "".join(text for _, text in tokens).strip() == creative
+    assert emotion in service.EMOTION_CATEGORIES
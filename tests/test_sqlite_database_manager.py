@@ -0,0 +1,258 @@
+import ast
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from back.sqlite_database_manager import SQLiteDatabaseManager
+from back.text_terms import term_counts
+
+BACK_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "back")
+EMOTIONS = ["Alegría", "Miedo", "Tristeza", None]
+WORDS = ["mar", "bosque", "puerta", "ciudad", "tren", "lobo"]
+
+
+@pytest.fixture
+def manager(data_dir):
+    db = SQLiteDatabaseManager(str(data_dir / "dreams.sqlite"))
+    yield db
+    db.close()
+
+
+def _corpus(n=60):
+    rng = np.random.default_rng(0)
+    start = datetime(2024, 1, 30, 8, 0)
+    dreams = []
+    for i in range(n):
+        # Varios sueños comparten fecha exacta: el id desempata la paginación
+        date = start + timedelta(hours=int(i // 3) * 7)
+        content = " ".join(rng.choice(WORDS, size=6))
+        dreams.append({
+            "title": f"Sueño {i}", "content": content, "date_recorded": date,
+            "emotion": EMOTIONS[i % len(EMOTIONS)], "embedding": rng.standard_normal(8),
+        })
+    return dreams
+
+
+def _public_signatures(path, class_name):
+    tree = ast.parse(open(path, encoding="utf-8").read())
+    cls = next(node for node in tree.body if isinstance(node, ast.ClassDef) and node.name == class_name)
+    return {
+        f.name: ([a.arg for a in f.args.args], [ast.unparse(d) for d in f.args.defaults])
+        for f in cls.body
+        if isinstance(f, ast.FunctionDef) and not f.name.startswith("_") and f.name not in ("connect", "connection")
+    }
+
+
+def test_same_public_api_as_mysql_manager():
+    # Se compara el código fuente para no depender del conector de MySQL
+    mysql = _public_signatures(os.path.join(BACK_DIR, "database_manager.py"), "DatabaseManager")
+    sqlite = _public_signatures(os.path.join(BACK_DIR, "sqlite_database_manager.py"), "SQLiteDatabaseManager")
+    assert sqlite == mysql
+
+
+def test_keyset_pagination_walks_every_row_once(manager):
+    assert manager.save_dreams_bulk(_corpus()) == 60
+    expected = [(r["date_recorded"], r["id"]) for r in manager.fetch_dreams_page(limit=1000)]
+    assert expected == sorted(expected, reverse=True)
+    assert isinstance(expected[0][0], datetime)
+
+    pages, after = [], None
+    while True:
+        page = manager.fetch_dreams_page(after=after, limit=7)
+        if not page:
+            break
+        pages.append(page)
+        after = (page[-1]["date_recorded"], page[-1]["id"])
+    assert [(r["date_recorded"], r["id"]) for page in pages for r in page] == expected
+
+    # Hacia atrás desde la última página se recupera la anterior, en el mismo orden
+    first = pages[-1][0]
+    previous = manager.fetch_dreams_page(before=(first["date_recorded"], first["id"]), limit=7)
+    assert [r["id"] for r in previous] == [r["id"] for r in pages[-2]]
+
+    with_previews = manager.fetch_dreams_page(limit=1, with_previews=True)[0]
+    assert with_previews["preview"] and "creative_preview" in with_previews
+
+
+def test_aggregates_match_rows_and_rebuilds(manager):
+    dreams = _corpus()
+    manager.save_dreams_bulk(dreams)
+    manager.save_dream("Hoy", "un lobo en el tren", "Miedo", np.ones(8))
+
+    rows = [(d["date_recorded"], d["emotion"], d["content"]) for d in dreams] + [(datetime.now(), "Miedo", "un lobo en el tren")]
+    daily = Counter((date.date().isoformat(), emotion or "Indefinida") for date, emotion, _ in rows)
+    aggregates = manager.fetch_emotion_aggregates()
+    assert {(a["date"], a["emotion"]): a["count"] for a in aggregates} == daily
+    assert [a["date"] for a in aggregates] == sorted(a["date"] for a in aggregates)
+
+    terms = Counter()
+    for _, _, content in rows:
+        terms.update(term_counts(content))
+    assert manager.fetch_top_terms(limit=100) == dict(terms)
+    january = Counter()
+    for date, _, content in rows:
+        if date.strftime("%Y-%m") == "2024-01":
+            january.update(term_counts(content))
+    assert manager.fetch_top_terms(limit=100, month="2024-01") == dict(january)
+
+    version = manager.fetch_dataset_version()
+    assert manager.rebuild_emotion_aggregates()
+    with manager._transaction() as cursor:
+        manager._rebuild_term_index(cursor, batch_size=7)
+    assert manager.fetch_emotion_aggregates() == aggregates
+    assert manager.fetch_top_terms(limit=100) == dict(terms)
+    assert manager.fetch_dataset_version() == version
+
+
+def test_update_dream_enrichment_is_idempotent(manager):
+    dream_id = manager.save_dream("Pendiente", "una puerta abierta", None, np.ones(8))
+    day = manager.fetch_dream_by_id(dream_id)["date_recorded"].date().isoformat()
+    assert manager.fetch_emotion_aggregates() == [{"date": day, "emotion": "Indefinida", "count": 1}]
+
+    assert manager.update_dream_enrichment(dream_id, emotion="Alegría", creative_text="Poema", analysis_text="Análisis")
+    version = manager.fetch_dataset_version()
+    # Repetir la tarea (p. ej. tras un reintento) no sobrescribe ni vuelve a contar
+    assert manager.update_dream_enrichment(dream_id, emotion="Miedo", creative_text="Otro", analysis_text="Otro")
+    assert manager.update_dream_enrichment(dream_id, emotion="Alegría")
+
+    dream = manager.fetch_dream_by_id(dream_id)
+    assert (dream["emotion_tag"], dream["creative_text"], dream["analysis_text"]) == ("Alegría", "Poema", "Análisis")
+    assert manager.fetch_emotion_aggregates() == [{"date": day, "emotion": "Alegría", "count": 1}]
+    assert manager.fetch_dataset_version() == version
+    assert manager.update_dream_enrichment(10 ** 6, emotion="Miedo")
+
+
+def test_embeddings_filtered_by_model_version(manager):
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((3, 8)).astype(np.float32)
+    ids = [
+        manager.save_dream("a", "mar", "Alegría", vectors[0]),
+        manager.save_dream("b", "tren", "Miedo", vectors[1], embedding_model_version="viejo"),
+        manager.save_dream("c", "lobo", "Miedo", vectors[2]),
+        manager.save_dream("d", "bosque", "Miedo", None),
+    ]
+    current = "all-MiniLM-L6-v2"
+    keys, matrix = manager.fetch_all_embeddings(model_version=current)
+    assert keys == [ids[0], ids[2]]
+    np.testing.assert_array_equal(matrix, vectors[[0, 2]])
+    np.testing.assert_array_equal(manager.fetch_dream_embedding(ids[1]), vectors[1])
+    assert manager.fetch_dream_embedding(ids[1], model_version=current) is None
+
+    assert manager.count_stale_embeddings(current) == 2
+    stale = [row[0] for rows in manager.iter_stale_embeddings(current, fetch_size=1) for row in rows]
+    assert stale == [ids[1], ids[3]]
+    assert manager.update_embeddings([(ids[1], vectors[0]), (ids[3], vectors[2])], current) == 2
+    assert manager.count_stale_embeddings(current) == 0
+
+
+def test_emotion_source_is_stored_and_filtered(manager):
+    vec = np.ones(8)
+    from_llm = manager.save_dream("a", "mar", "Miedo", vec, emotion_source="ia")
+    manager.save_dream("b", "tren", "Miedo", vec, emotion_source="local")
+    pending = manager.save_dream("c", "lobo", None, vec, emotion_source="local")
+    manager.save_dreams_bulk([
+        {"title": "d", "content": "bosque", "emotion": "Calma", "embedding": vec, "emotion_source": "ia"},
+        {"title": "e", "content": "puerta", "emotion": None, "embedding": vec, "emotion_source": "ia"},
+    ])
+    assert manager.update_dream_enrichment(pending, emotion="Calma", emotion_source="ia")
+
+    labels, matrix = manager.fetch_labeled_embeddings(["Miedo", "Calma"], source="ia")
+    assert sorted(labels) == ["Calma", "Calma", "Miedo"]
+    assert matrix.shape == (3, 8)
+    assert len(manager.fetch_labeled_embeddings(["Miedo", "Calma"])[0]) == 4
+    sources = dict(manager._query("SELECT id, emotion_source FROM dreams", dictionary=False))
+    assert sources[from_llm] == "ia" and sources[pending] == "ia"
+    # Sin emoción no hay origen
+    assert sources[max(sources)] is None
+
+
+def test_old_database_gains_emotion_source_column(data_dir):
+    import sqlite3
+    path = str(data_dir / "old.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE dreams (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, content TEXT NOT NULL, "
+        "date_recorded DATETIME NOT NULL, emotion_tag TEXT, creative_format TEXT, creative_text TEXT, "
+        "analysis_text TEXT, embedding_vector TEXT, embedding_blob BLOB)"
+    )
+    conn.execute("INSERT INTO dreams (title, content, date_recorded, emotion_tag, embedding_vector) "
+                 "VALUES ('t', 'mar', '2024-01-01 10:00:00', 'Miedo', '[1, 0]')")
+    conn.commit()
+    conn.close()
+
+    manager = SQLiteDatabaseManager(path)
+    try:
+        assert manager.fetch_labeled_embeddings(["Miedo"])[0] == ["Miedo"]
+        assert manager.fetch_labeled_embeddings(["Miedo"], source="ia")[0] == []
+    finally:
+        manager.close()
+
+
+def test_fetch_dream_embedding_without_vector(manager):
+    manager.embedding_storage = "json"
+    # En modo JSON un embedding vacío se guarda como "[]"; la migración lo deja sin blob ni texto
+    dream_id = manager.save_dream("vacío", "mar", "Calma", [])
+    manager.embedding_storage = "float32"
+    assert manager.migrate_json_embeddings() == 1
+    assert manager._query("SELECT embedding_blob, embedding_vector FROM dreams WHERE id = ?", (dream_id,), dictionary=False) == [(None, None)]
+    assert manager.fetch_dream_embedding(dream_id) is None
+    assert manager.fetch_dream_embedding(manager.save_dream("sin vector", "tren", "Calma", None)) is None
+
+
+def test_keyset_page_boundaries_inside_equal_dates(manager):
+    tie = datetime(2024, 3, 1, 12, 0, 0, 250000)
+    manager.save_dreams_bulk(
+        [{"title": "antes", "content": "mar", "date_recorded": tie - timedelta(seconds=1)}]
+        + [{"title": f"empate {i}", "content": "mar", "date_recorded": tie} for i in range(5)]
+        + [{"title": "después", "content": "mar", "date_recorded": tie + timedelta(microseconds=1)}]
+    )
+    newest_first = [r["id"] for r in manager.fetch_dreams_page(limit=100)]
+    ids = {r["title"]: r["id"] for r in manager.fetch_dreams_page(limit=100)}
+    tied = sorted((ids[f"empate {i}"] for i in range(5)), reverse=True)
+    assert newest_first == [ids["después"]] + tied + [ids["antes"]]
+
+    # Cada corte de página cae dentro del grupo con la misma fecha
+    for limit in (1, 2, 3, 4):
+        walked, after = [], None
+        while True:
+            page = manager.fetch_dreams_page(after=after, limit=limit)
+            assert len(page) <= limit
+            if not page:
+                break
+            walked += [r["id"] for r in page]
+            after = (page[-1]["date_recorded"], page[-1]["id"])
+        assert walked == newest_first
+
+    # Hacia atrás desde un sueño del empate: los posteriores más cercanos, en orden descendente
+    cursor = (tie, tied[3])
+    assert [r["id"] for r in manager.fetch_dreams_page(before=cursor, limit=2)] == tied[1:3]
+    assert [r["id"] for r in manager.fetch_dreams_page(before=cursor, limit=10)] == [ids["después"]] + tied[:3]
+    assert [r["id"] for r in manager.fetch_dreams_page(after=cursor, limit=10)] == [tied[4], ids["antes"]]
+
+    # En los extremos no hay más páginas
+    assert manager.fetch_dreams_page(after=(tie - timedelta(seconds=1), ids["antes"])) == []
+    assert manager.fetch_dreams_page(before=(tie + timedelta(microseconds=1), ids["después"])) == []
+
+
+def test_monthly_term_counts(manager):
+    manager.save_dreams_bulk([
+        {"title": "a", "content": "El lobo y el mar", "date_recorded": datetime(2024, 1, 31, 23, 59)},
+        {"title": "b", "content": "Otra vez el lobo, el LOBO", "date_recorded": datetime(2024, 2, 1, 0, 0)},
+        {"title": "c", "content": "Soñé con un tren", "date_recorded": datetime(2024, 2, 15, 9, 0)},
+    ])
+    assert manager.fetch_top_terms(month="2024-01") == {"lobo": 1, "mar": 1}
+    assert manager.fetch_top_terms(month="2024-02") == {"lobo": 2, "tren": 1}
+    assert manager.fetch_top_terms(month="2023-12") == {}
+    assert manager.fetch_top_terms() == {"lobo": 3, "mar": 1, "tren": 1}
+    assert list(manager.fetch_top_terms(limit=1)) == ["lobo"]
+    assert list(manager.fetch_top_terms(limit=1, month="2024-02")) == ["lobo"]
+
+    # El enriquecimiento no toca el contenido: los conteos no cambian
+    dream_id = manager.save_dream("hoy", "un mar en calma", None, None)
+    month = manager.fetch_dream_by_id(dream_id)["date_recorded"].strftime("%Y-%m")
+    manager.update_dream_enrichment(dream_id, emotion="Calma", analysis_text="lobo lobo lobo")
+    assert manager.fetch_top_terms(month=month) == {"mar": 1, "calma": 1}
+    assert sum(manager.fetch_top_terms().values()) == 7
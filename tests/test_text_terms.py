@@ -0,0 +1,44 @@
+import pytest
+
+from back.text_terms import SPANISH_STOPWORDS, make_snippet, term_counts, tokenize
+
+
+def test_tokenize_lowercases_and_drops_stopwords():
+    assert tokenize("Soñé que el Lobo y yo cruzábamos un río") == ["lobo", "cruzábamos", "río"]
+    assert tokenize("En mi sueño había una puerta; la PUERTA estaba abierta.") == ["puerta", "puerta", "abierta"]
+
+
+def test_tokenize_keeps_accents_and_enies():
+    assert tokenize("Mañana, niño: árbol—ÁGUILA") == ["mañana", "niño", "árbol", "águila"]
+
+
+def test_tokenize_skips_digits_punctuation_and_underscores():
+    assert tokenize("tren_2024 a las 8:30... ¡¡¡luz!!! 3d") == ["tren", "luz"]
+    assert tokenize("") == [] and tokenize(None) == []
+
+
+@pytest.mark.parametrize("min_length, expected", [(3, ["mar", "luna"]), (2, ["ir", "mar", "luna"]), (4, ["luna"])])
+def test_tokenize_length_bounds(min_length, expected):
+    assert tokenize("ir al mar luna", min_length=min_length) == expected
+    assert tokenize("x" * 65 + " mar") == ["mar"]
+
+
+def test_stopwords_are_lowercase_and_cover_dream_words():
+    assert all(w == w.lower() for w in SPANISH_STOPWORDS)
+    assert {"sueño", "sueños", "soñé", "soñaba"} <= SPANISH_STOPWORDS
+    assert not tokenize(" ".join(SPANISH_STOPWORDS))
+
+
+def test_term_counts():
+    assert term_counts("El mar, el MAR y otra vez el mar bajo la luna") == {"mar": 3, "luna": 1}
+    assert term_counts("") == {}
+
+
+def test_make_snippet_centres_on_first_term():
+    text = " ".join(["relleno"] * 40 + ["lobo"] + ["final"] * 40)
+    snippet = make_snippet(text, ["LOBO"], width=60)
+    assert "lobo" in snippet
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert len(snippet) <= 62
+    assert make_snippet("  corto\n texto ", ["x"]) == "corto texto"
+    assert make_snippet(text, ["ausente"], width=20) == text[:20].rstrip() + "…"
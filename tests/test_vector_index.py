@@ -0,0 +1,55 @@
+import numpy as np
+
+from back.vector_index import VectorIndex
+
+
+def _exact_top_k(vectors, query, k):
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normed @ (query / np.linalg.norm(query))
+    order = np.argsort(-scores)[:k]
+    return order, scores[order]
+
+
+def test_search_matches_exact_top_k():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((500, 32)).astype(np.float32)
+    ids = np.arange(1000, 1500)
+    index = VectorIndex()
+    index.load(ids, vectors)
+
+    for _ in range(10):
+        query = rng.standard_normal(32).astype(np.float32)
+        order, scores = _exact_top_k(vectors, query, 10)
+        result = index.search(query, top_k=10)
+        assert [i for i, _ in result] == list(ids[order])
+        np.testing.assert_allclose([s for _, s in result], scores, rtol=1e-5, atol=1e-6)
+
+
+def test_add_grows_past_initial_capacity():
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((40, 8)).astype(np.float32)
+    index = VectorIndex(initial_capacity=4)
+    for i, vec in enumerate(vectors):
+        assert index.add(i, vec)
+    assert len(index) == 40
+
+    order, _ = _exact_top_k(vectors, vectors[7], 5)
+    assert [i for i, _ in index.search(vectors[7], top_k=5)] == list(order)
+
+
+def test_add_rejects_wrong_dimension():
+    index = VectorIndex()
+    index.load([1, 2], np.eye(2, 4, dtype=np.float32))
+    assert not index.add(3, np.ones(5, dtype=np.float32))
+    assert not index.add(4, [])
+    assert len(index) == 2
+
+
+def test_search_edge_cases():
+    index = VectorIndex()
+    assert index.search(np.ones(4), top_k=3) == []
+    index.load([1, 2, 3], np.eye(3, 4, dtype=np.float32))
+    assert index.search(np.zeros(4), top_k=3) == []
+    assert index.search(np.ones(5), top_k=3) == []
+    assert index.search(np.ones(4), top_k=0) == []
+    assert len(index.search(np.ones(4), top_k=10)) == 3